@@ -0,0 +1,254 @@
+"""Memory-pressure admission control for incoming requests.
+
+Compares the process RSS (sampled at most once per RSS_SAMPLE_INTERVAL, see
+``MemoryManager.sampled_rss``) with a soft and a hard limit, both percentages
+of MAX_TOTAL_MEMORY:
+
+- below the soft limit every request is admitted
+- above the soft limit, large requests (by Content-Length) are admitted,
+  queued behind a few in-flight large requests, or rejected, per route
+- above the hard limit large requests are rejected, and small ones are
+  admitted or rejected per route
+
+Rejected requests get a 503 with a Retry-After hint, so clients back off
+while the worker finishes what it has instead of running out of memory.
+"""
+
+import asyncio
+import contextlib
+import os
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from memory_management import MAX_TOTAL_MEMORY, memory_manager
+from metrics import ADMISSION_DECISIONS
+from structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+MEMORY_SOFT_LIMIT_PERCENT = float(os.getenv("MEMORY_SOFT_LIMIT_PERCENT", "75"))
+MEMORY_HARD_LIMIT_PERCENT = float(os.getenv("MEMORY_HARD_LIMIT_PERCENT", "90"))
+# Large requests allowed to run at once above the soft limit; the rest wait
+ADMISSION_MAX_LARGE_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_LARGE_IN_FLIGHT", "2"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "10"))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "5"))
+
+# Memory pressure levels
+NORMAL = "normal"
+ELEVATED = "elevated"
+CRITICAL = "critical"
+
+# Actions a policy can take
+ADMIT = "admit"
+QUEUE = "queue"
+REJECT = "reject"
+
+_BODY_METHODS = frozenset({"POST", "PUT", "PATCH"})
+
+
+@dataclass(frozen=True)
+class AdmissionPolicy:
+    """How requests to one route are treated under memory pressure.
+
+    Attributes:
+        large_bytes: Requests whose body is at least this big count as large;
+            None means none do. Bodies of unknown size count as large.
+        on_elevated: Action for large requests above the soft limit.
+        on_critical: Action for small requests above the hard limit
+            (large ones are always rejected there). ``queue`` is not allowed.
+
+    """
+
+    large_bytes: int | None = 1024 * 1024
+    on_elevated: str = ADMIT
+    on_critical: str = ADMIT
+
+    def __post_init__(self):
+        if self.on_elevated not in (ADMIT, QUEUE, REJECT):
+            raise ValueError(f"on_elevated must be admit, queue or reject, not {self.on_elevated}")
+        if self.on_critical not in (ADMIT, REJECT):
+            raise ValueError(f"on_critical must be admit or reject, not {self.on_critical}")
+
+
+DEFAULT_POLICY = AdmissionPolicy()
+EXEMPT = AdmissionPolicy(large_bytes=None)
+
+# Analysis and workflows hold payloads and provider responses for seconds, so
+# they are queued early and shed first; probes must keep answering
+ROUTE_POLICIES: dict[str, AdmissionPolicy] = {
+    "/api/analyze": AdmissionPolicy(large_bytes=64 * 1024, on_elevated=QUEUE, on_critical=REJECT),
+    "/api/workflows/execute": AdmissionPolicy(
+        large_bytes=64 * 1024, on_elevated=QUEUE, on_critical=REJECT
+    ),
+    "/api/health": EXEMPT,
+    "/api/memory": EXEMPT,
+    "/metrics": EXEMPT,
+}
+
+
+@dataclass
+class Admission:
+    """Outcome of ``AdmissionController.admit``; pass it back to ``release``."""
+
+    admitted: bool
+    pressure: str
+    retry_after: int | None = None
+    holds_slot: bool = False
+
+
+class AdmissionController:
+    """Admits, queues or sheds requests according to memory pressure."""
+
+    def __init__(
+        self,
+        rss: Callable[[], int] = memory_manager.sampled_rss,
+        limit_bytes: int = MAX_TOTAL_MEMORY,
+        soft_percent: float = MEMORY_SOFT_LIMIT_PERCENT,
+        hard_percent: float = MEMORY_HARD_LIMIT_PERCENT,
+        policies: dict[str, AdmissionPolicy] | None = None,
+        max_large_in_flight: int = ADMISSION_MAX_LARGE_IN_FLIGHT,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        retry_after: int = ADMISSION_RETRY_AFTER_SECONDS,
+    ):
+        """Initialize the controller.
+
+        Args:
+            rss: Returns the current RSS in bytes; should be cached, it runs per request
+            limit_bytes: Memory the soft and hard percentages refer to
+            soft_percent: Above this, large requests follow ``on_elevated``
+            hard_percent: Above this, large requests are rejected
+            policies: Policy per route path (default: ROUTE_POLICIES)
+            max_large_in_flight: Queued large requests allowed to run at once
+            queue_timeout: Seconds a queued request waits before it is rejected
+            retry_after: Retry-After hint in seconds; doubled above the hard limit
+
+        """
+        self._rss = rss
+        self.soft_bytes = limit_bytes * soft_percent / 100
+        self.hard_bytes = limit_bytes * hard_percent / 100
+        self.policies = ROUTE_POLICIES if policies is None else policies
+        self.max_large_in_flight = max_large_in_flight
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._large_in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    def pressure(self) -> str:
+        """Current memory pressure level."""
+        rss = self._rss()
+        if rss >= self.hard_bytes:
+            return CRITICAL
+        if rss >= self.soft_bytes:
+            return ELEVATED
+        return NORMAL
+
+    def policy_for(self, path: str) -> AdmissionPolicy:
+        """Return the policy for a request path, or DEFAULT_POLICY if it has none."""
+        return self.policies.get(path, DEFAULT_POLICY)
+
+    async def admit(self, method: str, path: str, content_length: int | None) -> Admission:
+        """Decide whether a request may run now, waiting for a slot if its route queues.
+
+        Args:
+            method: HTTP method; only POST, PUT and PATCH carry bodies
+            path: Request path, used to look up the route policy
+            content_length: Body size from the Content-Length header, if any
+
+        Returns:
+            The decision. If ``holds_slot`` is set, ``release`` must be called
+            when the request finishes.
+
+        """
+        pressure = self.pressure()
+        if pressure == NORMAL:
+            return Admission(True, pressure)
+
+        policy = self.policy_for(path)
+        if policy.large_bytes is None:
+            large = False
+        elif content_length is None:
+            large = method in _BODY_METHODS
+        else:
+            large = content_length >= policy.large_bytes
+        route = path if path in self.policies else "other"
+
+        if pressure == CRITICAL:
+            action = REJECT if large else policy.on_critical
+        else:
+            action = policy.on_elevated if large else ADMIT
+
+        if action == QUEUE:
+            if await self._take_slot():
+                # Memory may have kept climbing while this request waited
+                if self.pressure() != CRITICAL:
+                    ADMISSION_DECISIONS.inc(route=route, decision="queued")
+                    return Admission(True, pressure, holds_slot=True)
+                self._give_slot()
+            action = REJECT
+
+        if action == REJECT:
+            retry_after = self.retry_after * (2 if pressure == CRITICAL else 1)
+            ADMISSION_DECISIONS.inc(route=route, decision="rejected")
+            logger.warning(
+                "Request shed under memory pressure",
+                path=path,
+                pressure=pressure,
+                content_length=content_length,
+                rss_mb=round(self._rss() / 1024 / 1024, 1),
+            )
+            return Admission(False, pressure, retry_after=retry_after)
+
+        ADMISSION_DECISIONS.inc(route=route, decision="admitted")
+        return Admission(True, pressure)
+
+    def release(self, admission: Admission) -> None:
+        """Free the slot held by a queued request once it has finished."""
+        if admission.holds_slot:
+            admission.holds_slot = False
+            self._give_slot()
+
+    async def _take_slot(self) -> bool:
+        """Wait up to ``queue_timeout`` for one of the large-request slots."""
+        if self._large_in_flight < self.max_large_in_flight and not self._waiters:
+            self._large_in_flight += 1
+            return True
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            # A slot handed over just as the timeout fires still counts
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except TimeoutError:
+            with contextlib.suppress(ValueError):
+                self._waiters.remove(waiter)
+            return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._give_slot()  # Handed a slot just as the client went away
+            raise
+        return True
+
+    def _give_slot(self) -> None:
+        """Hand a finished request's slot to the oldest waiter, or free it."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._large_in_flight -= 1
+
+    def get_stats(self) -> dict[str, Any]:
+        """Current pressure, thresholds and queue state."""
+        return {
+            "pressure": self.pressure(),
+            "rss_mb": round(self._rss() / 1024 / 1024, 2),
+            "soft_limit_mb": round(self.soft_bytes / 1024 / 1024, 2),
+            "hard_limit_mb": round(self.hard_bytes / 1024 / 1024, 2),
+            "large_in_flight": self._large_in_flight,
+            "waiting": sum(not waiter.done() for waiter in self._waiters),
+        }
+
+
+admission_controller = AdmissionController()
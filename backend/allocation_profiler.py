@@ -0,0 +1,282 @@
+"""Opt-in allocation profiling with ``tracemalloc``.
+
+``MemoryManager.cleanup_memory`` frees what it can, but not what is holding
+on to memory. With MEMORY_PROFILING=1 the profiler starts ``tracemalloc``
+at startup, and ``/api/memory/snapshot`` and ``/api/memory/diff`` report the
+allocation sites that hold the most memory and those that grew since the
+last snapshot, grouped by module, file or line.
+
+Tracing costs CPU on every allocation and memory for each traced block, so
+it is off unless asked for. When it is off nothing is started and the
+profiler does no work at all.
+"""
+
+import functools
+import os
+import sysconfig
+import threading
+import time
+import tracemalloc
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+MEMORY_PROFILING = os.getenv("MEMORY_PROFILING", "").lower() in ("1", "true", "yes")
+# Frames kept per allocation; one is enough to group by module, file or line
+MEMORY_PROFILING_FRAMES = int(os.getenv("MEMORY_PROFILING_FRAMES", "1"))
+
+GROUP_BY = ("module", "file", "line")
+
+_BACKEND_DIR = Path(__file__).resolve().parent
+_STDLIB_DIR = Path(sysconfig.get_paths()["stdlib"]).resolve()
+_PACKAGE_DIRS = ("site-packages", "dist-packages")
+
+# Allocations made by tracemalloc and the import machinery are not ours. They
+# are dropped from the grouped statistics rather than with
+# ``Snapshot.filter_traces``, which matches every trace in Python and takes
+# many times longer than the snapshot itself.
+_IGNORED = frozenset(
+    {
+        tracemalloc.__file__,
+        "<frozen importlib._bootstrap>",
+        "<frozen importlib._bootstrap_external>",
+        "<unknown>",
+    }
+)
+
+
+@functools.cache
+def _display_path(filename: str) -> str:
+    """Shorten a source path to the part that identifies it."""
+    path = Path(filename)
+    parts = path.parts
+    for marker in _PACKAGE_DIRS:
+        if marker in parts:
+            return "/".join(parts[parts.index(marker) + 1 :])
+    for root, prefix in ((_BACKEND_DIR, ""), (_STDLIB_DIR, "stdlib/")):
+        if path.is_relative_to(root):
+            return prefix + path.relative_to(root).as_posix()
+    return filename
+
+
+@functools.cache
+def module_for(filename: str) -> str:
+    """Name the module an allocation site belongs to.
+
+    Backend files keep their path (``rate_limiting.py``,
+    ``plugins/ollama_provider.py``), so each of our modules shows up on its
+    own; third-party and standard library files are rolled up into their
+    top-level package (``aiohttp``, ``stdlib/asyncio``).
+
+    Args:
+        filename: Source file of the allocation site
+
+    Returns:
+        Module label used by ``group_by="module"``
+
+    """
+    path = Path(filename)
+    if path.is_relative_to(_BACKEND_DIR) and not set(_PACKAGE_DIRS) & set(path.parts):
+        return path.relative_to(_BACKEND_DIR).as_posix()
+    display = _display_path(filename)
+    if display.startswith("stdlib/"):
+        return "/".join(display.split("/")[:2]).removesuffix(".py")
+    if display != filename:
+        return display.split("/")[0].removesuffix(".py")
+    return filename
+
+
+def _line_totals(snapshot: tracemalloc.Snapshot) -> dict[tuple[str, int], list[int]]:
+    """Total ``[size, count]`` per source line for one snapshot."""
+    lines = {}
+    for stat in snapshot.statistics("lineno"):
+        frame = stat.traceback[0]
+        if frame.filename not in _IGNORED:
+            lines[frame.filename, frame.lineno] = [stat.size, stat.count]
+    return lines
+
+
+def _grouped(lines: dict[tuple[str, int], list[int]], group_by: str) -> dict[str, list[int]]:
+    """Roll per-line totals up into sites for ``group_by``."""
+    sites: dict[str, list[int]] = {}
+    for (filename, lineno), (size, count) in lines.items():
+        if group_by == "line":
+            site = f"{_display_path(filename)}:{lineno}"
+        elif group_by == "file":
+            site = _display_path(filename)
+        else:
+            site = module_for(filename)
+        totals = sites.setdefault(site, [0, 0])
+        totals[0] += size
+        totals[1] += count
+    return sites
+
+
+def _kb(size: int) -> float:
+    return round(size / 1024, 1)
+
+
+class AllocationProfiler:
+    """Takes ``tracemalloc`` snapshots and reports where memory is held and growing.
+
+    Only per-line totals of the latest snapshot are kept, as the baseline
+    for the next ``diff``. A snapshot itself holds a record of every traced
+    block, so holding on to it would look like a leak of its own.
+    """
+
+    def __init__(self, enabled: bool = MEMORY_PROFILING, frames: int = MEMORY_PROFILING_FRAMES):
+        """Initialize the profiler.
+
+        Args:
+            enabled: Whether ``start`` turns tracing on
+            frames: Stack frames stored per traced allocation
+
+        """
+        self.enabled = enabled
+        self.frames = max(1, frames)
+        self._baseline: dict[tuple[str, int], list[int]] | None = None
+        self._baseline_at: float | None = None
+        self._started_here = False
+        # Snapshots can take seconds on a large heap; don't take two at once
+        self._lock = threading.Lock()
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        """Start tracing if profiling is enabled and nobody else has started it."""
+        if not self.enabled or self.tracing:
+            return
+        tracemalloc.start(self.frames)
+        self._started_here = True
+        logger.info("Allocation profiling started", frames=self.frames)
+
+    def stop(self) -> None:
+        """Stop tracing started by ``start`` and drop the baseline."""
+        self._baseline = None
+        self._baseline_at = None
+        if self._started_here and self.tracing:
+            tracemalloc.stop()
+            logger.info("Allocation profiling stopped")
+        self._started_here = False
+
+    def _take_snapshot(self) -> dict[tuple[str, int], list[int]]:
+        if not self.tracing:
+            raise RuntimeError(
+                "Allocation profiling is off; restart with MEMORY_PROFILING=1 to enable it"
+            )
+        return _line_totals(tracemalloc.take_snapshot())
+
+    def _summary(self) -> dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "traced_mb": round(current / 1024 / 1024, 2),
+            "peak_traced_mb": round(peak / 1024 / 1024, 2),
+            "tracemalloc_overhead_mb": round(tracemalloc.get_tracemalloc_memory() / 1024 / 1024, 2),
+        }
+
+    def snapshot(self, group_by: str = "module", limit: int = 20) -> dict[str, Any]:
+        """Take a snapshot, keep it as the new baseline and report the largest sites.
+
+        Args:
+            group_by: ``module``, ``file`` or ``line``
+            limit: Number of sites to report
+
+        Returns:
+            dict: Traced memory totals and the top sites by size
+
+        Raises:
+            RuntimeError: If tracing is not running.
+            ValueError: If ``group_by`` is not one of GROUP_BY.
+
+        """
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}, not {group_by}")
+        with self._lock:
+            lines = self._take_snapshot()
+            taken_at = time.time()
+            self._baseline, self._baseline_at = lines, taken_at
+
+        sites = _grouped(lines, group_by)
+        top = sorted(sites.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+        return {
+            "taken_at": datetime.fromtimestamp(taken_at, UTC).isoformat(),
+            "group_by": group_by,
+            **self._summary(),
+            "top": [
+                {"site": site, "size_kb": _kb(size), "count": count} for site, (size, count) in top
+            ],
+        }
+
+    def diff(self, group_by: str = "module", limit: int = 20) -> dict[str, Any]:
+        """Compare the heap now with the last snapshot and report the sites that grew most.
+
+        The baseline is left in place, so repeated calls show growth over a
+        longer and longer window until the next ``snapshot``.
+
+        Args:
+            group_by: ``module``, ``file`` or ``line``
+            limit: Number of sites to report
+
+        Returns:
+            dict: Total growth and the top sites by growth since the baseline
+
+        Raises:
+            RuntimeError: If tracing is not running or no snapshot was taken yet.
+            ValueError: If ``group_by`` is not one of GROUP_BY.
+
+        """
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}, not {group_by}")
+        with self._lock:
+            current = self._take_snapshot()
+            baseline, baseline_at = self._baseline, self._baseline_at
+        if baseline is None:
+            raise RuntimeError("No baseline yet; take one with POST /api/memory/snapshot")
+
+        before = _grouped(baseline, group_by)
+        after = _grouped(current, group_by)
+        changes = []
+        for site in before.keys() | after.keys():
+            size, count = after.get(site, (0, 0))
+            old_size, old_count = before.get(site, (0, 0))
+            if size != old_size or count != old_count:
+                changes.append((site, size, size - old_size, count, count - old_count))
+        changes.sort(key=lambda change: change[2], reverse=True)
+
+        now = time.time()
+        return {
+            "baseline_taken_at": datetime.fromtimestamp(baseline_at, UTC).isoformat(),
+            "taken_at": datetime.fromtimestamp(now, UTC).isoformat(),
+            "elapsed_seconds": round(now - baseline_at, 1),
+            "group_by": group_by,
+            **self._summary(),
+            "growth_kb": _kb(sum(change[2] for change in changes)),
+            "top": [
+                {
+                    "site": site,
+                    "size_kb": _kb(size),
+                    "size_diff_kb": _kb(size_diff),
+                    "count": count,
+                    "count_diff": count_diff,
+                }
+                for site, size, size_diff, count, count_diff in changes[:limit]
+            ],
+        }
+
+    def get_stats(self) -> dict[str, Any]:
+        """Whether tracing is on and, if so, how much it is tracking."""
+        if not self.tracing:
+            return {"enabled": False}
+        stats = {"enabled": True, "frames": tracemalloc.get_traceback_limit(), **self._summary()}
+        if self._baseline_at is not None:
+            stats["baseline_age_seconds"] = round(time.time() - self._baseline_at, 1)
+        return stats
+
+
+allocation_profiler = AllocationProfiler()
@@ -0,0 +1,232 @@
+"""Micro-benchmarks for the per-request hot paths, with a stored baseline.
+
+Times ``estimate_tokens``, ``SmartChunker.chunk_text``,
+``ConsensusAnalyzer.analyze_consensus``, ``sanitize_value``,
+``RateLimiter.check_rate_limit`` and ``limit_response_size`` on fixed,
+seeded corpora at several sizes. Each case is run in a calibrated loop;
+the best of ``--repeat`` rounds is reported as operations per second.
+
+Results are compared with ``baselines/hot_paths.json`` and any case that
+is more than ``--threshold`` slower is reported as a regression, which
+makes the script exit non-zero. Baselines are machine-specific: record
+one on the machine that runs the comparison (``--save-baseline``) before
+starting on a change, and commit it when the numbers move on purpose.
+
+Usage (from the backend directory):
+    python benchmarks/bench_hot_paths.py
+    python benchmarks/bench_hot_paths.py --filter chunk_text --repeat 10
+    python benchmarks/bench_hot_paths.py --save-baseline
+    python benchmarks/bench_hot_paths.py --threshold 0.25 --json
+"""
+
+import argparse
+import json
+import logging
+import platform
+import random
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import structlog
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from consensus_analyzer import ConsensusAnalyzer
+from memory_management import MAX_RESPONSE_SIZE, limit_response_size
+from rate_limiting import RateLimiter
+from smart_chunking import SmartChunker
+from structured_logging import sanitize_value
+from token_utils import estimate_tokens
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "hot_paths.json"
+DEFAULT_THRESHOLD = 0.15
+
+SIZES = {"1k": 1_000, "32k": 32_000, "512k": 512_000}
+# SequenceMatcher is quadratic; responses are a few KB in practice
+CONSENSUS_SIZES = {"1k": 1_000, "4k": 4_000, "16k": 16_000}
+
+_VOCABULARY = (
+    "the model response energy grid storage solar wind cost analysis claim evidence "
+    "renewable capacity demand policy market price battery transmission forecast risk "
+    "However therefore although because; while: (see above) - 42% 2024 $1.5bn"
+).split()
+
+
+def make_text(size: int, seed: int = 0) -> str:
+    """Return ``size`` characters of sentence- and paragraph-shaped text."""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        sentence = " ".join(rng.choice(_VOCABULARY) for _ in range(rng.randint(6, 18)))
+        sentence = sentence.capitalize() + rng.choice((". ", "! ", "? ", ".\n\n"))
+        parts.append(sentence)
+        length += len(sentence)
+    return "".join(parts)[:size]
+
+
+def make_log_event(text: str) -> dict:
+    """Build a log event shaped like the workflow node logs, carrying ``text``."""
+    return {
+        "event": "Node execution details",
+        "node_id": "node-3",
+        "node_type": "llm",
+        "node_data": {"prompt": text, "models": ["gpt-4", "claude-3-opus"]},
+        "extra": {"request_id": "5f0c2c7e-1b7a-4c55-9a3e-000000000001", "api_key": "sk-abc123"},
+        "timestamp": "2025-01-01T00:00:00.000000+00:00",
+        "level": "info",
+    }
+
+
+def build_cases() -> dict[str, Callable[[], object]]:
+    """Return every benchmark case as a zero-argument callable, keyed by name."""
+    cases: dict[str, Callable[[], object]] = {}
+    chunker = SmartChunker()
+
+    texts = {label: make_text(size) for label, size in SIZES.items()}
+
+    for label, text in texts.items():
+        cases[f"estimate_tokens/{label}"] = lambda text=text: estimate_tokens(text)
+    for label, text in texts.items():
+        cases[f"chunk_text/{label}"] = lambda text=text: chunker.chunk_text(text)
+    for label, text in texts.items():
+        event = make_log_event(text)
+        cases[f"sanitize_value/{label}"] = lambda event=event: sanitize_value(event)
+    for label, text in texts.items():
+        cases[f"limit_response_size/{label}"] = lambda text=text: limit_response_size(text)
+    oversized = make_text(MAX_RESPONSE_SIZE + MAX_RESPONSE_SIZE // 10)
+    cases["limit_response_size/oversized"] = lambda: limit_response_size(oversized)
+
+    for label, size in CONSENSUS_SIZES.items():
+        responses = [
+            {"model": model, "response": make_text(size, seed), "error": None}
+            for seed, model in enumerate(("openai", "claude", "gemini"))
+        ]
+        cases[f"analyze_consensus/{label}"] = (
+            lambda responses=responses: ConsensusAnalyzer.analyze_consensus(responses)
+        )
+
+    limiter = RateLimiter(
+        requests_per_minute=10**9,
+        requests_per_hour=10**9,
+        requests_per_day=10**9,
+        burst_size=10**9,
+    )
+    identifiers = [f"id-{i:04d}" for i in range(1_000)]
+    counter = iter(range(10**12))
+
+    def check_rate_limit() -> object:
+        return limiter.check_rate_limit(identifiers[next(counter) % len(identifiers)])
+
+    cases["check_rate_limit/1k-ids"] = check_rate_limit
+    return cases
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float) -> float:
+    """Return the best operations per second over ``repeat`` calibrated rounds."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return 1 / best
+
+
+def compare(
+    results: dict[str, float], baseline: dict[str, float], threshold: float
+) -> dict[str, dict]:
+    """Relate each result to its baseline; ``change`` is the fractional speed change."""
+    report = {}
+    for name, ops in results.items():
+        base = baseline.get(name)
+        change = (ops / base - 1) if base else None
+        report[name] = {
+            "ops_per_sec": round(ops, 2),
+            "baseline_ops_per_sec": base,
+            "change": round(change, 4) if change is not None else None,
+            "regression": change is not None and change < -threshold,
+        }
+    return report
+
+
+def load_baseline(path: Path) -> dict[str, float]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())["results"]
+
+
+def save_baseline(path: Path, results: dict[str, float]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {name: round(ops, 2) for name, ops in sorted(results.items())},
+    }
+    path.write_text(json.dumps(data, indent=2) + "\n")
+
+
+def print_report(report: dict[str, dict], threshold: float) -> None:
+    width = max(len(name) for name in report)
+    print(f"{'case':<{width}} {'ops/s':>12} {'us/op':>10} {'baseline':>12} {'change':>8}")
+    for name, row in report.items():
+        ops = row["ops_per_sec"]
+        base = row["baseline_ops_per_sec"]
+        change = f"{row['change'] * 100:+.1f}%" if row["change"] is not None else "-"
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{name:<{width}} {ops:>12.1f} {1e6 / ops:>10.2f}"
+            f" {base if base is not None else '-':>12} {change:>8}{flag}"
+        )
+    regressions = sum(row["regression"] for row in report.values())
+    print(f"\n{regressions} regression(s) beyond {threshold * 100:.0f}%")
+
+
+def main() -> None:
+    """Parse arguments, run the selected cases and compare with the baseline."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", default="", help="Only run cases containing this text")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed rounds per case")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per round")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    # chunk_text and limit_response_size log per call; keep logging out of the measurement
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.ERROR))
+
+    cases = {name: func for name, func in build_cases().items() if args.filter in name}
+    if not cases:
+        sys.exit(f"no cases match {args.filter!r}")
+    results = {name: measure(func, args.repeat, args.min_time) for name, func in cases.items()}
+
+    if args.save_baseline:
+        # Merge so a filtered run only refreshes the cases it measured
+        save_baseline(args.baseline, {**load_baseline(args.baseline), **results})
+        print(f"saved {len(results)} case(s) to {args.baseline}")
+
+    report = compare(results, load_baseline(args.baseline), args.threshold)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args.threshold)
+    if any(row["regression"] for row in report.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Micro-benchmark for RateLimiter.check_rate_limit.
+
+Measures per-check cost and retained memory per identifier when the
+limiter tracks many distinct identifiers.
+
+Usage (from the backend directory):
+    python benchmarks/bench_rate_limiter.py --identifiers 10000 --checks 200000
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rate_limiting import RateLimiter
+
+
+def run(identifiers: int, checks: int) -> dict[str, float]:
+    """Run the benchmark and return the measured figures."""
+    limiter = RateLimiter(
+        requests_per_minute=10**9,
+        requests_per_hour=10**9,
+        requests_per_day=10**9,
+        burst_size=10**9,
+    )
+    ids = [f"id-{i:08d}" for i in range(identifiers)]
+
+    # Memory: populate every identifier once and measure what stays allocated
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for identifier in ids:
+        limiter.check_rate_limit(identifier)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Throughput: random checks spread over the populated identifiers
+    rng = random.Random(1234)
+    sample = [ids[rng.randrange(identifiers)] for _ in range(checks)]
+    start = time.perf_counter()
+    for identifier in sample:
+        limiter.check_rate_limit(identifier)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "identifiers": identifiers,
+        "checks": checks,
+        "ns_per_check": elapsed / checks * 1e9,
+        "checks_per_sec": checks / elapsed,
+        "bytes_per_identifier": (retained - baseline) / identifiers,
+    }
+
+
+def main() -> None:
+    """Parse arguments and print the benchmark report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--identifiers", type=int, default=10_000)
+    parser.add_argument("--checks", type=int, default=200_000)
+    args = parser.parse_args()
+
+    result = run(args.identifiers, args.checks)
+    print(f"identifiers:          {result['identifiers']}")
+    print(f"checks:               {result['checks']}")
+    print(f"per check:            {result['ns_per_check']:.0f} ns")
+    print(f"throughput:           {result['checks_per_sec']:.0f} checks/s")
+    print(f"memory / identifier:  {result['bytes_per_identifier']:.0f} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Concurrent stress benchmark for the sharded RateLimiter.
+
+Drives check_rate_limit from many threads at once and verifies that every
+identifier is admitted exactly ``--limit`` times, then reports throughput.
+The target throughput for the API process is 50k checks/sec. The run must
+finish inside one minute window for the exact-count check to hold.
+
+Usage (from the backend directory):
+    python benchmarks/bench_rate_limiter_concurrency.py --threads 16 --checks 500000
+"""
+
+import argparse
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+import structlog
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rate_limiting import RateLimiter
+
+TARGET_CHECKS_PER_SEC = 50_000
+
+
+def run(threads: int, checks: int, identifiers: int, limit: int, shards: int) -> dict:
+    """Run the stress test and return throughput and correctness figures."""
+    limiter = RateLimiter(
+        requests_per_minute=limit,
+        requests_per_hour=10**9,
+        requests_per_day=10**9,
+        burst_size=10**9,
+        num_shards=shards,
+    )
+    ids = [f"id-{i:06d}" for i in range(identifiers)]
+    per_thread = checks // threads
+    admitted: list[Counter] = [Counter() for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(index: int) -> None:
+        local = admitted[index]
+        barrier.wait()
+        for n in range(per_thread):
+            identifier = ids[(n * threads + index) % identifiers]
+            if limiter.check_rate_limit(identifier)[0]:
+                local[identifier] += 1
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    totals: Counter = Counter()
+    for local in admitted:
+        totals.update(local)
+    attempts_per_id = per_thread * threads // identifiers
+    expected = min(limit, attempts_per_id)
+    wrong = [i for i in ids if totals[i] != expected]
+
+    return {
+        "checks": per_thread * threads,
+        "elapsed": elapsed,
+        "checks_per_sec": per_thread * threads / elapsed,
+        "expected_per_id": expected,
+        "wrong_identifiers": len(wrong),
+    }
+
+
+def main() -> None:
+    """Parse arguments, run the stress test and exit non-zero on failure."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--checks", type=int, default=500_000)
+    parser.add_argument("--identifiers", type=int, default=1_000)
+    parser.add_argument("--limit", type=int, default=400)
+    parser.add_argument("--shards", type=int, default=16)
+    args = parser.parse_args()
+
+    # Rejections log a warning each; keep logging out of the measurement
+    structlog.configure(wrapper_class=structlog.make_filtering_bound_logger(logging.ERROR))
+    result = run(args.threads, args.checks, args.identifiers, args.limit, args.shards)
+    print(f"checks:             {result['checks']}")
+    print(f"throughput:         {result['checks_per_sec']:.0f} checks/s")
+    print(f"admitted per id:    {result['expected_per_id']} expected")
+    print(f"wrong identifiers:  {result['wrong_identifiers']}")
+
+    if result["wrong_identifiers"]:
+        sys.exit("FAIL: limit not enforced exactly")
+    if result["checks_per_sec"] < TARGET_CHECKS_PER_SEC:
+        print(f"WARNING: below target of {TARGET_CHECKS_PER_SEC} checks/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark the log sanitizer on realistic log events.
+
+Compares ``sanitize_value`` against applying every pattern in
+SENSITIVE_PATTERNS to every string, which is what the sanitizer did
+before the literal prefilter and clean-string cache.
+
+Usage (from the backend directory):
+    python benchmarks/bench_sanitizer.py --events 20000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import structured_logging
+from structured_logging import _redact, sanitize_value
+
+
+def sanitize_every_string(value: Any) -> Any:
+    """Previous behaviour: run every pattern over every string."""
+    if isinstance(value, str):
+        return _redact(value)
+    if isinstance(value, dict):
+        return {k: sanitize_every_string(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [sanitize_every_string(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(sanitize_every_string(item) for item in value)
+    return value
+
+
+def make_events(count: int) -> list[dict]:
+    """Build a mix of events shaped like the ones the backend logs."""
+    node_text = "Analyze the following text and list the key claims.\n\n" + "Lorem ipsum " * 80
+    templates = [
+        lambda i: {
+            "event": "api_request",
+            "method": "POST",
+            "path": "/api/analyze",
+            "client": "127.0.0.1",
+            "query_params": {},
+        },
+        lambda i: {
+            "event": "api_response",
+            "status_code": 200,
+            "duration_ms": 123.4 + i % 10,
+        },
+        lambda i: {
+            "event": "Model response received",
+            "extra": {
+                "request_id": f"5f0c2c7e-1b7a-4c55-9a3e-{i:012d}",
+                "model": "claude",
+                "has_error": False,
+                "response_length": 1834,
+            },
+        },
+        lambda i: {
+            "event": "Node execution details",
+            "node_id": f"node-{i % 7}",
+            "node_type": "llm",
+            "node_data": {"prompt": node_text, "models": ["gpt-4", "claude-3-opus"]},
+        },
+        lambda i: {
+            "event": "Request failed",
+            "error": f"Incorrect API key provided: sk-abc{i:020d}",
+        },
+    ]
+    events = []
+    for i in range(count):
+        event = templates[i % len(templates)](i)
+        event.update(
+            timestamp=f"2025-01-01T00:00:{i % 60:02d}.{i:06d}+00:00",
+            level="info",
+            logger="main",
+            filename="main.py",
+            func_name="analyze_text",
+            lineno=500 + i % 50,
+        )
+        events.append(event)
+    return events
+
+
+def time_run(func, events: list[dict]) -> float:
+    start = time.perf_counter()
+    for event in events:
+        func(event)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20_000)
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    for event in events[:100]:
+        assert sanitize_value(event) == sanitize_every_string(event)
+
+    before = time_run(sanitize_every_string, events)
+    structured_logging._clean_strings.clear()
+    cold = time_run(sanitize_value, events)
+    warm = time_run(sanitize_value, events)
+
+    for label, elapsed in (
+        ("every pattern, every string", before),
+        ("fast path, cold cache", cold),
+        ("fast path, warm cache", warm),
+    ):
+        per_event = elapsed / args.events * 1e6
+        print(f"{label:<30} {per_event:8.2f} us/event  ({before / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""Open-loop load generator for the FastAPI app.
+
+Sends requests at a fixed rate regardless of how fast earlier ones
+complete, so a slow server shows up as growing latency rather than as a
+quietly reduced request rate. Reports throughput, latency percentiles,
+status codes and the error rate.
+
+Run the app against ``mock_providers.py`` to measure without provider keys,
+or pass ``--spawn`` to start both as subprocesses (useful in CI). With
+``--spawn`` the app runs with ``TESTING=1``, which bypasses the per-IP
+rate limit on ``/api/analyze``; other endpoints are still limited to
+60 requests a minute per client and show up as 429s.
+
+Usage (from the backend directory):
+    python benchmarks/load_test.py --spawn --rps 50 --duration 30
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --scenario workflow --rps 5
+    python benchmarks/load_test.py --spawn --mock-latency-ms 800 --mock-error-rate 0.05 --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import aiohttp
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from latency_histogram import LatencyHistogram  # noqa: E402
+
+REPORT_PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+SAMPLE_TEXT = (
+    "Renewable energy adoption has accelerated over the last decade. Solar and wind "
+    "costs have fallen sharply, while storage remains the main constraint on the grid. "
+) * 4
+
+
+def analyze_payload(text: str) -> dict[str, Any]:
+    """Body for ``POST /api/analyze`` hitting the OpenAI and Anthropic paths."""
+    return {"text": text, "openai_key": "sk-mock-load-test", "claude_key": "sk-ant-mock-load-test"}
+
+
+def workflow_payload(text: str) -> dict[str, Any]:
+    """Body for ``POST /api/workflows/execute``: input -> LLM -> output."""
+    return {
+        "workflow": {
+            "nodes": [
+                {"id": "in", "type": "input", "data": {"type": "text", "content": text}},
+                {"id": "llm", "type": "llm", "data": {"models": ["gpt-4", "claude-3-opus"]}},
+                {"id": "out", "type": "output", "data": {"format": "text"}},
+            ],
+            "edges": [{"source": "in", "target": "llm"}, {"source": "llm", "target": "out"}],
+        },
+        "api_keys": {"openai": "sk-mock-load-test", "claude": "sk-ant-mock-load-test"},
+    }
+
+
+SCENARIOS = {
+    "analyze": ("/api/analyze", analyze_payload),
+    "workflow": ("/api/workflows/execute", workflow_payload),
+}
+
+
+class LoadResult:
+    """Outcome of one load run."""
+
+    def __init__(self):
+        self.sent = 0
+        self.completed = 0
+        self.dropped = 0
+        self.elapsed = 0.0
+        self.statuses: Counter = Counter()
+        self.latency = LatencyHistogram()
+        self.failed_latency = LatencyHistogram()
+
+    def record(self, status: str, seconds: float) -> None:
+        self.completed += 1
+        self.statuses[status] += 1
+        if status.startswith("2"):
+            self.latency.record(seconds)
+        else:
+            self.failed_latency.record(seconds)
+
+    def to_dict(self) -> dict[str, Any]:
+        errors = self.completed - sum(n for s, n in self.statuses.items() if s.startswith("2"))
+        latency = {
+            f"p{p:g}_ms": round(value * 1000, 2) if value is not None else None
+            for p, value in self.latency.percentiles(REPORT_PERCENTILES).items()
+        }
+        mean = self.latency.mean
+        latency["mean_ms"] = round(mean * 1000, 2) if mean is not None else None
+        latency["max_ms"] = round(self.latency.max * 1000, 2) if self.latency.count else None
+        failed_mean = self.failed_latency.mean
+        return {
+            "sent": self.sent,
+            "completed": self.completed,
+            "dropped": self.dropped,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "throughput_rps": round(self.completed / self.elapsed, 2) if self.elapsed else 0.0,
+            "error_rate": round(errors / self.completed, 4) if self.completed else 0.0,
+            "statuses": dict(sorted(self.statuses.items())),
+            "latency": latency,
+            "failed_mean_ms": round(failed_mean * 1000, 2) if failed_mean is not None else None,
+        }
+
+
+async def run_load(
+    url: str,
+    path: str,
+    payload: dict[str, Any],
+    rps: float,
+    duration: float,
+    max_in_flight: int = 1000,
+    timeout: float = 120.0,
+) -> LoadResult:
+    """Send ``rps`` requests a second for ``duration`` seconds and wait for them.
+
+    Requests are scheduled on a fixed timetable. When ``max_in_flight``
+    requests are already outstanding the next one is counted as dropped
+    instead of being queued, so the offered load stays honest.
+
+    """
+    result = LoadResult()
+    body = json.dumps(payload).encode()
+    headers = {"Content-Type": "application/json"}
+    connector = aiohttp.TCPConnector(limit=max_in_flight)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    in_flight: set[asyncio.Task] = set()
+
+    async with aiohttp.ClientSession(url, connector=connector, timeout=client_timeout) as session:
+
+        async def one() -> None:
+            start = time.perf_counter()
+            try:
+                async with session.post(path, data=body, headers=headers) as response:
+                    await response.read()
+                    status = str(response.status)
+            except TimeoutError:
+                status = "timeout"
+            except aiohttp.ClientError as e:
+                status = type(e).__name__
+            result.record(status, time.perf_counter() - start)
+
+        total = int(rps * duration)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for i in range(total):
+            delay = start + i / rps - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(in_flight) >= max_in_flight:
+                result.dropped += 1
+                continue
+            result.sent += 1
+            task = asyncio.create_task(one())
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+        if in_flight:
+            await asyncio.wait(in_flight)
+        result.elapsed = loop.time() - start
+    return result
+
+
+def _wait_until_up(url: str, process: subprocess.Popen, deadline: float) -> None:
+    while True:
+        try:
+            # url is always one of the local http:// servers spawned below
+            with urllib.request.urlopen(url, timeout=1):  # noqa: S310
+                return
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError(f"server for {url} exited with {process.returncode}") from None
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} did not come up") from None
+            time.sleep(0.2)
+
+
+@contextmanager
+def spawn_stack(args: argparse.Namespace) -> Iterator[str]:
+    """Start the mock providers and the app as subprocesses; yield the app URL."""
+    mock_url = f"http://127.0.0.1:{args.mock_port}"
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    mock_cmd = [
+        sys.executable,
+        str(BACKEND_DIR / "benchmarks" / "mock_providers.py"),
+        "--port", str(args.mock_port),
+        "--latency-ms", str(args.mock_latency_ms),
+        "--distribution", args.mock_distribution,
+        "--error-rate", str(args.mock_error_rate),
+        "--seed", "0",
+    ]  # fmt: skip
+    env = {
+        **os.environ,
+        "OPENAI_BASE_URL": f"{mock_url}/v1",
+        "ANTHROPIC_BASE_URL": mock_url,
+        "OLLAMA_BASE_URL": mock_url,
+        "TESTING": "1",
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+    }
+    app_cmd = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--port", str(args.app_port),
+        "--log-level", "warning",
+        "--no-access-log",
+    ]  # fmt: skip
+    processes = []
+    try:
+        # Both commands are fixed argument lists run without a shell
+        mock = subprocess.Popen(mock_cmd, cwd=BACKEND_DIR)  # noqa: S603
+        processes.append(mock)
+        app = subprocess.Popen(  # noqa: S603
+            app_cmd, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL
+        )
+        processes.append(app)
+        deadline = time.monotonic() + 30
+        _wait_until_up(f"{mock_url}/api/tags", mock, deadline)
+        _wait_until_up(f"{app_url}/api/health", app, deadline)
+        yield app_url
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def print_report(data: dict[str, Any]) -> None:
+    latency = data["latency"]
+    print(f"sent:        {data['sent']} ({data['dropped']} dropped)")
+    print(f"completed:   {data['completed']} in {data['elapsed_seconds']:.1f}s")
+    print(f"throughput:  {data['throughput_rps']:.1f} req/s")
+    print(f"error rate:  {data['error_rate'] * 100:.2f}%")
+    print("statuses:    " + ", ".join(f"{s}={n}" for s, n in data["statuses"].items()))
+    print("latency ms:  " + "  ".join(f"{k[:-3]}={v}" for k, v in latency.items()))
+
+
+def main() -> None:
+    """Parse arguments, run the load and print the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="App base URL")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="analyze")
+    parser.add_argument("--rps", type=float, default=20.0, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load")
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--spawn", action="store_true", help="Start mock providers and the app")
+    parser.add_argument("--app-port", type=int, default=8765)
+    parser.add_argument("--mock-port", type=int, default=8900)
+    parser.add_argument("--mock-latency-ms", type=float, default=200.0)
+    parser.add_argument("--mock-distribution", default="lognormal")
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    path, build_payload = SCENARIOS[args.scenario]
+    payload = build_payload(SAMPLE_TEXT)
+
+    def run(url: str) -> LoadResult:
+        return asyncio.run(
+            run_load(url, path, payload, args.rps, args.duration, args.max_in_flight, args.timeout)
+        )
+
+    if args.spawn:
+        with spawn_stack(args) as url:
+            result = run(url)
+    else:
+        result = run(args.url)
+
+    data = {"scenario": args.scenario, "target_rps": args.rps, **result.to_dict()}
+    if args.json:
+        print(json.dumps(data, indent=2))
+    else:
+        print_report(data)
+    if not result.completed:
+        sys.exit("FAIL: no requests completed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""Fake OpenAI, Anthropic and Ollama endpoints for offline load testing.
+
+Serves just enough of each provider's HTTP API for the official SDKs and
+``OllamaProvider`` to work against it, with a configurable latency
+distribution, error rate and token streaming:
+
+- OpenAI ``POST /v1/chat/completions`` (JSON or SSE when ``stream`` is set)
+- Anthropic ``POST /v1/messages`` (JSON or SSE when ``stream`` is set)
+- Ollama ``GET /api/tags``, ``GET /api/ps``, ``POST /api/generate`` and
+  ``POST /api/chat`` (NDJSON unless ``stream`` is false)
+
+Point the backend at it with::
+
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8900
+    OLLAMA_BASE_URL=http://127.0.0.1:8900
+
+Usage (from the backend directory):
+    python benchmarks/mock_providers.py --port 8900 --latency-ms 300 --distribution lognormal
+    python benchmarks/mock_providers.py --error-rate 0.05 --tokens 200 --token-ms 5
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from aiohttp import web
+
+DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+
+@dataclass
+class MockConfig:
+    """Behaviour of the fake providers.
+
+    Attributes:
+        latency_ms: Median time before the first byte of a response.
+        distribution: ``fixed``, ``uniform`` (0..2x median) or ``lognormal``.
+        sigma: Shape of the lognormal distribution; 0.5 gives a p99 around 3x the median.
+        error_rate: Fraction of requests answered with ``error_status``.
+        error_status: HTTP status returned for injected errors.
+        tokens: Completion tokens per response.
+        token_ms: Delay between streamed tokens.
+        models: Model names reported by the Ollama catalog.
+        seed: Seed for latency and error sampling, for repeatable runs.
+
+    """
+
+    latency_ms: float = 200.0
+    distribution: str = "lognormal"
+    sigma: float = 0.5
+    error_rate: float = 0.0
+    error_status: int = 500
+    tokens: int = 50
+    token_ms: float = 0.0
+    models: tuple[str, ...] = ("llama3.2:latest", "llama3.3:70b")
+    seed: int | None = None
+
+    def __post_init__(self):
+        if self.distribution not in DISTRIBUTIONS:
+            raise ValueError(f"distribution must be one of {', '.join(DISTRIBUTIONS)}")
+        if not 0.0 <= self.error_rate <= 1.0:
+            raise ValueError("error_rate must be between 0 and 1")
+
+
+class MockProviders:
+    """aiohttp application serving the fake provider endpoints."""
+
+    def __init__(self, config: MockConfig | None = None):
+        self.config = config or MockConfig()
+        self._random = random.Random(self.config.seed)
+        self.requests: dict[str, int] = {}
+        self.errors = 0
+
+    def app(self) -> web.Application:
+        """Build the aiohttp application."""
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.openai_chat)
+        app.router.add_post("/v1/messages", self.anthropic_messages)
+        app.router.add_get("/api/tags", self.ollama_tags)
+        app.router.add_get("/api/ps", self.ollama_ps)
+        app.router.add_post("/api/generate", self.ollama_generate)
+        app.router.add_post("/api/chat", self.ollama_chat)
+        app.router.add_get("/stats", self.stats)
+        return app
+
+    def sample_latency(self) -> float:
+        """Return one time-to-first-byte sample in seconds."""
+        median = self.config.latency_ms / 1000
+        if self.config.distribution == "fixed":
+            return median
+        if self.config.distribution == "uniform":
+            return self._random.uniform(0, 2 * median)
+        return self._random.lognormvariate(0, self.config.sigma) * median
+
+    def _words(self) -> list[str]:
+        return [f"token{i} " for i in range(self.config.tokens)]
+
+    async def _begin(self, request: web.Request) -> tuple[dict[str, Any], web.Response | None]:
+        """Count the request, wait out its latency and decide whether it fails."""
+        route = request.path
+        self.requests[route] = self.requests.get(route, 0) + 1
+        try:
+            body = await request.json()
+        except ValueError:
+            return {}, web.json_response({"error": {"message": "invalid JSON"}}, status=400)
+        await asyncio.sleep(self.sample_latency())
+        if self._random.random() < self.config.error_rate:
+            self.errors += 1
+            error = {"type": "mock_error", "message": "injected failure"}
+            # Anthropic wraps errors in a typed envelope, Ollama uses a bare string
+            if route == "/v1/messages":
+                payload: dict[str, Any] = {"type": "error", "error": error}
+            elif route.startswith("/api/"):
+                payload = {"error": error["message"]}
+            else:
+                payload = {"error": error}
+            return body, web.json_response(payload, status=self.config.error_status)
+        return body, None
+
+    async def _write_tokens(self, response: web.StreamResponse, frames: list[bytes]) -> None:
+        delay = self.config.token_ms / 1000
+        for frame in frames:
+            await response.write(frame)
+            if delay:
+                await asyncio.sleep(delay)
+
+    async def openai_chat(self, request: web.Request) -> web.StreamResponse:
+        body, error = await self._begin(request)
+        if error is not None:
+            return error
+        model = body.get("model", "gpt-3.5-turbo")
+        completion_id = f"chatcmpl-mock{self.requests[request.path]}"
+        created = int(time.time())
+        words = self._words()
+
+        if not body.get("stream"):
+            return web.json_response(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "".join(words)},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": 10,
+                        "completion_tokens": len(words),
+                        "total_tokens": 10 + len(words),
+                    },
+                }
+            )
+
+        def chunk(delta: dict[str, Any], finish_reason: str | None = None) -> bytes:
+            data = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            return f"data: {json.dumps(data)}\n\n".encode()
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        frames = [chunk({"role": "assistant", "content": ""})]
+        frames += [chunk({"content": word}) for word in words]
+        frames += [chunk({}, "stop"), b"data: [DONE]\n\n"]
+        await self._write_tokens(response, frames)
+        await response.write_eof()
+        return response
+
+    async def anthropic_messages(self, request: web.Request) -> web.StreamResponse:
+        body, error = await self._begin(request)
+        if error is not None:
+            return error
+        model = body.get("model", "claude-3-haiku-20240307")
+        message_id = f"msg_mock{self.requests[request.path]}"
+        words = self._words()
+        usage = {"input_tokens": 10, "output_tokens": len(words)}
+
+        if not body.get("stream"):
+            return web.json_response(
+                {
+                    "id": message_id,
+                    "type": "message",
+                    "role": "assistant",
+                    "model": model,
+                    "content": [{"type": "text", "text": "".join(words)}],
+                    "stop_reason": "end_turn",
+                    "stop_sequence": None,
+                    "usage": usage,
+                }
+            )
+
+        def event(name: str, data: dict[str, Any]) -> bytes:
+            return f"event: {name}\ndata: {json.dumps({'type': name, **data})}\n\n".encode()
+
+        start = {
+            "id": message_id,
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [],
+            "stop_reason": None,
+            "stop_sequence": None,
+            "usage": {"input_tokens": 10, "output_tokens": 0},
+        }
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        frames = [
+            event("message_start", {"message": start}),
+            event(
+                "content_block_start", {"index": 0, "content_block": {"type": "text", "text": ""}}
+            ),
+        ]
+        frames += [
+            event("content_block_delta", {"index": 0, "delta": {"type": "text_delta", "text": w}})
+            for w in words
+        ]
+        frames += [
+            event("content_block_stop", {"index": 0}),
+            event(
+                "message_delta",
+                {
+                    "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                    "usage": {"output_tokens": len(words)},
+                },
+            ),
+            event("message_stop", {}),
+        ]
+        await self._write_tokens(response, frames)
+        await response.write_eof()
+        return response
+
+    async def ollama_tags(self, request: web.Request) -> web.Response:
+        models = [{"name": name, "model": name, "size": 1 << 30} for name in self.config.models]
+        return web.json_response({"models": models})
+
+    async def ollama_ps(self, request: web.Request) -> web.Response:
+        models = [
+            {"name": name, "model": name, "size_vram": 1 << 30} for name in self.config.models
+        ]
+        return web.json_response({"models": models})
+
+    async def _ollama(self, request: web.Request, chat: bool) -> web.StreamResponse:
+        started = time.perf_counter()
+        body, error = await self._begin(request)
+        if error is not None:
+            return error
+        model = body.get("model", self.config.models[0])
+        words = self._words()
+
+        def piece(text: str, done: bool) -> dict[str, Any]:
+            data: dict[str, Any] = {"model": model, "done": done}
+            if chat:
+                data["message"] = {"role": "assistant", "content": text}
+            else:
+                data["response"] = text
+            if done:
+                data.update(
+                    done_reason="stop",
+                    total_duration=int((time.perf_counter() - started) * 1e9),
+                    prompt_eval_count=10,
+                    eval_count=len(words),
+                )
+            return data
+
+        if body.get("stream") is False:
+            return web.json_response(piece("".join(words), True))
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        frames = [(json.dumps(piece(word, False)) + "\n").encode() for word in words]
+        frames.append((json.dumps(piece("", True)) + "\n").encode())
+        await self._write_tokens(response, frames)
+        await response.write_eof()
+        return response
+
+    async def ollama_generate(self, request: web.Request) -> web.StreamResponse:
+        return await self._ollama(request, chat=False)
+
+    async def ollama_chat(self, request: web.Request) -> web.StreamResponse:
+        return await self._ollama(request, chat=True)
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({"requests": self.requests, "errors": self.errors})
+
+
+def main() -> None:
+    """Parse arguments and serve the fake providers until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Median latency")
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--sigma", type=float, default=0.5, help="Lognormal shape")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--tokens", type=int, default=50, help="Completion tokens per response")
+    parser.add_argument("--token-ms", type=float, default=0.0, help="Delay per streamed token")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        distribution=args.distribution,
+        sigma=args.sigma,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        tokens=args.tokens,
+        token_ms=args.token_ms,
+        seed=args.seed,
+    )
+    web.run_app(MockProviders(config).app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Circuit breaker that lets calls through concurrently.
+
+pybreaker holds the breaker's lock for the whole protected call, so every
+request sharing an API key ran one at a time. This breaker only locks
+around admission and result recording; the protected call itself runs
+unlocked, from worker threads (``call``) or the event loop (``call_async``).
+
+States follow the usual model:
+
+- closed: calls are admitted; ``fail_max`` consecutive failures open it
+- open: calls are rejected until ``reset_timeout`` seconds have passed
+- half-open: exactly one trial call is admitted; its success closes the
+  breaker and its failure re-opens it. Other calls are rejected meanwhile.
+"""
+
+import functools
+import inspect
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+from structured_logging import get_logger, log_circuit_breaker_event
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half-open"
+
+
+class CircuitBreakerError(Exception):
+    """Raised when a call is rejected because the breaker is open."""
+
+
+class CircuitBreaker:
+    """Thread-safe circuit breaker that does not serialize protected calls."""
+
+    def __init__(
+        self,
+        fail_max: int = 5,
+        reset_timeout: float = 60,
+        name: str | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        on_state_change: Callable[[str], None] | None = None,
+    ):
+        """Initialize the breaker in the closed state.
+
+        Args:
+            fail_max: Consecutive failures that open the breaker
+            reset_timeout: Seconds the breaker stays open before a trial call
+            name: Name used in logs
+            clock: Monotonic time source in seconds (overridable for tests)
+            on_state_change: Called with the new state after each transition,
+                outside the lock
+
+        """
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self.name = name
+        self.clock = clock
+        self.on_state_change = on_state_change
+
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._fail_counter = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        # Bumped on every transition so late results from calls admitted
+        # under an earlier state are not counted against the current one
+        self._generation = 0
+
+    @property
+    def current_state(self) -> str:
+        """Return the state, reporting an expired open breaker as half-open."""
+        with self._lock:
+            if self._state == STATE_OPEN and self._timeout_elapsed():
+                return STATE_HALF_OPEN
+            return self._state
+
+    @property
+    def fail_counter(self) -> int:
+        """Return the number of consecutive failures recorded."""
+        return self._fail_counter
+
+    def _timeout_elapsed(self) -> bool:
+        return self.clock() - self._opened_at >= self.reset_timeout
+
+    def _transition(self, state: str) -> None:
+        """Switch state. Caller holds the lock."""
+        self._state = state
+        self._generation += 1
+        if state == STATE_OPEN:
+            self._opened_at = self.clock()
+        elif state == STATE_CLOSED:
+            self._fail_counter = 0
+        self._probe_in_flight = False
+
+    def _notify(self, state: str) -> None:
+        """Report a transition to the listener. Caller must not hold the lock."""
+        if self.on_state_change is not None:
+            try:
+                self.on_state_change(state)
+            except Exception as e:
+                logger.error("Circuit breaker listener failed", breaker=self.name, error=str(e))
+
+    def _admit(self) -> tuple[int, bool]:
+        """Admit a call or raise CircuitBreakerError.
+
+        Returns:
+            Tuple of (generation the call was admitted under, is trial call)
+
+        """
+        half_opened = False
+        with self._lock:
+            if self._state == STATE_OPEN:
+                if not self._timeout_elapsed():
+                    raise CircuitBreakerError("Circuit breaker is open")
+                self._transition(STATE_HALF_OPEN)
+                half_opened = True
+
+            if self._state == STATE_HALF_OPEN:
+                if self._probe_in_flight:
+                    raise CircuitBreakerError(
+                        "Circuit breaker is open (half-open trial call in progress)"
+                    )
+                self._probe_in_flight = True
+                admitted = self._generation, True
+            else:
+                admitted = self._generation, False
+
+        if half_opened:
+            self._notify(STATE_HALF_OPEN)
+        return admitted
+
+    def _record(self, generation: int, is_probe: bool, succeeded: bool) -> None:
+        """Record a call result and apply any resulting transition."""
+        with self._lock:
+            if generation != self._generation:
+                return  # State moved on while the call was running
+            previous = self._state
+
+            if succeeded:
+                if is_probe:
+                    self._transition(STATE_CLOSED)
+                else:
+                    self._fail_counter = 0
+            else:
+                self._fail_counter += 1
+                if is_probe or self._fail_counter >= self.fail_max:
+                    self._transition(STATE_OPEN)
+
+            state, fail_count = self._state, self._fail_counter
+
+        if state != previous:
+            log_circuit_breaker_event(
+                logger, breaker_name=self.name, state=state, fail_count=fail_count
+            )
+            self._notify(state)
+
+    def _release_probe(self, generation: int) -> None:
+        """Free the trial slot after a call that neither succeeded nor failed."""
+        with self._lock:
+            if generation == self._generation:
+                self._probe_in_flight = False
+
+    def call(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Call ``func`` under breaker protection.
+
+        Raises:
+            CircuitBreakerError: If the breaker rejects the call
+            Exception: Whatever ``func`` raised, after recording the failure
+
+        """
+        generation, is_probe = self._admit()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self._record(generation, is_probe, succeeded=False)
+            raise
+        except BaseException:
+            if is_probe:
+                self._release_probe(generation)
+            raise
+        self._record(generation, is_probe, succeeded=True)
+        return result
+
+    async def call_async(self, func: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """Await ``func`` under breaker protection.
+
+        Cancellation is not counted as a failure; a cancelled trial call
+        frees the half-open slot for the next caller.
+        """
+        generation, is_probe = self._admit()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            self._record(generation, is_probe, succeeded=False)
+            raise
+        except BaseException:
+            if is_probe:
+                self._release_probe(generation)
+            raise
+        self._record(generation, is_probe, succeeded=True)
+        return result
+
+    def __call__(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Decorate a sync or async function so every call goes through the breaker."""
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                return await self.call_async(func, *args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return self.call(func, *args, **kwargs)
+
+        return wrapper
+
+    def open(self) -> None:
+        """Force the breaker open."""
+        with self._lock:
+            changed = self._state != STATE_OPEN
+            self._transition(STATE_OPEN)
+        if changed:
+            self._notify(STATE_OPEN)
+
+    def close(self) -> None:
+        """Force the breaker closed and clear the failure count."""
+        with self._lock:
+            changed = self._state != STATE_CLOSED
+            self._transition(STATE_CLOSED)
+        if changed:
+            self._notify(STATE_CLOSED)
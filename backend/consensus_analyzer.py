@@ -5,6 +5,7 @@ from difflib import SequenceMatcher
 import re
 
 from structured_logging import get_logger
+from tracing import traced
 
 logger = get_logger(__name__)
 
@@ -60,6 +61,7 @@ class ConsensusAnalyzer:
         return key_points[:5]  # Return top 5 points
     
     @classmethod
+    @traced("consensus.analyze")
     def analyze_consensus(cls, responses: List[Any]) -> Dict[str, Any]:
         """Analyze consensus between multiple model responses.
         
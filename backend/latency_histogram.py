@@ -0,0 +1,121 @@
+"""Log-bucketed latency histogram with constant-time recording.
+
+Buckets follow the HDR histogram layout: each power of two is split into
+``SUB_BUCKETS`` linear sub-buckets, so a recorded value lands in a bucket
+whose width is at most 1/SUB_BUCKETS (~3%) of the value. ``math.frexp``
+gives the power of two directly, so ``record`` is O(1) with no logarithms,
+and two histograms merge by adding their counts.
+"""
+
+import math
+from array import array
+from collections.abc import Iterable
+
+SUB_BUCKETS = 32
+MIN_EXPONENT = -13  # 2**-14 s (~61 microseconds) and below share bucket 0
+MAX_EXPONENT = 15  # 2**15 s (~9 hours) and above share the last bucket
+NUM_BUCKETS = (MAX_EXPONENT - MIN_EXPONENT + 1) * SUB_BUCKETS
+
+# Percentiles reported by default
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+def _bucket_index(value: float) -> int:
+    """Return the bucket a value in seconds falls into."""
+    if value <= 0:
+        return 0
+    mantissa, exponent = math.frexp(value)  # value = mantissa * 2**exponent, 0.5 <= mantissa < 1
+    if exponent < MIN_EXPONENT:
+        return 0
+    if exponent > MAX_EXPONENT:
+        return NUM_BUCKETS - 1
+    return (exponent - MIN_EXPONENT) * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS)
+
+
+def _bucket_midpoint(index: int) -> float:
+    """Return the value at the middle of a bucket."""
+    exponent, sub = divmod(index, SUB_BUCKETS)
+    return math.ldexp(0.5 + (sub + 0.5) / (2 * SUB_BUCKETS), exponent + MIN_EXPONENT)
+
+
+class LatencyHistogram:
+    """Histogram of durations in seconds."""
+
+    __slots__ = ("count", "counts", "max", "min", "total")
+
+    def __init__(self):
+        self.counts = array("Q", [0]) * NUM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        """Record one duration in seconds."""
+        self.counts[_bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """Add another histogram's samples into this one and return self."""
+        if other.count:
+            counts = self.counts
+            for index, n in enumerate(other.counts):
+                if n:
+                    counts[index] += n
+            self.count += other.count
+            self.total += other.total
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        return self
+
+    def snapshot(self) -> "LatencyHistogram":
+        """Return an independent copy."""
+        return LatencyHistogram().merge(self)
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean duration, or None when empty."""
+        return self.total / self.count if self.count else None
+
+    def percentiles(
+        self, percentiles: Iterable[float] = DEFAULT_PERCENTILES
+    ) -> dict[float, float | None]:
+        """Return the duration at each percentile (0-100) in one pass over the buckets.
+
+        Values are bucket midpoints clamped to the recorded min/max, so they
+        are within the bucket precision of the true sample. Out-of-range
+        samples report the recorded min or max.
+        """
+        wanted = sorted(percentiles)
+        if not self.count:
+            return dict.fromkeys(wanted)
+
+        results: dict[float, float | None] = {}
+        # Small epsilon so e.g. p99.9 of 1000 samples is rank 999, not 1000
+        ranks = [(p, max(1, math.ceil(p * self.count / 100 - 1e-9))) for p in wanted]
+        seen = 0
+        position = 0
+        for index, n in enumerate(self.counts):
+            if not n:
+                continue
+            seen += n
+            while position < len(ranks) and ranks[position][1] <= seen:
+                if index == 0 or index == NUM_BUCKETS - 1:
+                    # Edge buckets are unbounded; report the recorded extreme
+                    value = self.min if index == 0 else self.max
+                else:
+                    value = min(max(_bucket_midpoint(index), self.min), self.max)
+                results[ranks[position][0]] = value
+                position += 1
+            if position == len(ranks):
+                break
+        return results
+
+    def percentile(self, percentile: float) -> float | None:
+        """Return the duration at a single percentile (0-100)."""
+        return self.percentiles((percentile,))[percentile]
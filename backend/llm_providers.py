@@ -8,12 +8,25 @@ circuit breakers per API key, and structured logging.
 import asyncio
 import os
 import threading
+import time
+from typing import Any
 
 import anthropic
 import openai
-from pybreaker import CircuitBreaker
 
-from structured_logging import get_logger, sanitize_sensitive_data
+from circuit_breaker import CircuitBreaker, CircuitBreakerError
+from metrics import (
+    BREAKER_TRANSITIONS,
+    BREAKERS,
+    LLM_CALL_DURATION,
+    LLM_CALL_ERRORS,
+    LLM_TOKENS,
+    registry as metrics_registry,
+)
+from model_router import Route, model_router
+from structured_logging import get_logger, log_llm_call, sanitize_sensitive_data
+from token_utils import estimate_tokens
+from tracing import start_span
 from utils.security import APIKeySanitizer, RequestIsolator
 
 logger = get_logger(__name__)
@@ -25,6 +38,11 @@ TIMEOUT_SECONDS = 30
 BREAKER_FAIL_MAX = 5
 BREAKER_TIMEOUT = 60
 
+# Registry bounds: breakers idle longer than the TTL are swept, and each
+# provider keeps at most MAX_BREAKERS_PER_PROVIDER (least recently used first out)
+BREAKER_IDLE_TTL = int(os.getenv("BREAKER_IDLE_TTL", str(24 * 3600)))
+MAX_BREAKERS_PER_PROVIDER = int(os.getenv("MAX_BREAKERS_PER_PROVIDER", "10000"))
+
 # Store circuit breakers per API key
 circuit_breakers: dict[str, dict[str, CircuitBreaker]] = {
     "openai": {},
@@ -35,8 +53,16 @@ circuit_breakers: dict[str, dict[str, CircuitBreaker]] = {
 }
 # Lock for thread-safe access to circuit breakers
 _circuit_breaker_lock = threading.Lock()
-# Additional locks for thread-safe breaker operations per breaker instance
-_breaker_operation_locks: dict[str, threading.Lock] = {}
+# Monotonic last-use time per provider and API key
+_breaker_last_used: dict[str, dict[str, float]] = {}
+# Breakers dropped from the registry, by reason
+_breaker_evictions = {"lru": 0, "idle": 0}
+
+
+def _forget_breaker(provider: str, api_key: str) -> None:
+    """Drop a breaker and its bookkeeping. Caller holds _circuit_breaker_lock."""
+    circuit_breakers.get(provider, {}).pop(api_key, None)
+    _breaker_last_used.get(provider, {}).pop(api_key, None)
 
 
 def get_circuit_breaker(provider: str, api_key: str) -> CircuitBreaker:
@@ -59,76 +85,132 @@ def get_circuit_breaker(provider: str, api_key: str) -> CircuitBreaker:
             circuit_breakers[normalized_provider] = {}
 
         provider_breakers = circuit_breakers[normalized_provider]
+        last_used = _breaker_last_used.setdefault(normalized_provider, {})
+        last_used[api_key] = time.monotonic()
 
-        if api_key not in provider_breakers:
+        if api_key in provider_breakers:
+            # Re-insert so dict order tracks recency for LRU eviction
+            provider_breakers[api_key] = provider_breakers.pop(api_key)
+        else:
             # Create new circuit breaker for this API key
             breaker = CircuitBreaker(
                 fail_max=BREAKER_FAIL_MAX,
                 reset_timeout=BREAKER_TIMEOUT,  # Fixed parameter name
                 name=f"{normalized_provider}_{api_key[:8]}...{api_key[-4:]}",  # Partial key in name for logging
+                on_state_change=lambda state, p=normalized_provider: BREAKER_TRANSITIONS.inc(
+                    provider=p, state=state
+                ),
             )
 
-            # Skip callbacks for now - they're causing issues
-            # TODO: Fix callback implementation
-
             provider_breakers[api_key] = breaker
-            # Create operation lock for this breaker
-            breaker_key = f"{normalized_provider}_{api_key}"
-            _breaker_operation_locks[breaker_key] = threading.Lock()
-            
+
             logger.info(
                 f"Created new circuit breaker for {normalized_provider}",
                 provider=normalized_provider,
                 key_prefix=api_key[:8],
             )
 
+            while len(provider_breakers) > MAX_BREAKERS_PER_PROVIDER:
+                _forget_breaker(normalized_provider, next(iter(provider_breakers)))
+                _breaker_evictions["lru"] += 1
+
         return provider_breakers[api_key]
 
 
-def on_circuit_open(breaker: CircuitBreaker) -> None:
-    """Log when circuit breaker opens."""
-    from structured_logging import log_circuit_breaker_event
+def sweep_idle_breakers(max_idle: float | None = None) -> int:
+    """Remove circuit breakers that have not been used within ``max_idle`` seconds.
 
-    log_circuit_breaker_event(
-        logger,
-        breaker_name=breaker.name,
-        state="open",
-        fail_count=breaker.fail_counter,
-    )
+    Open breakers are kept until their reset timeout has passed so an
+    idle-then-retried key cannot skip its cool-down. Also drops last-use
+    entries left behind by breakers removed from ``circuit_breakers`` directly.
+
+    Args:
+        max_idle: Idle time in seconds (default BREAKER_IDLE_TTL)
 
+    Returns:
+        Number of breakers removed
 
-def on_circuit_close(breaker: CircuitBreaker) -> None:
-    """Log when circuit breaker closes."""
-    from structured_logging import log_circuit_breaker_event
+    """
+    max_idle = BREAKER_IDLE_TTL if max_idle is None else max_idle
+    now = time.monotonic()
+    removed = 0
+
+    with _circuit_breaker_lock:
+        for provider, provider_breakers in circuit_breakers.items():
+            last_used = _breaker_last_used.setdefault(provider, {})
+            for api_key in [k for k in last_used if k not in provider_breakers]:
+                del last_used[api_key]
 
-    log_circuit_breaker_event(logger, breaker_name=breaker.name, state="closed", fail_count=0)
+            for api_key, breaker in list(provider_breakers.items()):
+                idle_for = now - last_used.setdefault(api_key, now)
+                if idle_for < max_idle or (
+                    breaker.current_state == "open" and idle_for < breaker.reset_timeout
+                ):
+                    continue
+                _forget_breaker(provider, api_key)
+                removed += 1
+
+        _breaker_evictions["idle"] += removed
+
+    if removed:
+        logger.info("Swept idle circuit breakers", removed=removed)
+    return removed
+
+
+def get_breaker_stats() -> dict[str, Any]:
+    """Return circuit breaker registry size and counts by state."""
+    with _circuit_breaker_lock:
+        by_state = {"closed": 0, "open": 0, "half-open": 0}
+        by_provider = {}
+        for provider, provider_breakers in circuit_breakers.items():
+            by_provider[provider] = len(provider_breakers)
+            for breaker in provider_breakers.values():
+                state = breaker.current_state
+                by_state[state] = by_state.get(state, 0) + 1
+
+        return {
+            "total": sum(by_provider.values()),
+            "by_provider": by_provider,
+            "by_state": by_state,
+            "max_per_provider": MAX_BREAKERS_PER_PROVIDER,
+            "idle_ttl_seconds": BREAKER_IDLE_TTL,
+            "evictions": dict(_breaker_evictions),
+        }
+
+
+def _collect_breaker_gauges() -> None:
+    """Refresh the breakers-by-state gauge before a metrics scrape."""
+    for state, count in get_breaker_stats()["by_state"].items():
+        BREAKERS.set(count, state=state)
+
+
+metrics_registry.register_collector("circuit_breakers", _collect_breaker_gauges)
 
 
 def call_with_circuit_breaker(breaker: CircuitBreaker, func, provider: str, api_key: str):
-    """Thread-safe wrapper for circuit breaker calls.
-    
+    """Run ``func`` through a circuit breaker from a worker thread.
+
+    The breaker only synchronizes its own state transitions, so concurrent
+    requests sharing one API key run in parallel instead of queueing.
+
     Args:
         breaker: The circuit breaker instance
         func: The function to call
-        provider: Provider name for lock lookup
-        api_key: API key for lock lookup
-        
+        provider: Provider name for logging
+        api_key: API key (only its prefix is logged)
+
     Returns:
         Result of func() call
-        
+
     Raises:
         Exception: If breaker is open or func fails
 
     """
-    breaker_key = f"{provider}_{api_key}"
-    lock = _breaker_operation_locks.get(breaker_key)
-    
-    if lock:
-        with lock:
-            return breaker.call(func)
-    else:
-        # Fallback to regular call if lock not found
+    try:
         return breaker.call(func)
+    except CircuitBreakerError:
+        logger.debug("Circuit breaker rejected call", provider=provider, key_prefix=api_key[:8])
+        raise
 
 
 async def call_openai(text: str, api_key: str | None = None, model: str = "gpt-3.5-turbo") -> dict:
@@ -232,12 +314,19 @@ def _make_openai_call(text: str, api_key: str, model: str) -> dict:
         temperature=0.7,
     )
 
-    return {
+    result = {
         "model": "openai",
         "response": response.choices[0].message.content,
         "error": None,
     }
 
+    # Report completion usage for token-cost rate limiting when available
+    completion_tokens = getattr(getattr(response, "usage", None), "completion_tokens", None)
+    if isinstance(completion_tokens, int):
+        result["completion_tokens"] = completion_tokens
+
+    return result
+
 
 # Similar changes for Claude, Gemini, and Grok...
 async def call_claude(
@@ -297,12 +386,19 @@ async def _call_claude_with_breaker(
             messages=[{"role": "user", "content": text}],
         )
 
-        return {
+        result = {
             "model": "claude",
             "response": response.content[0].text,
             "error": None,
         }
 
+        # Report completion usage for token-cost rate limiting when available
+        output_tokens = getattr(getattr(response, "usage", None), "output_tokens", None)
+        if isinstance(output_tokens, int):
+            result["completion_tokens"] = output_tokens
+
+        return result
+
     # Use thread-safe wrapper
     result = await asyncio.wait_for(
         asyncio.to_thread(
@@ -318,14 +414,17 @@ async def _call_claude_with_breaker(
 
 
 # Clean up old circuit breakers periodically
-async def cleanup_old_breakers():
-    """Remove circuit breakers that haven't been used in 24 hours.
+async def cleanup_old_breakers() -> int:
+    """Remove circuit breakers that haven't been used in BREAKER_IDLE_TTL (24h).
 
     This prevents memory growth from accumulating breakers for old/invalid keys.
-    Should be called periodically (e.g., daily).
+    The memory manager also runs ``sweep_idle_breakers`` on its cleanup cycle.
+
+    Returns:
+        Number of breakers removed
+
     """
-    # TODO: Implement cleanup based on last used timestamp
-    pass
+    return sweep_idle_breakers()
 
 
 async def analyze_with_models(
@@ -343,49 +442,113 @@ async def analyze_with_models(
     """Analyze text with multiple models concurrently.
 
     Each model now has its own circuit breaker per API key,
-    so one user's failures don't affect other users.
+    so one user's failures don't affect other users. Every requested model
+    is served through ``model_router``, which fails over to configured
+    equivalent routes when its provider errors or its breaker is open and
+    adds a ``route`` entry to each result. A failed-over result keeps the
+    requested provider as ``model`` and names the fallback in ``served_by``.
     """
-    tasks = []
-
-    if openai_key:
-        tasks.append(call_openai(text, openai_key, openai_model))
-    if claude_key:
-        tasks.append(call_claude(text, claude_key, claude_model))
-    if gemini_key:
-        tasks.append(call_gemini(text, gemini_key, gemini_model))
-    if grok_key:
-        tasks.append(call_grok(text, grok_key, grok_model))
+    keys = {"openai": openai_key, "claude": claude_key, "gemini": gemini_key, "grok": grok_key}
+    default_models = {
+        "openai": openai_model,
+        "claude": claude_model,
+        "gemini": gemini_model,
+        "grok": grok_model,
+        "ollama": ollama_model or "llama2",
+    }
+
+    # Build list of requested routes in a stable order
+    requested = [Route(provider, default_models[provider]) for provider, key in keys.items() if key]
     if ollama_model:
-        tasks.append(call_ollama_fixed(text, ollama_model))
+        requested.append(Route("ollama", ollama_model))
 
-    if not tasks:
+    if not requested:
         logger.warning("No API keys provided for analysis")
         return []
 
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    async def dispatch(route: Route, model: str | None) -> dict:
+        # Look the callers up at call time so they can be patched
+        callers = {
+            "openai": call_openai,
+            "claude": call_claude,
+            "gemini": call_gemini,
+            "grok": call_grok,
+        }
+        if route.provider == "ollama":
+            return await call_ollama_fixed(text, model)
+        if route.provider not in callers:
+            return {"model": route.label, "response": "", "error": "Unknown provider"}
+        return await callers[route.provider](text, keys[route.provider], model)
+
+    prompt_tokens = estimate_tokens(text)
+
+    async def call_route(route: Route) -> dict:
+        model = route.model or default_models.get(route.provider)
+        # Route labels drop requested model names that aren't safe to echo
+        labels = {
+            "provider": route.provider,
+            "model": Route(route.provider, model).label.partition("/")[2] or "unknown",
+        }
+        start = time.perf_counter()
+        with start_span("llm.call", **labels) as span:
+            try:
+                result = await dispatch(route, model)
+            except Exception:
+                LLM_CALL_ERRORS.inc(**labels)
+                raise
+            finally:
+                duration = time.perf_counter() - start
+                LLM_CALL_DURATION.observe(duration, **labels)
+
+            if result.get("error"):
+                span.set_error("provider error")
+
+        tokens = 0
+        if result.get("error"):
+            LLM_CALL_ERRORS.inc(**labels)
+        else:
+            LLM_TOKENS.inc(prompt_tokens, kind="prompt", **labels)
+            completion_tokens = result.get("completion_tokens")
+            if completion_tokens is None:
+                completion_tokens = estimate_tokens(result.get("response") or "")
+            LLM_TOKENS.inc(completion_tokens, kind="completion", **labels)
+            tokens = prompt_tokens + completion_tokens
+        log_llm_call(
+            logger,
+            tokens=tokens,
+            duration_ms=round(duration * 1000, 2),
+            success=not result.get("error"),
+            **labels,
+        )
+        return result
+
+    def state_of(route: Route) -> str:
+        if route.provider == "ollama":
+            return "closed"
+        api_key = keys.get(route.provider)
+        if not api_key:
+            return "unavailable"
+        breaker = circuit_breakers.get(route.provider, {}).get(api_key)
+        return breaker.current_state if breaker else "closed"
+
+    results = await asyncio.gather(
+        *(model_router.serve(route, call_route, state_of) for route in requested),
+        return_exceptions=True,
+    )
 
     # Handle any exceptions that occurred
     processed_results = []
-    model_names = []
-
-    # Build list of model names based on what was called
-    if openai_key:
-        model_names.append("openai")
-    if claude_key:
-        model_names.append("claude")
-    if gemini_key:
-        model_names.append("gemini")
-    if grok_key:
-        model_names.append("grok")
-    if ollama_model:
-        model_names.append(f"ollama/{ollama_model}")
-
-    for i, result in enumerate(results):
+    for route, result in zip(requested, results, strict=True):
+        model_name = f"ollama/{route.model}" if route.provider == "ollama" else route.provider
         if isinstance(result, Exception):
-            model_name = model_names[i] if i < len(model_names) else "unknown"
             processed_results.append({"model": model_name, "response": "", "error": str(result)})
-        else:
-            processed_results.append(result)
+            continue
+        if result.get("route", {}).get("failover"):
+            # Keep one entry per requested model, so consensus doesn't count the
+            # fallback provider twice; token charges follow ``served_by``
+            result["served_by"] = result.get("model")
+            result["model"] = model_name
+        processed_results.append(result)
 
     return processed_results
 
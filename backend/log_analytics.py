@@ -0,0 +1,292 @@
+"""Latency, error and circuit breaker analytics over backend JSON logs.
+
+Streams one or more JSON-lines log files (``backend.log``) through a
+memory map a line at a time and aggregates:
+
+- request latency percentiles and 5xx rates per route (``api_response``)
+- provider call latency, failure rates and tokens per model (``llm_call``)
+- requests, errors and latency per hour, for capacity planning
+- how often and for how long each circuit breaker was open (``circuit_breaker``)
+
+Latencies go into ``LatencyHistogram``s, so memory depends on the number
+of routes, models, hours and breakers, not on the size of the log. Lines
+are only JSON-decoded when they mention one of the events above.
+
+Usage (from the backend directory):
+    python log_analytics.py backend.log
+    python log_analytics.py backend.log.1 backend.log --json
+"""
+
+import argparse
+import json
+import mmap
+import sys
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from latency_histogram import LatencyHistogram
+
+REPORT_PERCENTILES = (50.0, 90.0, 99.0)
+
+# Substrings a line must contain to be worth decoding
+_EVENT_MARKERS = (b"api_response", b"llm_call", b"circuit_breaker")
+
+
+def iter_log_lines(path: str) -> Iterator[bytes]:
+    """Yield the raw lines of a file through a read-only memory map."""
+    with Path(path).open("rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty files can't be mapped
+            return
+        with mapped:
+            yield from iter(mapped.readline, b"")
+
+
+def _parse_timestamp(value: object) -> datetime | None:
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+class _LatencyStats:
+    """Call count, failures and latency distribution for one key."""
+
+    __slots__ = ("count", "errors", "histogram", "tokens")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.tokens = 0
+        self.histogram = LatencyHistogram()
+
+    def add(self, duration_ms: float, error: bool) -> None:
+        self.count += 1
+        self.errors += error
+        self.histogram.record(duration_ms / 1000)
+
+    def to_dict(self) -> dict[str, Any]:
+        percentiles = self.histogram.percentiles(REPORT_PERCENTILES)
+        mean = self.histogram.mean
+        stats: dict[str, Any] = {
+            "count": self.count,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.count, 4) if self.count else 0.0,
+            "mean_ms": round(mean * 1000, 2) if mean is not None else None,
+        }
+        for p, value in percentiles.items():
+            stats[f"p{p:g}_ms"] = round(value * 1000, 2) if value is not None else None
+        stats["max_ms"] = round(self.histogram.max * 1000, 2) if self.count else None
+        return stats
+
+
+class _BreakerStats:
+    """Open intervals of one circuit breaker."""
+
+    __slots__ = ("longest_open_seconds", "open_seconds", "open_since", "opens")
+
+    def __init__(self):
+        self.opens = 0
+        self.open_seconds = 0.0
+        self.longest_open_seconds = 0.0
+        self.open_since: datetime | None = None
+
+    def transition(self, state: str, at: datetime) -> None:
+        if state == "open":
+            if self.open_since is None:  # Re-opening after a failed probe continues the interval
+                self.opens += 1
+                self.open_since = at
+        elif state == "closed" and self.open_since is not None:
+            seconds = max(0.0, (at - self.open_since).total_seconds())
+            self.open_seconds += seconds
+            self.longest_open_seconds = max(self.longest_open_seconds, seconds)
+            self.open_since = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "opens": self.opens,
+            "open_seconds": round(self.open_seconds, 3),
+            "longest_open_seconds": round(self.longest_open_seconds, 3),
+            "open_since": self.open_since.isoformat() if self.open_since else None,
+        }
+
+
+class LogReport:
+    """Aggregates log events into a latency and reliability report."""
+
+    def __init__(self):
+        self.lines = 0
+        self.events = 0
+        self.malformed = 0
+        self.first_timestamp: str | None = None
+        self.last_timestamp: str | None = None
+        self.routes: dict[str, _LatencyStats] = {}
+        self.models: dict[str, _LatencyStats] = {}
+        self.hours: dict[str, _LatencyStats] = {}
+        self.breakers: dict[str, _BreakerStats] = {}
+
+    def add_line(self, line: bytes) -> None:
+        """Decode and aggregate one raw log line if it holds a known event."""
+        self.lines += 1
+        if not any(marker in line for marker in _EVENT_MARKERS):
+            return
+        try:
+            event = json.loads(line)
+        except ValueError:
+            self.malformed += 1
+            return
+        if isinstance(event, dict):
+            self.add_event(event)
+
+    def add_event(self, event: dict[str, Any]) -> None:
+        """Aggregate one decoded log event."""
+        name = event.get("event")
+        if name not in ("api_response", "llm_call", "circuit_breaker"):
+            return
+
+        timestamp = event.get("timestamp")
+        if isinstance(timestamp, str):
+            if self.first_timestamp is None or timestamp < self.first_timestamp:
+                self.first_timestamp = timestamp
+            if self.last_timestamp is None or timestamp > self.last_timestamp:
+                self.last_timestamp = timestamp
+
+        if name == "circuit_breaker":
+            at = _parse_timestamp(timestamp)
+            if at is None:
+                self.malformed += 1
+                return
+            breaker = str(event.get("breaker_name") or "unknown")
+            self.breakers.setdefault(breaker, _BreakerStats()).transition(
+                str(event.get("state")), at
+            )
+            self.events += 1
+            return
+
+        duration_ms = event.get("duration_ms")
+        if not isinstance(duration_ms, int | float):
+            self.malformed += 1
+            return
+        self.events += 1
+
+        if name == "llm_call":
+            key = f"{event.get('provider', 'unknown')}/{event.get('model', 'unknown')}"
+            stats = self.models.setdefault(key, _LatencyStats())
+            stats.add(duration_ms, not event.get("success", True))
+            tokens = event.get("tokens")
+            if isinstance(tokens, int):
+                stats.tokens += tokens
+            return
+
+        status = event.get("status_code")
+        error = isinstance(status, int) and status >= 500
+        # Lines written before routes were logged share one bucket
+        route = f"{event.get('method', '')} {event.get('route', 'unknown')}".strip()
+        self.routes.setdefault(route, _LatencyStats()).add(duration_ms, error)
+        if isinstance(timestamp, str) and len(timestamp) >= 13:
+            self.hours.setdefault(timestamp[:13], _LatencyStats()).add(duration_ms, error)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the report as JSON-serializable data."""
+        models = {}
+        for key, stats in sorted(self.models.items()):
+            models[key] = {**stats.to_dict(), "tokens": stats.tokens}
+        return {
+            "lines": self.lines,
+            "events": self.events,
+            "malformed": self.malformed,
+            "first_timestamp": self.first_timestamp,
+            "last_timestamp": self.last_timestamp,
+            "routes": {key: stats.to_dict() for key, stats in sorted(self.routes.items())},
+            "models": models,
+            "hours": {key: stats.to_dict() for key, stats in sorted(self.hours.items())},
+            "breakers": {key: stats.to_dict() for key, stats in sorted(self.breakers.items())},
+        }
+
+
+def analyze_logs(paths: Iterable[str]) -> LogReport:
+    """Stream every file in order into one report."""
+    report = LogReport()
+    for path in paths:
+        for line in iter_log_lines(path):
+            report.add_line(line)
+    return report
+
+
+def _format_ms(value: float | None) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+def _latency_table(title: str, rows: dict[str, dict[str, Any]], extra: str = "") -> list[str]:
+    if not rows:
+        return [f"{title}: no events", ""]
+    percentile_keys = [f"p{p:g}_ms" for p in REPORT_PERCENTILES]
+    width = max(len(title), *(len(key) for key in rows))
+    header = f"{title:<{width}} {'count':>8} {'err%':>6} {'mean':>9}"
+    header += "".join(f" {key[:-3]:>9}" for key in percentile_keys) + f" {'max':>9}"
+    if extra:
+        header += f" {extra:>10}"
+    lines = [header]
+    for key, stats in rows.items():
+        line = (
+            f"{key:<{width}} {stats['count']:>8} {stats['error_rate'] * 100:>6.1f}"
+            f" {_format_ms(stats['mean_ms']):>9}"
+        )
+        line += "".join(f" {_format_ms(stats[k]):>9}" for k in percentile_keys)
+        line += f" {_format_ms(stats['max_ms']):>9}"
+        if extra:
+            line += f" {stats[extra]:>10}"
+        lines.append(line)
+    return [*lines, ""]
+
+
+def render_text(data: dict[str, Any]) -> str:
+    """Render a report dict as plain-text tables (latencies in ms)."""
+    lines = [
+        f"Lines: {data['lines']}  events: {data['events']}  malformed: {data['malformed']}",
+        f"Period: {data['first_timestamp'] or '-'} .. {data['last_timestamp'] or '-'}",
+        "",
+    ]
+    lines += _latency_table("route", data["routes"])
+    lines += _latency_table("model", data["models"], extra="tokens")
+    lines += _latency_table("hour", data["hours"])
+
+    if data["breakers"]:
+        width = max(len("breaker"), *(len(key) for key in data["breakers"]))
+        lines.append(f"{'breaker':<{width}} {'opens':>6} {'open s':>10} {'longest s':>10} open now")
+        for key, stats in data["breakers"].items():
+            lines.append(
+                f"{key:<{width}} {stats['opens']:>6} {stats['open_seconds']:>10.1f}"
+                f" {stats['longest_open_seconds']:>10.1f} {stats['open_since'] or '-'}"
+            )
+    else:
+        lines.append("breaker: no events")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="Log files, oldest first")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        data = analyze_logs(args.paths).to_dict()
+    except OSError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(data, indent=2))
+    else:
+        print(render_text(data), end="")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
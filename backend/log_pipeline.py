@@ -0,0 +1,265 @@
+"""Non-blocking log output and sampling of hot-path log events.
+
+``AsyncBatchingHandler`` moves formatting and I/O off the calling thread:
+``emit`` only puts the record on a bounded queue, and a daemon writer
+thread drains it in batches, writing each batch to every target handler
+with one write and one flush. When the queue is full, records are dropped
+and counted rather than blocking the event loop; the writer reports drops
+as a warning once it catches up.
+
+``EventSampler`` is a structlog processor that keeps a fraction of
+selected high-volume events before any expensive processing runs.
+"""
+
+import contextlib
+import copy
+import logging
+import os
+import queue
+import random
+import threading
+from collections.abc import Iterable
+from typing import Any
+
+import structlog
+from structlog.types import EventDict, WrappedLogger
+
+# Hot-path debug events emitted per model or per node on every request
+DEFAULT_SAMPLE_RATES = {
+    "Model response received": 0.1,
+    "Node execution details": 0.1,
+    "Node details": 0.1,
+}
+
+QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "256"))
+
+_STOP = object()
+
+# Renders tracebacks at emit time; targets may format records much later
+_TRACEBACK_FORMATTER = logging.Formatter()
+
+
+class _FlushMarker:
+    """Queue item set once every record queued before it is written."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    """Parse ``event=rate,event=rate`` into a dict, ignoring malformed entries."""
+    rates = {}
+    for entry in spec.split(","):
+        event, _, rate = entry.rpartition("=")
+        try:
+            rates[event.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    rates.pop("", None)
+    return rates
+
+
+class EventSampler:
+    """Structlog processor that drops a fraction of selected events.
+
+    Warnings and errors are never sampled.
+    """
+
+    _NEVER_SAMPLED = frozenset({"warning", "warn", "error", "exception", "critical", "fatal"})
+
+    def __init__(self, rates: dict[str, float] | None = None, debug_rate: float = 1.0):
+        """Initialize the sampler.
+
+        Args:
+            rates: Fraction of each event name to keep (0.0-1.0)
+            debug_rate: Fraction to keep of debug events not listed in ``rates``
+
+        """
+        self.rates = dict(rates or {})
+        self.debug_rate = debug_rate
+        self.sampled_out = 0
+
+    @classmethod
+    def from_env(cls) -> "EventSampler":
+        """Build from LOG_SAMPLE_RATES and LOG_DEBUG_SAMPLE_RATE over the defaults."""
+        rates = {**DEFAULT_SAMPLE_RATES, **parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", ""))}
+        return cls(rates, float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0")))
+
+    def __call__(self, _: WrappedLogger, method_name: str, event_dict: EventDict) -> EventDict:
+        if method_name in self._NEVER_SAMPLED:
+            return event_dict
+        rate = self.rates.get(event_dict.get("event"))
+        if rate is None:
+            rate = self.debug_rate if method_name == "debug" else 1.0
+        # Sampling only thins out log volume, so a non-cryptographic RNG is fine
+        if rate < 1.0 and random.random() >= rate:  # noqa: S311
+            self.sampled_out += 1
+            raise structlog.DropEvent
+        return event_dict
+
+
+class AsyncBatchingHandler(logging.Handler):
+    """Queue records and write them to target handlers from a background thread."""
+
+    def __init__(
+        self,
+        targets: Iterable[logging.Handler],
+        queue_size: int = QUEUE_SIZE,
+        batch_size: int = BATCH_SIZE,
+    ):
+        """Start the writer thread.
+
+        Args:
+            targets: Handlers that format and write the records
+            queue_size: Records buffered before new ones are dropped
+            batch_size: Maximum records written per batch
+
+        """
+        super().__init__(logging.NOTSET)
+        self.targets = list(targets)
+        self.batch_size = batch_size
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.written = 0
+        self.batches = 0
+        self.dropped: dict[str, int] = {}
+        self._reported_drops = 0
+        self._writer = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._writer.start()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Make a record safe to format later on the writer thread.
+
+        As in ``QueueHandler.prepare``, arguments are merged into the message
+        while they still hold the values being logged, and a traceback is
+        rendered into the message so the queue doesn't keep its frames alive.
+        Structlog event dicts are already fully processed and pass through.
+        """
+        if isinstance(record.msg, dict) or not (record.args or record.exc_info):
+            return record
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.msg += "\n" + _TRACEBACK_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+            record.exc_text = None
+        return record
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            # Plain dict update; a lost increment under a race only undercounts
+            self.dropped[record.levelname] = self.dropped.get(record.levelname, 0) + 1
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch: list[logging.LogRecord] = []
+            markers: list[_FlushMarker] = []
+            item = self._queue.get()
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, _FlushMarker):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write(batch)
+            self._report_drops()
+            for marker in markers:
+                marker.done.set()
+
+    def _write(self, batch: list[logging.LogRecord]) -> None:
+        for target in self.targets:
+            records = [r for r in batch if r.levelno >= target.level and target.filter(r)]
+            if not records:
+                continue
+            if isinstance(target, logging.StreamHandler):
+                self._write_stream(target, records)
+            else:
+                for record in records:
+                    target.handle(record)
+        self.written += len(batch)
+        self.batches += 1
+
+    @staticmethod
+    def _write_stream(target: logging.StreamHandler, records: list[logging.LogRecord]) -> None:
+        """Format a batch and write it with a single write and flush."""
+        lines = []
+        for record in records:
+            try:
+                lines.append(target.format(record) + target.terminator)
+            except Exception:
+                target.handleError(record)
+        if not lines:
+            return
+        with target.lock:
+            try:
+                if target.stream is None and isinstance(target, logging.FileHandler):
+                    target.stream = target._open()  # Opened lazily with delay=True
+                target.stream.write("".join(lines))
+                target.stream.flush()
+            except Exception:
+                target.handleError(records[-1])
+
+    def _report_drops(self) -> None:
+        total = sum(self.dropped.values())
+        if total > self._reported_drops:
+            newly_dropped = total - self._reported_drops
+            self._reported_drops = total
+            warning = logging.LogRecord(
+                __name__,
+                logging.WARNING,
+                __file__,
+                0,
+                "Log queue full, dropped %d records",
+                (newly_dropped,),
+                None,
+            )
+            for target in self.targets:
+                target.handle(warning)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until records queued so far have been written.
+
+        Returns:
+            True if the queue drained within ``timeout``
+
+        """
+        if not self._writer.is_alive():
+            return False
+        marker = _FlushMarker()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+
+    def close(self) -> None:
+        """Drain the queue, stop the writer and close the targets."""
+        if self._writer.is_alive():
+            with contextlib.suppress(queue.Full):
+                self._queue.put(_STOP, timeout=5.0)
+            self._writer.join(timeout=5.0)
+        for target in self.targets:
+            target.close()
+        super().close()
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return queue depth and written/dropped counts."""
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": dict(self.dropped),
+        }
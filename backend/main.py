@@ -1,41 +1,60 @@
 import os
 import time
 from contextlib import asynccontextmanager
+from typing import Literal
 from uuid import uuid4
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 
 # Import secure CORS configuration
 from cors_config import get_allowed_origins
 
 # Import memory management
+from admission_control import admission_controller
+from allocation_profiler import allocation_profiler
 from memory_management import (
     RequestContext as MemoryContext,
     limit_response_size,
     memory_manager,
 )
 
+# Import circuit breaker registry maintenance
+from llm_providers import get_breaker_stats, sweep_idle_breakers
+from metrics import (
+    ANALYZE_CHUNKED_REQUESTS,
+    ANALYZE_CHUNKS,
+    CONSENSUS_DURATION,
+    HTTP_REQUEST_DURATION,
+    LOG_QUEUE_DEPTH,
+    LOG_RECORDS,
+    registry as metrics_registry,
+)
+
 # Import rate limiting
-from rate_limiting import RateLimiter, get_identifier
+from rate_limit_store import SQLiteRateLimitStore
+from rate_limiting import RateLimiter, TokenRateLimiter, get_identifier, hash_api_key
 
 # Import our structured logging configuration
 from structured_logging import (
     RequestContext,
+    get_log_pipeline_stats,
     get_logger,
     log_api_request,
     log_api_response,
     setup_structured_logging,
 )
 # Import security utilities
+from tracing import current_span, slow_traces, start_span
 from utils.security import PayloadValidator, RequestIsolator
 
 # Import timeout handling
 from timeout_handler import (
     TimeoutError as AppTimeoutError,
     get_timeout_stats,
+    response_tracker,
     timeout_handler,
 )
 # Provide a thin workflow entrypoint for tests to patch
@@ -99,11 +118,21 @@ async def lifespan(app: FastAPI):
         )
     else:
         logger.warning("⚠️ Ollama not detected - local LLM features will be unavailable")
+    allocation_profiler.start()
     await memory_manager.start()
+
+    from plugins.ollama_provider import close_shared_session, model_warmer, ollama_catalog
+
+    await ollama_catalog.start()
+    await model_warmer.start()
     yield
     # Shutdown
     logger.info("Shutting down AI Conflict Dashboard API")
     await memory_manager.stop()
+    await model_warmer.stop()
+    await ollama_catalog.stop()
+    await close_shared_session()
+    allocation_profiler.stop()
 
 
 app = FastAPI(title="AI Conflict Dashboard", version="0.1.0", lifespan=lifespan)
@@ -132,12 +161,58 @@ async def prevent_https_upgrade(request, call_next):
     return response
 
 
+# Share rate limit windows across uvicorn workers when a store path is configured
+rate_limit_store_path = os.getenv("RATE_LIMIT_STORE_PATH")
 rate_limiter = RateLimiter(
     requests_per_minute=60,
     requests_per_hour=600,
     requests_per_day=10000,
     burst_size=100,
+    max_identifiers=int(os.getenv("RATE_LIMIT_MAX_IDENTIFIERS", "50000")),
+    store=SQLiteRateLimitStore(rate_limit_store_path) if rate_limit_store_path else None,
 )
+memory_manager.register_cleanup("rate_limiter", rate_limiter.sweep_expired)
+
+# Token-cost limits per provider API key, so a few huge payloads can't starve other requests
+token_limiter = TokenRateLimiter(
+    tokens_per_minute=int(os.getenv("TOKEN_RATE_LIMIT_PER_MINUTE", "200000")),
+    tokens_per_hour=int(os.getenv("TOKEN_RATE_LIMIT_PER_HOUR", "2000000")),
+)
+memory_manager.register_cleanup("token_limiter", token_limiter.sweep_expired)
+# Load tests run with TESTING=1 from one client; the test suite switches this
+# off in conftest.py and back on with the token_limits fixture
+enforce_token_limits = os.getenv("TESTING") != "1"
+# Test runs share one process whose RSS says nothing about production load;
+# the suite enables this with the memory_admission fixture and a fake RSS
+enforce_memory_admission = os.getenv("TESTING") != "1"
+
+# Drop per-key circuit breakers idle for longer than BREAKER_IDLE_TTL
+memory_manager.register_cleanup("circuit_breakers", sweep_idle_breakers)
+# Drop latency histograms of routes that have not been used for two windows
+memory_manager.register_cleanup("response_tracker", response_tracker.sweep_expired)
+
+
+# Log pipeline totals seen at the previous scrape, by outcome
+_log_totals_seen: dict[str, int] = {}
+
+
+def _collect_log_pipeline_metrics() -> None:
+    """Bring log pipeline metrics up to date before a metrics scrape."""
+    stats = get_log_pipeline_stats()
+    totals = {
+        "written": stats.get("written", 0),
+        "dropped": sum(stats.get("dropped", {}).values()),
+        "sampled_out": stats["sampled_out"],
+    }
+    for outcome, total in totals.items():
+        seen = _log_totals_seen.get(outcome, 0)
+        # Totals start over when logging is reconfigured; count those records as new
+        LOG_RECORDS.inc(total - seen if total >= seen else total, outcome=outcome)
+        _log_totals_seen[outcome] = total
+    LOG_QUEUE_DEPTH.set(stats.get("queued", 0))
+
+
+metrics_registry.register_collector("log_pipeline", _collect_log_pipeline_metrics)
 
 # Configure CORS with secure settings
 app.add_middleware(
@@ -176,13 +251,30 @@ async def log_requests(request: Request, call_next):
             query_params=dict(request.query_params),
         )
 
-        # Process request
-        response = await call_next(request)
+        # Process request inside the root span of this request's trace
+        with start_span(f"{request.method} {request.url.path}") as span:
+            response = await call_next(request)
+
+            # Label by route template, not raw path, to keep series bounded
+            route_path = getattr(request.scope.get("route"), "path", "unmatched")
+            span.name = f"{request.method} {route_path}"
+            span.set_attribute("http.route", route_path)
+            span.set_attribute("http.status_code", response.status_code)
 
         # Log response with structured logging
         process_time = (time.time() - start_time) * 1000  # Convert to ms
+        HTTP_REQUEST_DURATION.observe(
+            process_time / 1000,
+            method=request.method,
+            route=route_path,
+            status=response.status_code,
+        )
         log_api_response(
-            logger, status_code=response.status_code, duration_ms=round(process_time, 2)
+            logger,
+            status_code=response.status_code,
+            duration_ms=round(process_time, 2),
+            method=request.method,
+            route=route_path,
         )
 
         # Add request ID to response headers
@@ -203,8 +295,8 @@ async def rate_limit_requests(request: Request, call_next):
         The response or rate limit error.
 
     """
-    # Skip rate limiting for health checks
-    if request.url.path == "/api/health":
+    # Skip rate limiting for health checks and metrics scrapes
+    if request.url.path in ("/api/health", "/metrics"):
         return await call_next(request)
 
     # Detect test environment
@@ -230,7 +322,7 @@ async def rate_limit_requests(request: Request, call_next):
     identifier = get_identifier(request)
 
     # Check rate limit
-    allowed, retry_after = rate_limiter.check_rate_limit(identifier)
+    allowed, retry_after = await rate_limiter.check_rate_limit_async(identifier)
 
     if not allowed:
         return JSONResponse(
@@ -243,6 +335,40 @@ async def rate_limit_requests(request: Request, call_next):
     return await call_next(request)
 
 
+# Shed or queue heavy requests under memory pressure (outermost, so shed requests cost nothing)
+@app.middleware("http")
+async def memory_admission(request: Request, call_next):
+    """Middleware to admit, queue or reject requests based on memory pressure.
+
+    Args:
+        request: The incoming FastAPI request object.
+        call_next: The next middleware or endpoint in the chain.
+
+    Returns:
+        The response, or a 503 with Retry-After when memory is too high.
+
+    """
+    if not enforce_memory_admission:
+        return await call_next(request)
+
+    try:
+        content_length = int(request.headers["content-length"])
+    except (KeyError, ValueError):
+        content_length = None
+
+    admission = await admission_controller.admit(request.method, request.url.path, content_length)
+    if not admission.admitted:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Server is low on memory, please retry later"},
+            headers={"Retry-After": str(admission.retry_after)},
+        )
+    try:
+        return await call_next(request)
+    finally:
+        admission_controller.release(admission)
+
+
 # Request/Response models
 class AnalyzeRequest(BaseModel):
     text: str
@@ -261,6 +387,8 @@ class ModelResponse(BaseModel):
     model: str
     response: str
     error: str | None = None
+    route: dict | None = None  # Which route served the result (see model_router)
+    served_by: str | None = None  # Fallback provider's model label after a failover
 
 
 class AnalyzeResponse(BaseModel):
@@ -305,7 +433,88 @@ async def memory_status():
         dict: Current memory usage statistics.
 
     """
-    return memory_manager.check_memory_usage()
+    return {
+        **memory_manager.check_memory_usage(),
+        "admission": admission_controller.get_stats(),
+        "rate_limiter": rate_limiter.get_stats(),
+        "token_limiter": token_limiter.get_stats(),
+        "circuit_breakers": get_breaker_stats(),
+        "allocation_profiling": allocation_profiler.get_stats(),
+    }
+
+
+# Plain functions so FastAPI runs them in its threadpool; a snapshot of a
+# large heap takes long enough to stall the event loop
+@app.post("/api/memory/snapshot")
+def memory_snapshot(group_by: Literal["module", "file", "line"] = "module", limit: int = 20):
+    """Take an allocation snapshot and keep it as the baseline for /api/memory/diff.
+
+    Args:
+        group_by: Group allocation sites by module, file or line
+        limit: Maximum number of sites to return
+
+    Returns:
+        dict: Traced memory and the sites holding the most memory.
+
+    Raises:
+        HTTPException: If allocation profiling is not enabled (409).
+
+    """
+    try:
+        return allocation_profiler.snapshot(group_by, max(1, min(limit, 200)))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+
+
+@app.get("/api/memory/diff")
+def memory_diff(group_by: Literal["module", "file", "line"] = "module", limit: int = 20):
+    """Allocation growth since the last /api/memory/snapshot.
+
+    Args:
+        group_by: Group allocation sites by module, file or line
+        limit: Maximum number of sites to return
+
+    Returns:
+        dict: Total growth and the sites that grew most, largest growth first.
+
+    Raises:
+        HTTPException: If profiling is not enabled or no snapshot was taken yet (409).
+
+    """
+    try:
+        return allocation_profiler.diff(group_by, max(1, min(limit, 200)))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus scrape endpoint.
+
+    Returns:
+        PlainTextResponse: All metrics in the Prometheus text exposition format.
+
+    """
+    return PlainTextResponse(
+        metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/api/traces/slow")
+async def slow_trace_dump(limit: int = 20):
+    """Recent slow request traces.
+
+    Args:
+        limit: Maximum number of traces to return, newest first
+
+    Returns:
+        dict: Slow-trace threshold and the kept traces with their spans.
+
+    """
+    return {
+        "threshold_ms": slow_traces.threshold_ms,
+        "traces": slow_traces.traces(max(0, min(limit, 100))),
+    }
 
 
 @app.get("/api/timeout-stats")
@@ -561,28 +770,31 @@ async def analyze_text(request: AnalyzeRequest):
         HTTPException: If text is empty (400) or analysis fails (500).
 
     """
-    # Enhanced validation with security checks
-    if not request.text or len(request.text.strip()) == 0:
-        raise HTTPException(status_code=400, detail="Text cannot be empty")
-    
-    # Validate payload size
-    is_valid, error_msg = PayloadValidator.validate_text_input(request.text)
-    if not is_valid:
-        raise HTTPException(status_code=413, detail=error_msg)
-    
-    # Validate total JSON size
-    is_valid, error_msg = PayloadValidator.validate_json_size(request.model_dump())
-    if not is_valid:
-        raise HTTPException(status_code=413, detail=error_msg)
+    with start_span("analyze.validate"):
+        # Enhanced validation with security checks
+        if not request.text or len(request.text.strip()) == 0:
+            raise HTTPException(status_code=400, detail="Text cannot be empty")
+
+        # Validate payload size
+        is_valid, error_msg = PayloadValidator.validate_text_input(request.text)
+        if not is_valid:
+            raise HTTPException(status_code=413, detail=error_msg)
+
+        # Validate total JSON size
+        is_valid, error_msg = PayloadValidator.validate_json_size(request.model_dump())
+        if not is_valid:
+            raise HTTPException(status_code=413, detail=error_msg)
 
     # Import here to avoid circular imports
     from llm_providers import analyze_with_models
     from smart_chunking import chunk_text_smart
-    from token_utils import check_token_limits
+    from token_utils import check_token_limits, estimate_tokens
     from consensus_analyzer import ConsensusAnalyzer
 
     # Check token limits
-    token_check = check_token_limits(request.text)
+    with start_span("analyze.check_token_limits") as span:
+        token_check = check_token_limits(request.text)
+        span.set_attribute("tokens.estimated", token_check["estimated_tokens"])
     logger.info(
         "Token check",
         extra={
@@ -606,6 +818,8 @@ async def analyze_text(request: AnalyzeRequest):
 
         # Get chunks
         chunks = chunk_text_smart(request.text, chunk_size=10000)  # ~2500 tokens
+        ANALYZE_CHUNKED_REQUESTS.inc()
+        ANALYZE_CHUNKS.inc(len(chunks))
         chunk_info = {
             "total_chunks": len(chunks),
             "processing_chunk": 1,
@@ -619,8 +833,29 @@ async def analyze_text(request: AnalyzeRequest):
         if len(chunks) > 1:
             request.text += f"\n\n[Note: This is chunk 1 of {len(chunks)}. Text was truncated to fit API limits.]"
 
+    # Charge prompt tokens to each provider key's token budget
+    provider_keys = {
+        "openai": request.openai_key,
+        "claude": request.claude_key,
+        "gemini": request.gemini_key,
+        "grok": request.grok_key,
+    }
+    key_ids = {model: hash_api_key(key) for model, key in provider_keys.items() if key}
+    prompt_tokens = chunk_info["chunk_tokens"] if chunk_info else token_check["estimated_tokens"]
+    if enforce_token_limits:
+        # All keys or none: a rejected key must not leave the others charged
+        allowed, retry_after = token_limiter.check_tokens_all(key_ids.values(), prompt_tokens)
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail="Token rate limit exceeded",
+                headers={"Retry-After": str(retry_after)},
+            )
+
     # Generate request ID
     request_id = str(uuid4())
+    if span := current_span():
+        span.set_attribute("analyze.request_id", request_id)
 
     logger.info(
         f"Processing analyze request {request_id}",
@@ -642,18 +877,30 @@ async def analyze_text(request: AnalyzeRequest):
 
         try:
             # Call all models in parallel
-            responses = await analyze_with_models(
-                request.text,
-                request.openai_key,
-                request.claude_key,
-                request.gemini_key,
-                request.grok_key,
-                request.ollama_model,
-                request.openai_model,
-                request.claude_model,
-                request.gemini_model,
-                request.grok_model,
-            )
+            with start_span("analyze.providers"):
+                responses = await analyze_with_models(
+                    request.text,
+                    request.openai_key,
+                    request.claude_key,
+                    request.gemini_key,
+                    request.grok_key,
+                    request.ollama_model,
+                    request.openai_model,
+                    request.claude_model,
+                    request.gemini_model,
+                    request.grok_model,
+                )
+
+            # Charge completion tokens to the key that produced them, preferring
+            # provider-reported usage
+            if enforce_token_limits:
+                for resp in responses:
+                    key_id = key_ids.get(resp.get("served_by") or resp["model"])
+                    if key_id and resp["response"]:
+                        completion_tokens = resp.get("completion_tokens") or estimate_tokens(
+                            resp["response"]
+                        )
+                        token_limiter.charge(key_id, completion_tokens)
 
             # Log model responses
             for resp in responses:
@@ -671,12 +918,17 @@ async def analyze_text(request: AnalyzeRequest):
             model_responses = []
             for resp in responses:
                 # Limit response size to prevent memory issues
-                limited_response = limit_response_size(resp["response"]) if resp["response"] else ""
+                with start_span("analyze.limit_response_size"):
+                    limited_response = (
+                        limit_response_size(resp["response"]) if resp["response"] else ""
+                    )
                 model_responses.append(
                     ModelResponse(
                         model=resp["model"],
                         response=limited_response,
                         error=resp["error"],
+                        route=resp.get("route"),
+                        served_by=resp.get("served_by"),
                     )
                 )
                 # Track response in memory context
@@ -696,7 +948,9 @@ async def analyze_text(request: AnalyzeRequest):
             sanitized_text = sanitize_sensitive_data(original_text[:500])
             
             # Analyze consensus
+            consensus_start = time.perf_counter()
             consensus = ConsensusAnalyzer.analyze_consensus(model_responses)
+            CONSENSUS_DURATION.observe(time.perf_counter() - consensus_start)
 
             return AnalyzeResponse(
                 request_id=request_id,
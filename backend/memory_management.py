@@ -10,8 +10,11 @@ This module provides utilities for:
 import asyncio
 import contextlib
 import gc
-import sys
+import math
+import os
+import time
 import weakref
+from collections.abc import Callable
 from datetime import UTC, datetime
 from typing import Any
 
@@ -21,10 +24,18 @@ import structlog
 logger = structlog.get_logger(__name__)
 
 # Configuration
-MAX_RESPONSE_SIZE = 10 * 1024 * 1024  # 10MB max per response
-MAX_TOTAL_MEMORY = 512 * 1024 * 1024  # 512MB total memory limit
+MAX_RESPONSE_SIZE = 10 * 1024 * 1024  # 10MB of UTF-8 max per response
+MAX_TOTAL_MEMORY = int(os.getenv("MAX_MEMORY_MB", "512")) * 1024 * 1024  # Process RSS limit
 CLEANUP_INTERVAL = 60  # seconds
+RSS_SAMPLE_INTERVAL = float(os.getenv("RSS_SAMPLE_INTERVAL_SECONDS", "1"))  # RSS reading reuse
 REQUEST_TIMEOUT = 300  # 5 minutes max request lifetime
+LARGE_CONTAINER_ITEMS = 128 * 1024  # Tracked lists/dicts this long are emptied on cleanup
+
+# Response truncation: characters encoded per step while measuring a prefix,
+# and how far back to look for a sentence end to cut at
+_ENCODE_CHUNK_CHARS = 64 * 1024
+_BOUNDARY_WINDOW_CHARS = 2048
+_SENTENCE_BREAKS = ("\n", ". ", "! ", "? ")
 
 # Global tracking
 _active_requests: set[weakref.ref] = set()
@@ -38,6 +49,22 @@ class MemoryManager:
     def __init__(self):
         self.process = psutil.Process()
         self._cleanup_task = None
+        self._cleanup_hooks: dict[str, Callable[[], Any]] = {}
+        self._rss = 0
+        self._rss_sampled_at = -math.inf
+
+    def register_cleanup(self, name: str, hook: Callable[[], Any]) -> None:
+        """Register a callable to run on every periodic cleanup.
+
+        Hooks let other modules release their own caches (e.g. idle rate
+        limiter identifiers) on the same schedule as garbage collection.
+
+        Args:
+            name: Unique hook name used in logs
+            hook: Zero-argument callable; its return value is logged
+
+        """
+        self._cleanup_hooks[name] = hook
 
     async def start(self):
         """Start the background cleanup task."""
@@ -81,6 +108,14 @@ class MemoryManager:
         # Clean up dead weak references
         _active_requests.difference_update(ref for ref in _active_requests if ref() is None)
 
+        # Let registered modules release their own state
+        for name, hook in list(self._cleanup_hooks.items()):
+            try:
+                result = hook()
+                logger.debug("Cleanup hook completed", hook=name, result=result)
+            except Exception as e:
+                logger.error("Cleanup hook failed", hook=name, error=str(e))
+
         # Force garbage collection
         collected = gc.collect()
 
@@ -114,10 +149,22 @@ class MemoryManager:
             "last_cleanup": _last_cleanup.isoformat(),
         }
 
+    def sampled_rss(self) -> int:
+        """Return the process RSS in bytes, re-read at most every RSS_SAMPLE_INTERVAL.
+
+        Cheap enough to call on every request; the reading is at most one
+        interval old.
+
+        """
+        now = time.monotonic()
+        if now - self._rss_sampled_at >= RSS_SAMPLE_INTERVAL:
+            self._rss = self.process.memory_info().rss
+            self._rss_sampled_at = now
+        return self._rss
+
     def is_memory_critical(self) -> bool:
         """Check if memory usage is critically high."""
-        memory_info = self.process.memory_info()
-        return memory_info.rss > MAX_TOTAL_MEMORY * 0.9  # 90% threshold
+        return self.sampled_rss() > MAX_TOTAL_MEMORY * 0.9  # 90% threshold
 
 
 class RequestContext:
@@ -165,51 +212,135 @@ class RequestContext:
         """Clean up all tracked resources."""
         for name, resource in self.resources.items():
             try:
-                # Clear large strings/objects
-                if (
-                    isinstance(resource, str | bytes | list | dict)
-                    and sys.getsizeof(resource) > 1024 * 1024
-                ):
+                # Strings are released with the reference below; empty large
+                # containers too, in case the caller still holds them
+                if isinstance(resource, list | dict) and len(resource) >= LARGE_CONTAINER_ITEMS:
                     logger.debug(f"Clearing large resource: {name}")
-                    if isinstance(resource, list | dict):
-                        resource.clear()
+                    resource.clear()
             except Exception as e:
                 logger.error(f"Error cleaning up resource {name}", error=str(e))
 
         self.resources.clear()
 
 
-def limit_response_size(response: str) -> str:
-    """Limit response size to prevent memory issues.
+def _utf8_prefix(text: str, max_bytes: int) -> tuple[int, int]:
+    """Measure the longest prefix of ``text`` that fits in ``max_bytes`` of UTF-8.
+
+    Encodes at most one chunk past the budget, never the whole string.
+
+    Returns:
+        ``(chars, nbytes)``: the prefix length in characters and its encoded size.
+        ``chars == len(text)`` when all of it fits.
+
+    """
+    max_bytes = max(0, max_bytes)
+    if text.isascii():
+        chars = min(len(text), max_bytes)
+        return chars, chars
+
+    used = 0
+    for start in range(0, len(text), _ENCODE_CHUNK_CHARS):
+        encoded = text[start : start + _ENCODE_CHUNK_CHARS].encode("utf-8", "surrogatepass")
+        if used + len(encoded) > max_bytes:
+            # Drop a codepoint split by the cut
+            head = encoded[: max_bytes - used].decode("utf-8", "ignore")
+            return start + len(head), used + len(head.encode("utf-8", "surrogatepass"))
+        used += len(encoded)
+    return len(text), used
+
+
+def _break_before(text: str, end: int) -> int:
+    """Move a cut at ``end`` back to a sentence end or space in the last few KB.
+
+    Returns ``end`` if there is no break close enough.
+
+    """
+    window = max(0, end - _BOUNDARY_WINDOW_CHARS)
+    cut = max(text.rfind(sep, window, end) for sep in _SENTENCE_BREAKS)
+    if cut >= 0:
+        return cut + 1
+    cut = text.rfind(" ", window, end)
+    return cut if cut > 0 else end
+
+
+def _truncation_notice(max_bytes: int) -> str:
+    notice = f"\n\n[Response truncated to {max_bytes / 1024 / 1024:.1f}MB]"
+    return notice if len(notice) < max_bytes else ""
+
+
+def limit_response_size(response: str, max_bytes: int = MAX_RESPONSE_SIZE) -> str:
+    """Limit a response to ``max_bytes`` of UTF-8, notice included.
+
+    An oversized response is cut at the last sentence end or space before
+    the budget runs out (or mid-word if there is none nearby), never inside
+    a codepoint. Only the kept prefix is encoded to measure it.
 
     Args:
         response: The response text to limit
+        max_bytes: UTF-8 byte budget (default: MAX_RESPONSE_SIZE)
 
     Returns:
         The response, truncated if necessary
 
     """
-    if not response:
+    # Every codepoint encodes to at most 4 bytes
+    if not response or len(response) * 4 <= max_bytes:
         return response
 
-    size = sys.getsizeof(response)
-    if size > MAX_RESPONSE_SIZE:
-        # Calculate how much to keep
-        ratio = MAX_RESPONSE_SIZE / size
-        chars_to_keep = int(len(response) * ratio * 0.9)  # 90% to be safe
+    notice = _truncation_notice(max_bytes)
+    chars, nbytes = _utf8_prefix(response, max_bytes - len(notice))
+    # What's left may still fit in the room kept for the notice (at least a byte per char)
+    rest = response[chars:] if len(response) - chars <= len(notice) else None
+    if rest is not None and nbytes + len(rest.encode("utf-8", "surrogatepass")) <= max_bytes:
+        return response
 
-        truncated = response[:chars_to_keep]
-        truncated += f"\n\n[Response truncated from {size / 1024 / 1024:.1f}MB to {MAX_RESPONSE_SIZE / 1024 / 1024:.1f}MB]"
+    end = _break_before(response, chars)
+    logger.warning(
+        "Response truncated due to size",
+        original_chars=len(response),
+        kept_chars=end,
+        max_bytes=max_bytes,
+    )
+    truncated = response[:end]
+    truncated += notice  # Resized in place rather than copied again
+    return truncated
 
-        logger.warning(
-            "Response truncated due to size",
-            original_size_mb=round(size / 1024 / 1024, 2),
-            truncated_size_mb=round(sys.getsizeof(truncated) / 1024 / 1024, 2),
-        )
 
-        return truncated
+class ResponseLimiter:
+    """Applies a UTF-8 byte budget to text that arrives in pieces.
+
+    Feed each streamed delta through ``feed`` and stop reading once
+    ``truncated`` is set, so an oversized answer is never held in full.
+    Text already passed on can't be taken back, so room for the notice is
+    reserved from the start, and the cut can only move back to a sentence
+    end inside the last delta.
+
+    """
+
+    def __init__(self, max_bytes: int = MAX_RESPONSE_SIZE):
+        self.max_bytes = max_bytes
+        self.notice = _truncation_notice(max_bytes)
+        self.used = 0
+        self.truncated = False
+
+    def feed(self, text: str) -> str:
+        """Return the part of ``text`` that fits in the remaining budget.
+
+        Once the budget runs out, the kept part ends with the truncation
+        notice and every later call returns "".
+
+        """
+        if self.truncated:
+            return ""
+        chars, nbytes = _utf8_prefix(text, self.max_bytes - len(self.notice) - self.used)
+        if chars == len(text):
+            self.used += nbytes
+            return text
 
-    return response
+        self.truncated = True
+        kept = text[: _break_before(text, chars)]
+        self.used += len(kept.encode("utf-8", "surrogatepass")) + len(self.notice)
+        return kept + self.notice
 
 
 def cache_response(request_id: str, response: Any, ttl_seconds: int = 300):
@@ -295,8 +426,8 @@ if __name__ == "__main__":
             limited = limit_response_size(large_data)
             logger.info(
                 "Size comparison",
-                original_mb=sys.getsizeof(large_data) / 1024 / 1024,
-                limited_mb=sys.getsizeof(limited) / 1024 / 1024,
+                original_mb=len(large_data.encode()) / 1024 / 1024,
+                limited_mb=len(limited.encode()) / 1024 / 1024,
             )
 
         # Cleanup should happen automatically
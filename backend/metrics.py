@@ -0,0 +1,311 @@
+"""Prometheus-style metrics for the whole request path.
+
+A small in-process registry of counters, gauges and histograms rendered
+in the Prometheus text exposition format (version 0.0.4) by ``/metrics``.
+Updating a metric is a dict lookup, a lock and an add (plus a bisect for
+histograms), so instrumenting hot paths costs well under a microsecond.
+
+Each metric caps its number of label combinations; past the cap new
+combinations are folded into one series whose label values are
+``_other``, so user-controlled values can't grow memory without bound.
+"""
+
+import bisect
+import math
+import threading
+from collections.abc import Callable, Iterable
+
+from structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+MAX_SERIES_PER_METRIC = 1000
+OVERFLOW_LABEL = "_other"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Shared label handling for all metric types."""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: dict[tuple[str, ...], object] = {}
+
+    def _key(self, labels: dict[str, object]) -> tuple[str, ...]:
+        """Return the series key for label values. Caller holds the lock."""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        if key not in self._series and len(self._series) >= MAX_SERIES_PER_METRIC:
+            return (OVERFLOW_LABEL,) * len(self.labelnames)
+        return key
+
+    def _header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+    def reset(self) -> None:
+        """Drop all series."""
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels: object) -> None:
+        """Increase the counter for a label combination."""
+        with self._lock:
+            key = self._key(labels)
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels: object) -> float:
+        """Return the current value for a label combination."""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        return self._series.get(key, 0)
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        with self._lock:
+            for key, value in self._series.items():
+                lines.append(
+                    f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                )
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels: object) -> None:
+        """Set the gauge for a label combination."""
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+
+class _HistogramSeries:
+    __slots__ = ("bucket_counts", "count", "sum")
+
+    def __init__(self, num_buckets: int):
+        self.bucket_counts = [0] * num_buckets
+        self.count = 0
+        self.sum = 0.0
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: object) -> None:
+        """Record one observation for a label combination."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            key = self._key(labels)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets) + 1)
+            series.bucket_counts[index] += 1
+            series.count += 1
+            series.sum += value
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        bounds = [*self.buckets, math.inf]
+        with self._lock:
+            for key, series in self._series.items():
+                cumulative = 0
+                for bound, n in zip(bounds, series.bucket_counts, strict=True):
+                    cumulative += n
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(
+                        f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                    )
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(series.sum)}")
+                lines.append(f"{self.name}_count{labels} {series.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them for scraping."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: dict[str, Callable[[], None]] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing  # Re-imports get the same instance
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        """Create or return a counter."""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        """Create or return a gauge."""
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Create or return a histogram."""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, name: str, collect: Callable[[], None]) -> None:
+        """Register a callable that refreshes gauges right before each scrape."""
+        self._collectors[name] = collect
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text format."""
+        for name, collect in list(self._collectors.items()):
+            try:
+                collect()
+            except Exception as e:
+                logger.error("Metrics collector failed", collector=name, error=str(e))
+
+        lines: list[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Clear every metric's series (used by tests)."""
+        for metric in self._metrics.values():
+            metric.reset()
+
+
+registry = MetricsRegistry()
+
+# HTTP layer (main.py)
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, method and status code",
+    ("method", "route", "status"),
+)
+
+# Provider calls (llm_providers.py)
+LLM_CALL_DURATION = registry.histogram(
+    "llm_call_duration_seconds", "Provider call latency by route", ("provider", "model")
+)
+LLM_CALL_ERRORS = registry.counter(
+    "llm_call_errors_total", "Provider calls that returned an error", ("provider", "model")
+)
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total",
+    "Tokens sent to and received from providers (estimated where not reported)",
+    ("provider", "model", "kind"),
+)
+BREAKER_TRANSITIONS = registry.counter(
+    "circuit_breaker_transitions_total",
+    "Circuit breaker state transitions by provider and new state",
+    ("provider", "state"),
+)
+BREAKERS = registry.gauge(
+    "circuit_breakers", "Circuit breakers currently tracked by state", ("state",)
+)
+
+OLLAMA_MODEL_LOAD_DURATION = registry.histogram(
+    "ollama_model_load_duration_seconds",
+    "Time Ollama spent loading a model before answering (near zero when resident)",
+    ("model",),
+)
+
+OLLAMA_QUEUE_WAIT = registry.histogram(
+    "ollama_queue_wait_seconds",
+    "Time Ollama requests waited in the model-affinity queue",
+    ("model",),
+)
+OLLAMA_QUEUE_DEPTH = registry.gauge(
+    "ollama_queue_depth", "Ollama requests waiting for a slot by model", ("model",)
+)
+OLLAMA_MODEL_SWITCHES = registry.counter(
+    "ollama_model_switches_total", "Times the Ollama queue started serving a different model"
+)
+
+# Rate limiting (rate_limiting.py)
+RATE_LIMIT_REJECTIONS = registry.counter(
+    "rate_limit_rejections_total",
+    "Requests rejected by rate limiters by limiter and window",
+    ("limiter", "window"),
+)
+
+# Memory-pressure admission control (admission_control.py)
+ADMISSION_DECISIONS = registry.counter(
+    "admission_decisions_total",
+    "Requests admitted, queued or rejected while memory was above the soft limit",
+    ("route", "decision"),
+)
+
+# Analysis pipeline (main.py)
+ANALYZE_CHUNKS = registry.counter(
+    "analyze_chunks_total", "Chunks produced when splitting oversized analyze input"
+)
+ANALYZE_CHUNKED_REQUESTS = registry.counter(
+    "analyze_chunked_requests_total", "Analyze requests whose input had to be chunked"
+)
+CONSENSUS_DURATION = registry.histogram(
+    "consensus_duration_seconds",
+    "Time spent computing consensus across model responses",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+# Log pipeline (structured_logging.py), refreshed at scrape time
+LOG_RECORDS = registry.counter(
+    "log_records_total",
+    "Log records written, dropped on a full queue or sampled out",
+    ("outcome",),
+)
+LOG_QUEUE_DEPTH = registry.gauge("log_queue_depth", "Log records waiting for the writer thread")
+
+# Workflows (workflow_executor.py)
+WORKFLOW_NODE_DURATION = registry.histogram(
+    "workflow_node_duration_seconds",
+    "Workflow node execution time by node type and outcome",
+    ("node_type", "status"),
+)
@@ -0,0 +1,207 @@
+"""Provider failover and model routing for multi-model analysis.
+
+Each model requested by a user is served through ``ModelRouter.serve``.
+The requested route is tried first unless its circuit breaker is open; on
+failure the router falls back to equivalent routes configured in the
+``RoutingPolicy`` (for example a local Ollama model standing in for a
+saturated cloud provider), best scored first. Scores combine observed
+latency from ``ResponseTimeTracker``, a relative cost per provider and
+breaker health. Every result carries a ``route`` entry saying which route
+served it and what was tried on the way.
+"""
+
+import os
+import re
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from structured_logging import get_logger
+from timeout_handler import ResponseTimeTracker, response_tracker
+
+logger = get_logger(__name__)
+
+# Relative cost per call; only the ordering between providers matters
+PROVIDER_COSTS: dict[str, float] = {
+    "openai": 1.0,
+    "claude": 1.0,
+    "gemini": 0.5,
+    "grok": 1.0,
+    "ollama": 0.0,
+}
+
+# Latency assumed for routes with no recorded samples yet (seconds)
+DEFAULT_LATENCY = 5.0
+
+# Model names safe to echo in route labels and use as metric names; the
+# requested model comes from user input
+_SAFE_MODEL_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9._:-]{0,63}")
+
+
+@dataclass(frozen=True)
+class Route:
+    """A provider and optional model that can serve a request."""
+
+    provider: str
+    model: str | None = None
+
+    @property
+    def label(self) -> str:
+        """Return ``provider/model``, or just the provider for unsafe model names."""
+        if self.model and _SAFE_MODEL_NAME.fullmatch(self.model):
+            return f"{self.provider}/{self.model}"
+        return self.provider
+
+    @property
+    def operation(self) -> str:
+        """Return the ResponseTimeTracker operation name for this route."""
+        return f"llm:{self.label}"
+
+    @classmethod
+    def parse(cls, spec: str) -> "Route":
+        """Parse ``provider`` or ``provider/model``."""
+        provider, _, model = spec.strip().partition("/")
+        return cls(provider.lower(), model or None)
+
+
+@dataclass
+class RoutingPolicy:
+    """Failover candidates per provider and how to rank them."""
+
+    fallbacks: dict[str, list[Route]] = field(default_factory=dict)
+    latency_weight: float = 1.0  # Score per second of typical latency
+    cost_weight: float = 2.0  # Score per unit of PROVIDER_COSTS
+    half_open_penalty: float = 10.0  # Score added while a breaker is probing
+
+    @classmethod
+    def from_spec(cls, spec: str, **weights: float) -> "RoutingPolicy":
+        """Build a policy from a spec like ``openai=ollama/llama3.2,claude;claude=openai``.
+
+        Args:
+            spec: Semicolon-separated ``provider=route,route`` entries
+            **weights: Overrides for the scoring weights
+
+        Returns:
+            RoutingPolicy with the parsed fallbacks
+
+        """
+        fallbacks: dict[str, list[Route]] = {}
+        for entry in filter(None, (part.strip() for part in spec.split(";"))):
+            provider, _, targets = entry.partition("=")
+            fallbacks[provider.strip().lower()] = [
+                Route.parse(target) for target in targets.split(",") if target.strip()
+            ]
+        return cls(fallbacks=fallbacks, **weights)
+
+
+class ModelRouter:
+    """Serve requested routes with failover according to a RoutingPolicy."""
+
+    def __init__(
+        self,
+        policy: RoutingPolicy | None = None,
+        tracker: ResponseTimeTracker = response_tracker,
+    ):
+        """Initialize the router.
+
+        Args:
+            policy: Routing policy (None means no failover)
+            tracker: Where route latencies are recorded and read back
+
+        """
+        self.policy = policy or RoutingPolicy()
+        self.tracker = tracker
+
+    def score(self, route: Route, state: str) -> float | None:
+        """Return a route's score (lower is better), or None if it can't serve.
+
+        Args:
+            route: Candidate route
+            state: Breaker state for the route: closed, half-open, open or
+                unavailable (e.g. no API key for it in this request)
+
+        """
+        if state in ("open", "unavailable"):
+            return None
+
+        latency = self.tracker.get_typical_latency(route.operation)
+        score = self.policy.latency_weight * (DEFAULT_LATENCY if latency is None else latency)
+        score += self.policy.cost_weight * PROVIDER_COSTS.get(route.provider, 1.0)
+        if state == "half-open":
+            score += self.policy.half_open_penalty
+        return score
+
+    def candidates(self, primary: Route, state_of: Callable[[Route], str]) -> list[Route]:
+        """Return fallback routes for ``primary`` that can serve, best first."""
+        scored = []
+        for order, route in enumerate(self.policy.fallbacks.get(primary.provider, [])):
+            score = self.score(route, state_of(route))
+            if score is not None and route != primary:
+                scored.append((score, order, route))
+        return [route for _, _, route in sorted(scored)]
+
+    async def serve(
+        self,
+        primary: Route,
+        call: Callable[[Route], Awaitable[dict]],
+        state_of: Callable[[Route], str],
+    ) -> dict:
+        """Serve one requested route, failing over when it errors.
+
+        Args:
+            primary: The route the user asked for
+            call: Coroutine function calling a route and returning a result dict
+            state_of: Breaker state lookup for routes (see ``score``)
+
+        Returns:
+            The serving route's result, annotated with a ``route`` entry
+
+        """
+        attempts: list[dict[str, Any]] = []
+        fallbacks = self.candidates(primary, state_of)
+
+        routes = [primary, *fallbacks]
+        if fallbacks and state_of(primary) == "open":
+            # Don't wait on a provider whose breaker is already open; it is
+            # still called last (failing fast) so its own error gets reported
+            routes = [*fallbacks, primary]
+
+        primary_result: dict = {}
+        for route in routes:
+            start = time.perf_counter()
+            result = await call(route)
+            if not result.get("error"):
+                self.tracker.record(route.operation, time.perf_counter() - start)
+                return self._annotate(result, primary, route, attempts)
+
+            attempts.append({"route": route.label, "error": result["error"]})
+            if route == primary:
+                primary_result = result
+            if route is not routes[-1]:
+                logger.warning(
+                    "Route failed, failing over",
+                    requested=primary.label,
+                    failed=route.label,
+                    error=result["error"],
+                )
+
+        # Nothing succeeded: report the requested route's own error
+        return self._annotate(primary_result, primary, None, attempts)
+
+    @staticmethod
+    def _annotate(
+        result: dict, primary: Route, served_by: Route | None, attempts: list[dict[str, Any]]
+    ) -> dict:
+        """Attach routing metadata to a result in place and return it."""
+        result["route"] = {
+            "requested": primary.label,
+            "served_by": served_by.label if served_by else None,
+            "failover": served_by is not None and served_by != primary,
+            "attempts": attempts,
+        }
+        return result
+
+
+# Global router; failover candidates come from MODEL_FAILOVER
+model_router = ModelRouter(RoutingPolicy.from_spec(os.getenv("MODEL_FAILOVER", "")))
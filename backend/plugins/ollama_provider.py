@@ -8,21 +8,74 @@ Requirements:
 - Default API endpoint: http://localhost:11434
 """
 
+import asyncio
+import contextlib
 import json
+import math
 import os
-from collections.abc import AsyncGenerator
-from datetime import UTC, datetime
+import time
+from collections import deque
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
 from typing import Any
 
 import aiohttp
 import structlog
 
+from memory_management import ResponseLimiter
+from metrics import (
+    OLLAMA_MODEL_LOAD_DURATION,
+    OLLAMA_MODEL_SWITCHES,
+    OLLAMA_QUEUE_DEPTH,
+    OLLAMA_QUEUE_WAIT,
+    registry as metrics_registry,
+)
+
 logger = structlog.get_logger(__name__)
 
 # Ollama configuration
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 OLLAMA_TIMEOUT = int(os.getenv("OLLAMA_TIMEOUT", "120"))  # 2 minutes default
 
+# Connection pool shared by every Ollama request in the process
+OLLAMA_POOL_SIZE = int(os.getenv("OLLAMA_POOL_SIZE", "16"))  # Connections per host
+OLLAMA_KEEPALIVE_SECONDS = float(os.getenv("OLLAMA_KEEPALIVE_SECONDS", "60"))
+DNS_CACHE_TTL_SECONDS = 300
+
+# Model catalog cache: entries are fresh for the TTL, then served stale while
+# a background refresh runs; the periodic refresh normally keeps them fresh
+OLLAMA_CATALOG_TTL_SECONDS = float(os.getenv("OLLAMA_CATALOG_TTL_SECONDS", "30"))
+OLLAMA_CATALOG_REFRESH_SECONDS = float(os.getenv("OLLAMA_CATALOG_REFRESH_SECONDS", "15"))
+OLLAMA_HEALTH_TIMEOUT = 5  # Seconds allowed for a /api/tags request
+
+# How long Ollama keeps a model loaded after a request ("5m", "1h", -1 = forever).
+# Unset leaves Ollama's own default.
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE") or None
+MAX_STREAM_LINE_BYTES = 1024 * 1024  # Longest NDJSON line buffered while streaming
+
+# Warm-up: models in OLLAMA_WARM_MODELS are loaded at startup, and they and any
+# model used within the hot window are pinged so Ollama keeps them resident
+OLLAMA_WARM_MODELS = [
+    model.strip() for model in os.getenv("OLLAMA_WARM_MODELS", "").split(",") if model.strip()
+]
+OLLAMA_WARM_INTERVAL_SECONDS = float(os.getenv("OLLAMA_WARM_INTERVAL_SECONDS", "240"))
+OLLAMA_WARM_KEEP_ALIVE = os.getenv("OLLAMA_WARM_KEEP_ALIVE", "10m")
+OLLAMA_HOT_WINDOW_SECONDS = float(os.getenv("OLLAMA_HOT_WINDOW_SECONDS", "900"))
+OLLAMA_MEMORY_BUDGET_MB = float(os.getenv("OLLAMA_MEMORY_BUDGET_MB", "0"))  # 0 = no limit
+COLD_LOAD_MS = 500  # A load_duration above this means the model wasn't resident
+
+# Model-affinity queue: how many different models may run at once (0 = no
+# limit), how many requests per model, and how many requests a model may take
+# in one turn while requests for other models wait
+OLLAMA_QUEUE_MAX_MODELS = int(os.getenv("OLLAMA_QUEUE_MAX_MODELS", "0"))
+OLLAMA_QUEUE_PER_MODEL = int(os.getenv("OLLAMA_QUEUE_PER_MODEL", "4"))
+OLLAMA_QUEUE_MAX_BATCH = int(os.getenv("OLLAMA_QUEUE_MAX_BATCH", "8"))
+# Requests that may wait per model, and how long each may wait, before failing fast
+OLLAMA_QUEUE_MAX_WAITING = int(os.getenv("OLLAMA_QUEUE_MAX_WAITING", "32"))
+OLLAMA_QUEUE_TIMEOUT_SECONDS = float(os.getenv("OLLAMA_QUEUE_TIMEOUT_SECONDS", "60"))
+
+_shared_session: aiohttp.ClientSession | None = None
+_shared_session_loop: asyncio.AbstractEventLoop | None = None
+
 # Popular Ollama models
 OLLAMA_MODELS = {
     "llama2": {
@@ -78,80 +131,532 @@ OLLAMA_MODELS = {
 }
 
 
+def _discard_session(session: aiohttp.ClientSession, loop: asyncio.AbstractEventLoop) -> None:
+    """Release a session created on another event loop (e.g. between test runs)."""
+    if loop.is_closed():
+        session.detach()  # Its sockets went with the loop; just mark it closed
+    else:
+        asyncio.run_coroutine_threadsafe(session.close(), loop)
+
+
+async def get_shared_session() -> aiohttp.ClientSession:
+    """Return the process-wide session used for all Ollama requests.
+
+    The session keeps connections alive between calls and caches DNS
+    lookups, so local-model calls skip connection setup. It is created on
+    first use and recreated if the running event loop has changed.
+    """
+    global _shared_session, _shared_session_loop
+
+    loop = asyncio.get_running_loop()
+    if _shared_session is not None and not _shared_session.closed:
+        if _shared_session_loop is loop:
+            return _shared_session
+        _discard_session(_shared_session, _shared_session_loop)
+
+    connector = aiohttp.TCPConnector(
+        limit_per_host=OLLAMA_POOL_SIZE,
+        keepalive_timeout=OLLAMA_KEEPALIVE_SECONDS,
+        ttl_dns_cache=DNS_CACHE_TTL_SECONDS,
+    )
+    _shared_session = aiohttp.ClientSession(connector=connector)
+    _shared_session_loop = loop
+    return _shared_session
+
+
+async def close_shared_session() -> None:
+    """Close the shared session (called on application shutdown)."""
+    global _shared_session, _shared_session_loop
+
+    session, _shared_session, _shared_session_loop = _shared_session, None, None
+    if session is not None and not session.closed:
+        await session.close()
+
+
+async def fetch_catalog(base_url: str) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+    """Query Ollama's /api/tags.
+
+    Returns:
+        Health status dict and the raw model entries (empty when unavailable)
+
+    """
+    try:
+        session = await get_shared_session()
+        async with session.get(
+            f"{base_url}/api/tags", timeout=aiohttp.ClientTimeout(total=OLLAMA_HEALTH_TIMEOUT)
+        ) as response:
+            # Check if Ollama is running
+            if response.status == 200:
+                data = await response.json()
+                raw_models = data.get("models", [])
+                models = [model["name"] for model in raw_models]
+                return {
+                    "status": "healthy",
+                    "available": True,
+                    "models": models,
+                    "base_url": base_url,
+                }, raw_models
+            else:
+                return {
+                    "status": "unhealthy",
+                    "available": False,
+                    "error": f"HTTP {response.status}",
+                }, []
+    except aiohttp.ClientConnectorError:
+        return {
+            "status": "offline",
+            "available": False,
+            "error": "Cannot connect to Ollama. Is it running?",
+            "help": "Start Ollama with: ollama serve",
+        }, []
+    except Exception as e:
+        logger.error("Ollama health check failed", error=str(e))
+        return {
+            "status": "error",
+            "available": False,
+            "error": str(e),
+        }, []
+
+
+class CatalogEntry:
+    """One cached /api/tags result."""
+
+    __slots__ = ("fetched_at", "health", "models")
+
+    def __init__(self, health: dict[str, Any], models: list[dict[str, Any]]):
+        self.health = health
+        self.models = models
+        self.fetched_at = time.monotonic()
+
+    @property
+    def age(self) -> float:
+        """Seconds since the entry was fetched."""
+        return time.monotonic() - self.fetched_at
+
+
+class OllamaCatalog:
+    """Cached Ollama health and model list per base URL.
+
+    Fresh entries are returned without a request. Entries older than the
+    TTL are still returned while a background task refetches them
+    (stale-while-revalidate), so only the first lookup for a URL, or the
+    first after ``invalidate``, waits on Ollama. Concurrent lookups share
+    one in-flight request. ``recheck`` refetches after a model lookup
+    missed, at most once per TTL per URL.
+    """
+
+    def __init__(
+        self,
+        ttl: float = OLLAMA_CATALOG_TTL_SECONDS,
+        refresh_interval: float = OLLAMA_CATALOG_REFRESH_SECONDS,
+    ):
+        """Initialize the catalog.
+
+        Args:
+            ttl: Seconds an entry is served without triggering a refresh
+            refresh_interval: Seconds between background refreshes
+
+        """
+        self.ttl = ttl
+        self.refresh_interval = refresh_interval
+        self._entries: dict[str, CatalogEntry] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._rechecked_at: dict[str, float] = {}
+        self._refresh_task: asyncio.Task | None = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    async def get(self, base_url: str = OLLAMA_BASE_URL) -> CatalogEntry:
+        """Return the catalog for an Ollama server, fetching it only when not cached."""
+        entry = self._entries.get(base_url)
+        if entry is None:
+            self.misses += 1
+            return await self.refresh(base_url)
+        if entry.age > self.ttl:
+            self.stale_hits += 1
+            self._start_fetch(base_url)
+        else:
+            self.hits += 1
+        return entry
+
+    async def refresh(self, base_url: str = OLLAMA_BASE_URL) -> CatalogEntry:
+        """Fetch the catalog now, joining a fetch already in flight."""
+        # Shielded so a cancelled caller doesn't cancel the fetch for everyone else
+        return await asyncio.shield(self._start_fetch(base_url))
+
+    async def recheck(self, base_url: str = OLLAMA_BASE_URL) -> CatalogEntry:
+        """Refetch the catalog after a model was missing from it.
+
+        A model pulled since the entry was cached shows up on the first miss,
+        but repeated requests for a model that isn't installed reuse the entry
+        for the rest of the TTL instead of fetching /api/tags every time.
+        """
+        now = time.monotonic()
+        last = self._rechecked_at.get(base_url)
+        if last is not None and now - last < self.ttl:
+            return await self.get(base_url)
+        self._rechecked_at[base_url] = now
+        return await self.refresh(base_url)
+
+    def invalidate(self, base_url: str | None = None) -> None:
+        """Drop cached entries so the next lookup goes to Ollama."""
+        if base_url is None:
+            self._entries.clear()
+            self._rechecked_at.clear()
+        else:
+            self._entries.pop(base_url, None)
+            self._rechecked_at.pop(base_url, None)
+
+    def _start_fetch(self, base_url: str) -> asyncio.Task:
+        task = self._inflight.get(base_url)
+        # Tasks from a previous event loop (e.g. between test runs) can't be awaited
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.create_task(self._fetch(base_url))
+            self._inflight[base_url] = task
+        return task
+
+    async def _fetch(self, base_url: str) -> CatalogEntry:
+        try:
+            health, models = await fetch_catalog(base_url)
+        finally:
+            if self._inflight.get(base_url) is asyncio.current_task():
+                del self._inflight[base_url]
+
+        entry = CatalogEntry(health, models)
+        previous = self._entries.get(base_url)
+        self._entries[base_url] = entry
+
+        # Log availability changes rather than every refresh
+        if previous is None or previous.health.get("available") != health.get("available"):
+            if health.get("available"):
+                logger.info(
+                    "Ollama available",
+                    base_url=base_url,
+                    available_models=len(models),
+                    models=health["models"][:5],  # Log first 5 models
+                )
+            else:
+                logger.warning("Ollama not reachable", base_url=base_url, error=health.get("error"))
+        return entry
+
+    async def start(self) -> None:
+        """Start refreshing cached catalogs in the background."""
+        self._refresh_task = asyncio.create_task(self._periodic_refresh())
+
+    async def stop(self) -> None:
+        """Stop the background refresh."""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._refresh_task
+            self._refresh_task = None
+
+    async def _periodic_refresh(self) -> None:
+        while True:
+            try:
+                await asyncio.sleep(self.refresh_interval)
+                for base_url in list(self._entries) or [OLLAMA_BASE_URL]:
+                    await self.refresh(base_url)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error("Error refreshing Ollama catalog", error=str(e))
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return cache hit counts and the age of each entry."""
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "entries": {
+                base_url: {
+                    "available": entry.health.get("available", False),
+                    "model_count": len(entry.models),
+                    "age_seconds": round(entry.age, 1),
+                }
+                for base_url, entry in self._entries.items()
+            },
+        }
+
+
+ollama_catalog = OllamaCatalog()
+
+
+def _canonical(model: str) -> str:
+    """Model name as Ollama reports it ("llama2" is "llama2:latest")."""
+    return model if ":" in model else f"{model}:latest"
+
+
+class QueueFullError(Exception):
+    """Too many requests are already waiting for the model."""
+
+
+class QueueTimeoutError(Exception):
+    """A request waited longer than the queue timeout for its model."""
+
+
+class _Waiter:
+    __slots__ = ("enqueued_at", "future")
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+
+class ModelQueue:
+    """Model-affinity scheduler for Ollama requests.
+
+    Requests for a model that is already being served are admitted next to
+    it, up to ``per_model`` at a time, so the loaded model is reused instead
+    of swapping. A new model starts only when fewer than ``max_models`` are
+    being served; the one whose oldest request has waited longest goes
+    first. To keep other models from starving, a model admits at most
+    ``max_batch`` requests per turn while requests for other models wait.
+    A request fails with ``QueueFullError`` if ``max_waiting`` requests
+    already wait for its model, and with ``QueueTimeoutError`` if it waits
+    longer than ``timeout``, so one slow model can't hold others up forever.
+    """
+
+    def __init__(
+        self,
+        max_models: int = OLLAMA_QUEUE_MAX_MODELS,
+        per_model: int = OLLAMA_QUEUE_PER_MODEL,
+        max_batch: int = OLLAMA_QUEUE_MAX_BATCH,
+        max_waiting: int = OLLAMA_QUEUE_MAX_WAITING,
+        timeout: float | None = OLLAMA_QUEUE_TIMEOUT_SECONDS,
+    ):
+        """Initialize the queue.
+
+        Args:
+            max_models: Different models served at the same time (0 = no limit)
+            per_model: Concurrent requests per model
+            max_batch: Requests a model takes per turn while other models wait
+            max_waiting: Requests that may wait per model
+            timeout: Seconds a request may wait for its turn (None or 0 = no limit)
+
+        """
+        self.max_models = max_models if max_models > 0 else math.inf
+        self.per_model = max(1, per_model)
+        self.max_batch = max(1, max_batch)
+        self.max_waiting = max(1, max_waiting)
+        self.timeout = timeout or None
+        self._waiting: dict[str, deque[_Waiter]] = {}
+        self._running: dict[str, int] = {}
+        self._turn: dict[str, int] = {}
+        self._served: dict[str, int] = {}
+        self._last_started: str | None = None
+        self.switches = 0
+
+    @contextlib.asynccontextmanager
+    async def slot(self, model: str) -> AsyncIterator[None]:
+        """Wait for this model's turn and hold a slot while the request runs."""
+        model = _canonical(model)
+        await self._acquire(model)
+        try:
+            yield
+        finally:
+            self._release(model)
+
+    def busy(self, model: str) -> bool:
+        """Whether requests for this model are waiting or running."""
+        model = _canonical(model)
+        return model in self._waiting or model in self._running
+
+    async def _acquire(self, model: str) -> None:
+        if len(self._waiting.get(model, ())) >= self.max_waiting:
+            raise QueueFullError(f"{self.max_waiting} requests are already waiting for {model}")
+        waiter = _Waiter(asyncio.get_running_loop().create_future())
+        self._waiting.setdefault(model, deque()).append(waiter)
+        self._served.setdefault(model, 0)
+        self._dispatch()
+        try:
+            # A turn granted just as the timeout fires still counts
+            await asyncio.wait_for(waiter.future, self.timeout)
+        except TimeoutError:
+            self._discard(model, waiter)
+            raise QueueTimeoutError(f"Waited more than {self.timeout}s for {model}") from None
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release(model)  # Admitted just before being cancelled
+            else:
+                self._discard(model, waiter)
+            raise
+        OLLAMA_QUEUE_WAIT.observe(time.monotonic() - waiter.enqueued_at, model=model)
+
+    def _release(self, model: str) -> None:
+        self._served[model] += 1
+        self._running[model] -= 1
+        self._admit(model)  # Hand the slot to the same model before it counts as idle
+        if not self._running[model]:
+            del self._running[model]
+        self._dispatch()
+
+    def _discard(self, model: str, waiter: _Waiter) -> None:
+        queue = self._waiting.get(model)
+        if queue is not None:
+            with contextlib.suppress(ValueError):
+                queue.remove(waiter)
+            if not queue:
+                del self._waiting[model]
+        self._dispatch()  # A capped model may continue if nobody else waits
+
+    def _others_waiting(self, model: str) -> bool:
+        return any(other != model for other in self._waiting)
+
+    def _admit(self, model: str) -> None:
+        queue = self._waiting.get(model)
+        while queue and self._running.get(model, 0) < self.per_model:
+            if self._turn[model] >= self.max_batch and self._others_waiting(model):
+                break
+            waiter = queue.popleft()
+            if waiter.future.done():  # Cancelled while waiting
+                continue
+            waiter.future.set_result(None)
+            self._running[model] = self._running.get(model, 0) + 1
+            self._turn[model] += 1
+        if queue is not None and not queue:
+            del self._waiting[model]
+
+    def _dispatch(self) -> None:
+        # Models being served take more of their own requests first: no switch needed
+        for model in list(self._running):
+            self._admit(model)
+
+        # Start other models while there is room, longest-waiting request first
+        while len(self._running) < self.max_models:
+            candidates = [m for m in self._waiting if m not in self._running]
+            if not candidates:
+                break
+            model = min(candidates, key=lambda m: self._waiting[m][0].enqueued_at)
+            if model != self._last_started:
+                if self._last_started is not None:
+                    self.switches += 1
+                    OLLAMA_MODEL_SWITCHES.inc()
+                self._last_started = model
+            self._turn[model] = 0
+            self._admit(model)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return per-model queue depth, running and served counts."""
+        return {
+            "switches": self.switches,
+            "models": {
+                model: {
+                    "waiting": len(self._waiting.get(model, ())),
+                    "running": self._running.get(model, 0),
+                    "served": served,
+                }
+                for model, served in self._served.items()
+            },
+        }
+
+
+ollama_queue = ModelQueue()
+
+
+def _collect_queue_depth() -> None:
+    """Refresh the queue depth gauge before a metrics scrape."""
+    for model, stats in ollama_queue.get_stats()["models"].items():
+        OLLAMA_QUEUE_DEPTH.set(stats["waiting"], model=model)
+
+
+metrics_registry.register_collector("ollama_queue", _collect_queue_depth)
+
+
+async def iter_ndjson(
+    stream: aiohttp.StreamReader, max_line_bytes: int = MAX_STREAM_LINE_BYTES
+) -> AsyncGenerator[dict[str, Any], None]:
+    """Parse newline-delimited JSON objects as chunks arrive.
+
+    Raises:
+        ValueError: If a single line grows past ``max_line_bytes``
+
+    """
+    buffer = bytearray()
+    async for chunk in stream.iter_any():
+        buffer += chunk
+        start = 0
+        while (end := buffer.find(b"\n", start)) != -1:
+            line = bytes(buffer[start:end])
+            start = end + 1
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping malformed Ollama stream line", length=len(line))
+        del buffer[:start]
+        if len(buffer) > max_line_bytes:
+            raise ValueError(f"Ollama stream line exceeds {max_line_bytes} bytes")
+    if buffer.strip():
+        yield json.loads(bytes(buffer))
+
+
+def _response_metadata(body: dict[str, Any]) -> dict[str, Any]:
+    """Timing and token counts from a final Ollama response (durations in ms)."""
+    return {
+        "total_duration_ms": body.get("total_duration", 0) / 1e6,
+        "load_duration_ms": body.get("load_duration", 0) / 1e6,
+        "prompt_eval_duration_ms": body.get("prompt_eval_duration", 0) / 1e6,
+        "eval_duration_ms": body.get("eval_duration", 0) / 1e6,
+        "prompt_eval_count": body.get("prompt_eval_count", 0),
+        "eval_count": body.get("eval_count", 0),
+    }
+
+
+def _message_content(body: dict[str, Any]) -> str:
+    return (body.get("message") or {}).get("content", "")
+
+
+def _stream_error(model: str, message: str) -> dict[str, Any]:
+    """Final stream event for a failed request."""
+    return {"model": f"ollama/{model}", "delta": "", "done": True, "error": message}
+
+
 class OllamaProvider:
     """Provider class for Ollama local LLM integration."""
 
-    def __init__(self, base_url: str = OLLAMA_BASE_URL):
+    def __init__(
+        self, base_url: str = OLLAMA_BASE_URL, session: aiohttp.ClientSession | None = None
+    ):
         """Initialize Ollama provider.
 
         Args:
             base_url: Base URL for Ollama API (default: http://localhost:11434)
+            session: Session to use instead of the shared one
 
         """
         self.base_url = base_url.rstrip("/")
-        self.session = None
+        self.session = session
         logger.info("Initialized Ollama provider", base_url=self.base_url)
 
     async def __aenter__(self):
         """Async context manager entry."""
-        self.session = aiohttp.ClientSession()
+        await self._get_session()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit."""
-        if self.session:
-            await self.session.close()
+        """Async context manager exit.
+
+        The session is shared, so it stays open for other requests.
+        """
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = await get_shared_session()
+        return self.session
 
     async def check_health(self) -> dict[str, Any]:
         """Check if Ollama is running and accessible.
 
+        Served from the model catalog cache, so this normally makes no request.
+
         Returns:
             Dict with health status and available models
 
         """
-        try:
-            async with (
-                aiohttp.ClientSession() as session,
-                session.get(f"{self.base_url}/api/tags") as response,
-            ):
-                # Check if Ollama is running
-                if response.status == 200:
-                    data = await response.json()
-                    models = [model["name"] for model in data.get("models", [])]
-
-                    logger.info(
-                        "Ollama health check passed",
-                        available_models=len(models),
-                        models=models[:5],  # Log first 5 models
-                    )
-
-                    return {
-                        "status": "healthy",
-                        "available": True,
-                        "models": models,
-                        "base_url": self.base_url,
-                    }
-                else:
-                    return {
-                        "status": "unhealthy",
-                        "available": False,
-                        "error": f"HTTP {response.status}",
-                    }
-        except aiohttp.ClientConnectorError:
-            logger.warning("Ollama not reachable", base_url=self.base_url)
-            return {
-                "status": "offline",
-                "available": False,
-                "error": "Cannot connect to Ollama. Is it running?",
-                "help": "Start Ollama with: ollama serve",
-            }
-        except Exception as e:
-            logger.error("Ollama health check failed", error=str(e))
-            return {
-                "status": "error",
-                "available": False,
-                "error": str(e),
-            }
+        entry = await ollama_catalog.get(self.base_url)
+        return {**entry.health, "models": list(entry.health.get("models", []))}
 
     async def list_models(self) -> list[dict[str, Any]]:
         """List all available models in Ollama.
@@ -160,40 +665,30 @@ class OllamaProvider:
             List of model information dictionaries
 
         """
-        try:
-            async with (
-                aiohttp.ClientSession() as session,
-                session.get(f"{self.base_url}/api/tags") as response,
-            ):
-                if response.status == 200:
-                    data = await response.json()
-                    models = data.get("models", [])
-
-                    # Enhance with our metadata if available
-                    enhanced_models = []
-                    for model in models:
-                        model_name = model["name"]
-                        base_name = model_name.split(":")[0]
-
-                        enhanced = {
-                            "name": model_name,
-                            "size": model.get("size", 0),
-                            "modified": model.get("modified_at", ""),
-                        }
+        entry = await ollama_catalog.get(self.base_url)
+        if not entry.health.get("available"):
+            logger.error("Failed to list Ollama models", error=entry.health.get("error"))
+            return []
 
-                        # Add our metadata if available
-                        if base_name in OLLAMA_MODELS:
-                            enhanced.update(OLLAMA_MODELS[base_name])
+        # Enhance with our metadata if available
+        enhanced_models = []
+        for model in entry.models:
+            model_name = model["name"]
+            base_name = model_name.split(":")[0]
 
-                        enhanced_models.append(enhanced)
+            enhanced = {
+                "name": model_name,
+                "size": model.get("size", 0),
+                "modified": model.get("modified_at", ""),
+            }
 
-                    return enhanced_models
-                else:
-                    logger.error(f"Failed to list models: HTTP {response.status}")
-                    return []
-        except Exception as e:
-            logger.error("Failed to list Ollama models", error=str(e))
-            return []
+            # Add our metadata if available
+            if base_name in OLLAMA_MODELS:
+                enhanced.update(OLLAMA_MODELS[base_name])
+
+            enhanced_models.append(enhanced)
+
+        return enhanced_models
 
     async def pull_model(self, model_name: str) -> AsyncGenerator[dict[str, Any], None]:
         """Pull/download a model from Ollama registry.
@@ -206,25 +701,189 @@ class OllamaProvider:
 
         """
         try:
-            async with aiohttp.ClientSession() as session:
-                data = {"name": model_name}
+            session = await self._get_session()
+            data = {"name": model_name}
 
-                async with session.post(
-                    f"{self.base_url}/api/pull",
-                    json=data,
-                    timeout=aiohttp.ClientTimeout(total=None),  # No timeout for downloads
-                ) as response:
-                    async for line in response.content:
-                        if line:
-                            try:
-                                progress = json.loads(line)
-                                yield progress
-                            except json.JSONDecodeError:
-                                continue
+            async with session.post(
+                f"{self.base_url}/api/pull",
+                json=data,
+                timeout=aiohttp.ClientTimeout(total=None),  # No timeout for downloads
+            ) as response:
+                async for progress in iter_ndjson(response.content):
+                    yield progress
         except Exception as e:
             logger.error(f"Failed to pull model {model_name}", error=str(e))
             yield {"error": str(e)}
 
+    def _payload(
+        self,
+        model: str,
+        temperature: float,
+        max_tokens: int | None,
+        stream: bool,
+        keep_alive: str | int | None,
+        **kwargs,
+    ) -> dict[str, Any]:
+        """Build a request body. Sampling settings go under ``options``."""
+        options = {"temperature": temperature, **kwargs.pop("options", {})}
+        if max_tokens:
+            options["num_predict"] = max_tokens
+
+        data = {"model": model, "stream": stream, "options": options, **kwargs}
+        keep_alive = OLLAMA_KEEP_ALIVE if keep_alive is None else keep_alive
+        if keep_alive is not None:
+            data["keep_alive"] = keep_alive
+        return data
+
+    def _failure(self, model: str, error: Exception, duration: float) -> dict[str, Any]:
+        """Log a failed request and return the error result. Call from an except block."""
+        if isinstance(error, QueueFullError | QueueTimeoutError):
+            logger.warning("Ollama request not queued", model=model, error=str(error))
+            message = f"Ollama is busy: {error}"
+        elif isinstance(error, TimeoutError):
+            logger.error(
+                "Ollama request timed out",
+                model=model,
+                timeout=OLLAMA_TIMEOUT,
+                duration=duration,
+            )
+            message = f"Request timed out after {OLLAMA_TIMEOUT}s"
+        elif isinstance(error, aiohttp.ClientConnectionError):
+            # Includes pooled connections that died since they were last used
+            logger.error("Cannot connect to Ollama", error=str(error))
+            ollama_catalog.invalidate(self.base_url)
+            message = "Cannot connect to Ollama. Is it running? Start with: ollama serve"
+        else:
+            logger.error("Ollama generation failed", error=str(error), exc_info=True)
+            message = f"Ollama error: {error!s}"
+        return {"model": f"ollama/{model}", "response": "", "error": message}
+
+    async def _complete(
+        self, endpoint: str, data: dict[str, Any], extract: Callable[[dict[str, Any]], str]
+    ) -> dict[str, Any]:
+        """Make a request and return the standard result dict.
+
+        The answer is streamed from Ollama and joined even here, so it goes
+        through the same ResponseLimiter as ``_stream``: reading stops at
+        MAX_RESPONSE_SIZE and the connection is closed, rather than the
+        whole body being loaded and cut down afterwards.
+        """
+        return await self._collect(self._stream(endpoint, {**data, "stream": True}, extract))
+
+    async def _stream(
+        self, endpoint: str, data: dict[str, Any], extract: Callable[[dict[str, Any]], str]
+    ) -> AsyncGenerator[dict[str, Any], None]:
+        """Make a streaming request and yield text deltas as Ollama produces them.
+
+        Stops reading once the deltas reach MAX_RESPONSE_SIZE bytes; the
+        final event then ends with a truncation notice and its metadata has
+        ``truncated=True``.
+
+        Yields:
+            ``{"model", "delta", "done", "error"}`` dicts. The final one has
+            ``done=True`` and ``metadata``; a failure ends the stream with an
+            event whose ``error`` is set.
+
+        """
+        model = data["model"]
+        start = time.perf_counter()
+        first_token_ms = None
+        limiter = ResponseLimiter()
+        try:
+            session = await self._get_session()
+            # No total timeout: a long answer may stream for minutes. Limit the gap instead.
+            async with (
+                ollama_queue.slot(model),
+                session.post(
+                    f"{self.base_url}{endpoint}",
+                    json=data,
+                    timeout=aiohttp.ClientTimeout(total=None, sock_read=OLLAMA_TIMEOUT),
+                ) as response,
+            ):
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.error("Ollama API error", status=response.status, error=error_text)
+                    message = f"Ollama API error: {response.status} - {error_text}"
+                    yield _stream_error(model, message)
+                    return
+
+                async for chunk in iter_ndjson(response.content):
+                    if chunk.get("error"):
+                        logger.error("Ollama stream error", model=model, error=chunk["error"])
+                        yield _stream_error(model, f"Ollama error: {chunk['error']}")
+                        return
+                    delta = limiter.feed(extract(chunk))
+                    if delta and first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - start) * 1000
+                    if limiter.truncated:
+                        # Leaving the block closes the connection, which stops generation
+                        logger.warning(
+                            "Ollama stream truncated due to size",
+                            model=model,
+                            max_bytes=limiter.max_bytes,
+                        )
+                        yield {
+                            "model": f"ollama/{model}",
+                            "delta": delta,
+                            "done": True,
+                            "error": None,
+                            "metadata": {
+                                "time_to_first_token_ms": first_token_ms,
+                                "truncated": True,
+                            },
+                        }
+                        return
+                    event = {
+                        "model": f"ollama/{model}",
+                        "delta": delta,
+                        "done": bool(chunk.get("done")),
+                        "error": None,
+                    }
+                    if event["done"]:
+                        model_warmer.record_use(model, chunk.get("load_duration", 0) / 1e6)
+                        event["metadata"] = {
+                            **_response_metadata(chunk),
+                            "time_to_first_token_ms": first_token_ms,
+                        }
+                        logger.info(
+                            "Ollama stream completed",
+                            model=model,
+                            duration=time.perf_counter() - start,
+                            time_to_first_token_ms=first_token_ms,
+                            eval_count=chunk.get("eval_count", 0),
+                        )
+                    yield event
+                    if event["done"]:
+                        return
+
+            logger.error("Ollama stream ended before completion", model=model)
+            yield _stream_error(model, "Ollama stream ended before completion")
+        except Exception as e:
+            failure = self._failure(model, e, time.perf_counter() - start)
+            yield _stream_error(model, failure["error"])
+
+    @staticmethod
+    async def _collect(events: AsyncGenerator[dict[str, Any], None]) -> dict[str, Any]:
+        """Join a stream of deltas into the standard result dict.
+
+        The stream is closed on return, which frees its queue slot and
+        connection right away rather than whenever the generator is collected.
+        """
+        parts = []
+        async with contextlib.aclosing(events):
+            async for event in events:
+                if event["error"]:
+                    return {"model": event["model"], "response": "", "error": event["error"]}
+                parts.append(event["delta"])
+                if event["done"]:
+                    return {
+                        "model": event["model"],
+                        "response": "".join(parts),
+                        "error": None,
+                        "metadata": event.get("metadata"),
+                    }
+        raise AssertionError("Stream ended without a final event")  # _stream always sends one
+
     async def generate(
         self,
         prompt: str,
@@ -232,6 +891,7 @@ class OllamaProvider:
         temperature: float = 0.7,
         max_tokens: int | None = None,
         stream: bool = False,
+        keep_alive: str | int | None = None,
         **kwargs,
     ) -> dict[str, Any]:
         """Generate a response using Ollama.
@@ -241,165 +901,348 @@ class OllamaProvider:
             model: Model name (default: llama2)
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
-            stream: Whether to stream the response
+            stream: Accepted for compatibility; the answer is always streamed from
+                Ollama and joined (see ``stream_generate`` for the deltas)
+            keep_alive: How long Ollama keeps the model loaded, e.g. "10m" or -1
             **kwargs: Additional parameters for Ollama
 
         Returns:
             Dict with model response or error
 
         """
-        start_time = datetime.now(UTC)
+        logger.info(
+            "Calling Ollama",
+            model=model,
+            prompt_length=len(prompt),
+            temperature=temperature,
+        )
+        data = self._payload(model, temperature, max_tokens, True, keep_alive, **kwargs)
+        data["prompt"] = prompt
+        return await self._complete("/api/generate", data, lambda c: c.get("response", ""))
 
-        try:
-            if not self.session:
-                self.session = aiohttp.ClientSession()
-
-            # Prepare request data
-            data = {
-                "model": model,
-                "prompt": prompt,
-                "temperature": temperature,
-                "stream": stream,
-            }
+    async def stream_generate(
+        self,
+        prompt: str,
+        model: str = "llama2",
+        temperature: float = 0.7,
+        max_tokens: int | None = None,
+        keep_alive: str | int | None = None,
+        **kwargs,
+    ) -> AsyncGenerator[dict[str, Any], None]:
+        """Stream a completion, yielding text as soon as the model produces it.
 
-            # Add optional parameters
-            if max_tokens:
-                data["num_predict"] = max_tokens
+        Args:
+            prompt: The input prompt
+            model: Model name (default: llama2)
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            keep_alive: How long Ollama keeps the model loaded, e.g. "10m" or -1
+            **kwargs: Additional parameters for Ollama
 
-            # Add any additional kwargs
-            data.update(kwargs)
+        Yields:
+            Delta events as described in ``_stream``
 
-            logger.info(
-                "Calling Ollama",
-                model=model,
-                prompt_length=len(prompt),
-                temperature=temperature,
-            )
+        """
+        logger.info("Streaming from Ollama", model=model, prompt_length=len(prompt))
+        data = self._payload(model, temperature, max_tokens, True, keep_alive, **kwargs)
+        data["prompt"] = prompt
+        events = self._stream("/api/generate", data, lambda c: c.get("response", ""))
+        async with contextlib.aclosing(events):
+            async for event in events:
+                yield event
 
-            # Make the request
-            async with self.session.post(
-                f"{self.base_url}/api/generate",
-                json=data,
-                timeout=aiohttp.ClientTimeout(total=OLLAMA_TIMEOUT),
-            ) as response:
-                if response.status == 200:
-                    result = await response.json()
+    async def chat(
+        self,
+        messages: list[dict[str, str]],
+        model: str = "llama2",
+        temperature: float = 0.7,
+        max_tokens: int | None = None,
+        stream: bool = False,
+        keep_alive: str | int | None = None,
+        **kwargs,
+    ) -> dict[str, Any]:
+        """Chat completion using Ollama's /api/chat.
 
-                    duration = (datetime.now(UTC) - start_time).total_seconds()
+        Sending the conversation as messages lets Ollama apply the model's
+        chat template and reuse its cached context for the shared prefix,
+        as long as the model stays loaded (see ``keep_alive``).
 
-                    logger.info(
-                        "Ollama response received",
-                        model=model,
-                        response_length=len(result.get("response", "")),
-                        duration=duration,
-                        total_duration_ms=result.get("total_duration", 0) / 1e6,
-                        prompt_eval_count=result.get("prompt_eval_count", 0),
-                        eval_count=result.get("eval_count", 0),
-                    )
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            model: Model name
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            stream: Accepted for compatibility; the answer is always streamed from
+                Ollama and joined (see ``stream_chat`` for the deltas)
+            keep_alive: How long Ollama keeps the model loaded, e.g. "10m" or -1
+            **kwargs: Additional parameters
 
-                    return {
-                        "model": f"ollama/{model}",
-                        "response": result.get("response", ""),
-                        "error": None,
-                        "metadata": {
-                            "total_duration_ms": result.get("total_duration", 0) / 1e6,
-                            "load_duration_ms": result.get("load_duration", 0) / 1e6,
-                            "prompt_eval_duration_ms": result.get("prompt_eval_duration", 0) / 1e6,
-                            "eval_duration_ms": result.get("eval_duration", 0) / 1e6,
-                            "prompt_eval_count": result.get("prompt_eval_count", 0),
-                            "eval_count": result.get("eval_count", 0),
-                        },
-                    }
-                else:
-                    error_text = await response.text()
-                    logger.error(
-                        "Ollama API error",
-                        status=response.status,
-                        error=error_text,
-                    )
-                    return {
-                        "model": f"ollama/{model}",
-                        "response": "",
-                        "error": f"Ollama API error: {response.status} - {error_text}",
-                    }
+        Returns:
+            Dict with model response or error
 
-        except TimeoutError:
-            duration = (datetime.now(datetime.timezone.utc) - start_time).total_seconds()
-            logger.error(
-                "Ollama request timed out",
-                model=model,
-                timeout=OLLAMA_TIMEOUT,
-                duration=duration,
-            )
-            return {
-                "model": f"ollama/{model}",
-                "response": "",
-                "error": f"Request timed out after {OLLAMA_TIMEOUT}s",
-            }
-        except aiohttp.ClientConnectorError as e:
-            logger.error("Cannot connect to Ollama", error=str(e))
-            return {
-                "model": f"ollama/{model}",
-                "response": "",
-                "error": "Cannot connect to Ollama. Is it running? Start with: ollama serve",
-            }
-        except Exception as e:
-            logger.error("Ollama generation failed", error=str(e), exc_info=True)
-            return {
-                "model": f"ollama/{model}",
-                "response": "",
-                "error": f"Ollama error: {e!s}",
-            }
+        """
+        logger.info("Calling Ollama chat", model=model, message_count=len(messages))
+        data = self._payload(model, temperature, max_tokens, True, keep_alive, **kwargs)
+        data["messages"] = messages
+        return await self._complete("/api/chat", data, _message_content)
 
-    async def chat(
+    async def stream_chat(
         self,
         messages: list[dict[str, str]],
         model: str = "llama2",
         temperature: float = 0.7,
         max_tokens: int | None = None,
-        stream: bool = False,
+        keep_alive: str | int | None = None,
         **kwargs,
-    ) -> dict[str, Any]:
-        """Chat completion using Ollama (for models that support chat format).
+    ) -> AsyncGenerator[dict[str, Any], None]:
+        """Stream a chat completion, yielding text as soon as the model produces it.
 
         Args:
             messages: List of message dicts with 'role' and 'content'
             model: Model name
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
-            stream: Whether to stream the response
+            keep_alive: How long Ollama keeps the model loaded, e.g. "10m" or -1
             **kwargs: Additional parameters
 
+        Yields:
+            Delta events as described in ``_stream``
+
+        """
+        logger.info("Streaming Ollama chat", model=model, message_count=len(messages))
+        data = self._payload(model, temperature, max_tokens, True, keep_alive, **kwargs)
+        data["messages"] = messages
+        events = self._stream("/api/chat", data, _message_content)
+        async with contextlib.aclosing(events):
+            async for event in events:
+                yield event
+
+
+class _ModelUsage:
+    __slots__ = ("cold_loads", "last_load_ms", "last_used", "max_load_ms", "uses")
+
+    def __init__(self):
+        self.uses = 0
+        self.last_used: float | None = None
+        self.cold_loads = 0
+        self.last_load_ms = 0.0
+        self.max_load_ms = 0.0
+
+
+class ModelWarmer:
+    """Keeps frequently used Ollama models loaded.
+
+    Configured models are loaded at startup. They, and any model used
+    within the hot window, are pinged every interval with ``keep_alive``
+    so Ollama doesn't unload them between requests. With a memory budget,
+    other loaded models are unloaded least recently used first until the
+    total size reported by /api/ps fits.
+    """
+
+    def __init__(
+        self,
+        models: list[str] | None = None,
+        base_url: str = OLLAMA_BASE_URL,
+        interval: float = OLLAMA_WARM_INTERVAL_SECONDS,
+        keep_alive: str | int = OLLAMA_WARM_KEEP_ALIVE,
+        hot_window: float = OLLAMA_HOT_WINDOW_SECONDS,
+        budget_mb: float = OLLAMA_MEMORY_BUDGET_MB,
+    ):
+        """Initialize the warmer.
+
+        Args:
+            models: Models to keep loaded at all times (default: OLLAMA_WARM_MODELS)
+            base_url: Ollama server
+            interval: Seconds between keep-alive rounds; keep below ``keep_alive``
+            keep_alive: How long each ping keeps a model loaded
+            hot_window: Seconds after its last use that a model is kept warm
+            budget_mb: Memory loaded models may use before cold ones are unloaded (0 = no limit)
+
+        """
+        self.models = [_canonical(m) for m in (OLLAMA_WARM_MODELS if models is None else models)]
+        self.base_url = base_url.rstrip("/")
+        self.interval = interval
+        self.keep_alive = keep_alive
+        self.hot_window = hot_window
+        self.budget_mb = budget_mb
+        self._usage: dict[str, _ModelUsage] = {}
+        self._task: asyncio.Task | None = None
+        self.pings = 0
+        self.evictions = 0
+
+    def _record_load(self, model: str, load_ms: float) -> _ModelUsage:
+        usage = self._usage.setdefault(model, _ModelUsage())
+        usage.last_load_ms = load_ms
+        usage.max_load_ms = max(usage.max_load_ms, load_ms)
+        if load_ms >= COLD_LOAD_MS:
+            usage.cold_loads += 1
+        OLLAMA_MODEL_LOAD_DURATION.observe(load_ms / 1000, model=model)
+        return usage
+
+    def record_use(self, model: str, load_ms: float) -> None:
+        """Record a completed request and how long Ollama spent loading the model."""
+        usage = self._record_load(_canonical(model), load_ms)
+        usage.uses += 1
+        usage.last_used = time.monotonic()
+
+    def hot_models(self) -> list[str]:
+        """Configured models followed by those used within the hot window."""
+        now = time.monotonic()
+        recent = [
+            model
+            for model, usage in self._usage.items()
+            if usage.last_used is not None and now - usage.last_used <= self.hot_window
+        ]
+        return list(dict.fromkeys([*self.models, *recent]))
+
+    async def _set_keep_alive(self, model: str, keep_alive: str | int) -> dict[str, Any]:
+        """Load a model without generating, or unload it with ``keep_alive=0``.
+
+        Goes through ``ollama_queue`` like any request, so a ping never loads
+        a model while another one is being served.
+        """
+        session = await get_shared_session()
+        async with (
+            ollama_queue.slot(model),
+            session.post(
+                f"{self.base_url}/api/generate",
+                json={"model": model, "keep_alive": keep_alive},
+                timeout=aiohttp.ClientTimeout(total=OLLAMA_TIMEOUT),
+            ) as response,
+        ):
+            response.raise_for_status()
+            return await response.json()
+
+    async def preload(self, model: str) -> float:
+        """Load a model, or extend how long it stays loaded.
+
         Returns:
-            Dict with model response or error
+            Milliseconds Ollama spent loading it (near zero if already resident)
 
         """
-        # Convert messages to a single prompt
-        # This is a simple implementation - some models may support better formatting
-        prompt_parts = []
-        for msg in messages:
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-
-            if role == "system":
-                prompt_parts.append(f"System: {content}")
-            elif role == "user":
-                prompt_parts.append(f"User: {content}")
-            elif role == "assistant":
-                prompt_parts.append(f"Assistant: {content}")
-
-        prompt_parts.append("Assistant:")  # Prompt for response
-        prompt = "\n\n".join(prompt_parts)
-
-        # Use the generate method
-        return await self.generate(
-            prompt=prompt,
-            model=model,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            stream=stream,
-            **kwargs,
-        )
+        body = await self._set_keep_alive(model, self.keep_alive)
+        self.pings += 1
+        load_ms = body.get("load_duration", 0) / 1e6
+        self._record_load(_canonical(model), load_ms)
+        return load_ms
+
+    async def unload(self, model: str) -> None:
+        """Ask Ollama to unload a model now."""
+        await self._set_keep_alive(model, 0)
+        self.evictions += 1
+
+    async def loaded_models(self) -> list[dict[str, Any]]:
+        """Return the models Ollama currently has loaded (from /api/ps)."""
+        session = await get_shared_session()
+        async with session.get(
+            f"{self.base_url}/api/ps", timeout=aiohttp.ClientTimeout(total=OLLAMA_HEALTH_TIMEOUT)
+        ) as response:
+            response.raise_for_status()
+            return (await response.json()).get("models", [])
+
+    async def enforce_budget(self) -> list[str]:
+        """Unload cold models, least recently used first, until loaded models fit the budget.
+
+        Models with requests waiting or running in ``ollama_queue`` are never
+        unloaded, even before their first request has recorded a use.
+
+        Returns:
+            Names of the models unloaded
+
+        """
+        if self.budget_mb <= 0:
+            return []
+
+        loaded = await self.loaded_models()
+        total_mb = sum(m.get("size", 0) for m in loaded) / 2**20
+        hot = set(self.hot_models())
+
+        def last_used(entry: dict[str, Any]) -> float:
+            usage = self._usage.get(_canonical(entry["name"]))
+            return usage.last_used if usage and usage.last_used is not None else -math.inf
+
+        evicted = []
+        for entry in sorted(loaded, key=last_used):
+            if total_mb <= self.budget_mb:
+                break
+            if _canonical(entry["name"]) in hot or ollama_queue.busy(entry["name"]):
+                continue
+            await self.unload(entry["name"])
+            total_mb -= entry.get("size", 0) / 2**20
+            evicted.append(entry["name"])
+
+        if evicted:
+            logger.info("Unloaded cold Ollama models", models=evicted, loaded_mb=round(total_mb))
+        if total_mb > self.budget_mb:
+            logger.warning(
+                "Hot Ollama models exceed memory budget",
+                loaded_mb=round(total_mb),
+                budget_mb=self.budget_mb,
+            )
+        return evicted
+
+    async def run_once(self) -> None:
+        """Enforce the memory budget, then load or ping every hot model."""
+        entry = await ollama_catalog.get(self.base_url)
+        if not entry.health.get("available"):
+            return
+        installed = {_canonical(name) for name in entry.health.get("models", [])}
+
+        await self.enforce_budget()
+        for model in self.hot_models():
+            if model not in installed:
+                logger.debug("Skipping warm-up of model that isn't installed", model=model)
+                continue
+            load_ms = await self.preload(model)
+            if load_ms >= COLD_LOAD_MS:
+                logger.info("Loaded Ollama model", model=model, load_duration_ms=round(load_ms))
+
+    async def start(self) -> None:
+        """Preload configured models and keep hot models loaded in the background."""
+        self._task = asyncio.create_task(self._periodic_warm())
+
+    async def stop(self) -> None:
+        """Stop the background warm-up."""
+        if self._task:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _periodic_warm(self) -> None:
+        while True:
+            try:
+                await self.run_once()  # First round runs right away to preload at startup
+                await asyncio.sleep(self.interval)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.warning("Ollama warm-up failed", error=str(e))
+                await asyncio.sleep(self.interval)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return ping/eviction counts and per-model load statistics."""
+        now = time.monotonic()
+        return {
+            "hot_models": self.hot_models(),
+            "pings": self.pings,
+            "evictions": self.evictions,
+            "models": {
+                model: {
+                    "uses": usage.uses,
+                    "cold_loads": usage.cold_loads,
+                    "last_load_ms": round(usage.last_load_ms, 1),
+                    "max_load_ms": round(usage.max_load_ms, 1),
+                    "idle_seconds": (
+                        round(now - usage.last_used, 1) if usage.last_used is not None else None
+                    ),
+                }
+                for model, usage in self._usage.items()
+            },
+        }
+
+
+model_warmer = ModelWarmer()
 
 
 # Integration function for the main AI Conflict Dashboard
@@ -430,8 +1273,17 @@ async def call_ollama(
                 "error": health.get("error", "Ollama is not available"),
             }
 
+        def installed(health: dict[str, Any]) -> bool:
+            # The catalog lists "llama2:latest" for a request for "llama2"
+            return _canonical(model) in {_canonical(name) for name in health.get("models", [])}
+
+        # The model may have been pulled since the catalog was cached
+        if not installed(health):
+            await ollama_catalog.recheck(provider.base_url)
+            health = await provider.check_health()
+
         # Check if requested model is available
-        if model not in health.get("models", []):
+        if not installed(health):
             available_models = health.get("models", [])
             return {
                 "model": f"ollama/{model}",
@@ -446,4 +1298,18 @@ async def call_ollama(
 
 
 # Export the provider class and integration function
-__all__ = ["OLLAMA_MODELS", "OllamaProvider", "call_ollama"]
+__all__ = [
+    "OLLAMA_MODELS",
+    "ModelQueue",
+    "ModelWarmer",
+    "OllamaCatalog",
+    "OllamaProvider",
+    "QueueFullError",
+    "QueueTimeoutError",
+    "call_ollama",
+    "close_shared_session",
+    "get_shared_session",
+    "model_warmer",
+    "ollama_catalog",
+    "ollama_queue",
+]
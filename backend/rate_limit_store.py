@@ -0,0 +1,250 @@
+"""Shared storage backends for rate limit window counters.
+
+With several uvicorn workers each process owns its own ``RateLimiter``, so
+in-process counters multiply the effective limit by the worker count. A
+``RateLimitStore`` keeps the minute/hour/day window counters somewhere all
+workers can see and reserves requests atomically.
+
+Workers do not hit the store on every request: ``RateLimiter`` leases a
+small batch of permits per identifier and hands them out locally, returning
+unused permits when the lease expires.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+# (name, number of buckets, bucket width in seconds) - same layout as the
+# in-process SlidingWindowCounter instances in rate_limiting.py
+WINDOWS: tuple[tuple[str, int, int], ...] = (
+    ("minute", 60, 1),
+    ("hour", 60, 60),
+    ("day", 288, 300),
+)
+
+
+@dataclass
+class Reservation:
+    """Result of a reservation against the shared window counters."""
+
+    granted: int
+    retry_after: int | None
+    reserved_at: int  # Store clock second the permits were charged to
+    remaining: int = 0  # Permits left in the first window after this reservation
+
+
+class RateLimitStore(ABC):
+    """Interface for shared rate limit counters.
+
+    Implementations must make ``reserve`` atomic across every process that
+    shares the store.
+    """
+
+    @abstractmethod
+    def reserve(self, identifier: str, limits: tuple[int, ...], amount: int) -> Reservation:
+        """Reserve up to ``amount`` requests against every window.
+
+        Args:
+            identifier: Rate limit identifier
+            limits: Request limits per window, in ``WINDOWS`` order
+            amount: Number of requests wanted
+
+        Returns:
+            Reservation with the number granted (possibly 0), the seconds
+            until a slot frees up when nothing was granted, and the permits
+            still free in the first window
+
+        """
+
+    @abstractmethod
+    def refund(self, identifier: str, amount: int, reserved_at: int) -> None:
+        """Return unused permits from an earlier reservation."""
+
+    @abstractmethod
+    def count(self, identifier: str, window: str = "minute") -> int:
+        """Return the number of requests recorded in a window."""
+
+    @abstractmethod
+    def sweep_expired(self) -> int:
+        """Delete buckets that fell out of every window; return rows removed."""
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Delete all stored counters."""
+
+
+class SQLiteRateLimitStore(RateLimitStore):
+    """Rate limit store backed by a local SQLite database.
+
+    Every worker on the host opens the same file. Reservations run inside
+    ``BEGIN IMMEDIATE`` transactions, which take the database write lock
+    up front, so the read-check-increment sequence is atomic across
+    processes (the same role a Lua script plays for Redis).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        busy_timeout: float = 5.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        """Initialize the store.
+
+        Args:
+            path: SQLite database file shared by all workers
+            busy_timeout: Seconds to wait for the write lock
+            clock: Wall clock shared by all processes
+
+        """
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._conn_pid: int | None = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this process's connection, reopening it after a fork."""
+        if self._conn is None or self._conn_pid != os.getpid():
+            conn = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout,
+                isolation_level=None,  # Explicit transactions only
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                    identifier TEXT NOT NULL,
+                    window TEXT NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (identifier, window, bucket)
+                ) WITHOUT ROWID
+                """
+            )
+            self._conn = conn
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def reserve(self, identifier: str, limits: tuple[int, ...], amount: int) -> Reservation:
+        """Atomically reserve up to ``amount`` requests for an identifier."""
+        now = int(self.clock())
+
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                granted = amount
+                retry_after = None
+                first_window_free = None
+                for (window, num_buckets, bucket_seconds), limit in zip(
+                    WINDOWS, limits, strict=True
+                ):
+                    bucket = now // bucket_seconds
+                    used, oldest = conn.execute(
+                        "SELECT COALESCE(SUM(count), 0), MIN(bucket) FROM rate_limit_buckets "
+                        "WHERE identifier = ? AND window = ? AND bucket > ? AND count > 0",
+                        (identifier, window, bucket - num_buckets),
+                    ).fetchone()
+                    available = limit - used
+                    if first_window_free is None:
+                        first_window_free = max(0, available)
+                    if available <= 0:
+                        granted = 0
+                        if oldest is None:
+                            # Nothing to wait out: the limit itself is zero
+                            retry_after = 1
+                        else:
+                            expires_at = (oldest + num_buckets) * bucket_seconds
+                            retry_after = max(1, expires_at - now)
+                        break
+                    granted = min(granted, available)
+
+                if granted > 0:
+                    conn.executemany(
+                        "INSERT INTO rate_limit_buckets (identifier, window, bucket, count) "
+                        "VALUES (?, ?, ?, ?) ON CONFLICT (identifier, window, bucket) "
+                        "DO UPDATE SET count = count + excluded.count",
+                        [
+                            (identifier, window, now // bucket_seconds, granted)
+                            for window, _, bucket_seconds in WINDOWS
+                        ],
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        return Reservation(
+            granted=granted,
+            retry_after=retry_after,
+            reserved_at=now,
+            remaining=first_window_free - granted,
+        )
+
+    def refund(self, identifier: str, amount: int, reserved_at: int) -> None:
+        """Return unused permits to the buckets they were charged to."""
+        if amount <= 0:
+            return
+
+        with self._lock:
+            conn = self._connection()
+            conn.executemany(
+                "UPDATE rate_limit_buckets SET count = MAX(count - ?, 0) "
+                "WHERE identifier = ? AND window = ? AND bucket = ?",
+                [
+                    (amount, identifier, window, reserved_at // bucket_seconds)
+                    for window, _, bucket_seconds in WINDOWS
+                ],
+            )
+
+    def count(self, identifier: str, window: str = "minute") -> int:
+        """Return the number of requests recorded in a window."""
+        num_buckets, bucket_seconds = next((n, s) for name, n, s in WINDOWS if name == window)
+        bucket = int(self.clock()) // bucket_seconds
+
+        with self._lock:
+            (used,) = (
+                self._connection()
+                .execute(
+                    "SELECT COALESCE(SUM(count), 0) FROM rate_limit_buckets "
+                    "WHERE identifier = ? AND window = ? AND bucket > ?",
+                    (identifier, window, bucket - num_buckets),
+                )
+                .fetchone()
+            )
+        return used
+
+    def sweep_expired(self) -> int:
+        """Delete buckets older than their window."""
+        now = int(self.clock())
+        removed = 0
+
+        with self._lock:
+            conn = self._connection()
+            for window, num_buckets, bucket_seconds in WINDOWS:
+                cursor = conn.execute(
+                    "DELETE FROM rate_limit_buckets WHERE window = ? AND bucket <= ?",
+                    (window, now // bucket_seconds - num_buckets),
+                )
+                removed += cursor.rowcount
+
+        if removed:
+            logger.debug("Rate limit store swept expired buckets", removed=removed)
+        return removed
+
+    def reset(self) -> None:
+        """Delete all stored counters."""
+        with self._lock:
+            self._connection().execute("DELETE FROM rate_limit_buckets")
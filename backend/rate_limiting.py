@@ -4,21 +4,156 @@ Provides configurable rate limiting to prevent abuse and protect
 against DoS attacks.
 """
 
+import asyncio
+import contextlib
 import hashlib
-from collections import defaultdict
-from collections.abc import Callable
+import math
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
 from datetime import UTC, datetime, timedelta
+from typing import Any
 
 from fastapi import HTTPException, Request
 from starlette.status import HTTP_429_TOO_MANY_REQUESTS
 
+from metrics import RATE_LIMIT_REJECTIONS
+from rate_limit_store import RateLimitStore
 from structured_logging import get_logger
 
 logger = get_logger(__name__)
 
 
+class SlidingWindowCounter:
+    """Fixed-bucket ring buffer counting events over a sliding window.
+
+    The window is split into ``num_buckets`` buckets of ``bucket_seconds``
+    each, keyed by integer monotonic time. Recording and counting are
+    amortised O(1) and memory is constant per counter regardless of traffic.
+    Granularity is one bucket: an event leaves the window at the end of the
+    bucket it fell in, up to ``bucket_seconds`` earlier than an exact
+    per-timestamp window would drop it.
+    """
+
+    __slots__ = ("bucket_seconds", "counts", "head", "num_buckets", "total")
+
+    def __init__(self, num_buckets: int, bucket_seconds: int):
+        """Initialize an empty counter.
+
+        Args:
+            num_buckets: Number of buckets in the ring
+            bucket_seconds: Width of each bucket in seconds
+
+        """
+        self.num_buckets = num_buckets
+        self.bucket_seconds = bucket_seconds
+        self.counts = array("I", [0]) * num_buckets
+        self.head = 0  # Absolute index of the newest bucket seen
+        self.total = 0
+
+    def _advance(self, now: int) -> int:
+        """Expire buckets that fell out of the window and return the current bucket."""
+        bucket = now // self.bucket_seconds
+        steps = bucket - self.head
+        if steps > 0:
+            if steps >= self.num_buckets:
+                self.counts = array("I", [0]) * self.num_buckets
+                self.total = 0
+            else:
+                for offset in range(1, steps + 1):
+                    slot = (self.head + offset) % self.num_buckets
+                    self.total -= self.counts[slot]
+                    self.counts[slot] = 0
+            self.head = bucket
+        return bucket
+
+    def count(self, now: int) -> int:
+        """Return the number of events inside the window ending at ``now``."""
+        self._advance(now)
+        return self.total
+
+    def add(self, now: int, amount: int = 1) -> None:
+        """Record ``amount`` events at ``now``."""
+        bucket = self._advance(now)
+        self.counts[bucket % self.num_buckets] += amount
+        self.total += amount
+
+    def retry_after(self, now: int) -> int:
+        """Seconds until the oldest recorded event leaves the window."""
+        bucket = self._advance(now)
+        for age in range(self.num_buckets - 1, -1, -1):
+            oldest = bucket - age
+            if self.counts[oldest % self.num_buckets]:
+                expires_at = (oldest + self.num_buckets) * self.bucket_seconds
+                return max(1, expires_at - now)
+        return 1
+
+
+class _IdentifierState:
+    """Per-identifier limiter state: window counters, token bucket and store lease."""
+
+    __slots__ = (
+        "day",
+        "hour",
+        "last_update",
+        "lease_expires",
+        "lease_remaining",
+        "lease_reserved_at",
+        "minute",
+        "shared_remaining",
+        "tokens",
+    )
+
+    def __init__(self, burst_size: int, now: float, local_windows: bool = True):
+        if local_windows:
+            self.minute = SlidingWindowCounter(60, 1)
+            self.hour = SlidingWindowCounter(60, 60)
+            # Five-minute buckets: hourly ones let a request expire up to an hour early
+            self.day = SlidingWindowCounter(288, 300)
+        else:
+            # Windows are counted by the shared store
+            self.minute = self.hour = self.day = None
+        self.tokens = float(burst_size)
+        self.last_update = now
+        # Permits reserved from a shared store but not yet handed out
+        self.lease_remaining = 0
+        self.lease_expires = 0.0
+        self.lease_reserved_at = 0
+        # Minute-window permits the store had left after the last reservation
+        self.shared_remaining = 0
+
+
+class _Shard:
+    """A slice of the identifier (or key) space with its own lock and LRU map."""
+
+    __slots__ = ("expired_evictions", "lock", "lru_evictions", "states")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.states: OrderedDict[str, _IdentifierState] = OrderedDict()
+        self.lru_evictions = 0
+        self.expired_evictions = 0
+
+
 class RateLimiter:
-    """Token bucket rate limiter with sliding window."""
+    """Token bucket rate limiter with sliding window counters.
+
+    By default window counters live in this process. When a shared
+    ``RateLimitStore`` is given, the minute/hour/day limits are enforced
+    against the store so they hold across workers; permits are leased from
+    it ``lease_size`` at a time so most checks stay in-process. The burst
+    token bucket is always per process.
+
+    Concurrency: identifiers are hashed onto ``num_shards`` shards, each
+    guarded by its own ``threading.Lock``. ``check_rate_limit`` holds the
+    identifier's shard lock for the whole read-check-record sequence, so
+    checks for one identifier are linearizable whether they come from the
+    event loop, ``asyncio.to_thread`` workers or other threads, and a limit
+    of N admits exactly N requests. Checks for identifiers on different
+    shards never contend. No lock is held across an ``await``.
+    """
 
     def __init__(
         self,
@@ -26,6 +161,12 @@ class RateLimiter:
         requests_per_hour: int = 300,
         requests_per_day: int = 3000,
         burst_size: int = 50,
+        max_identifiers: int = 50_000,
+        store: RateLimitStore | None = None,
+        lease_size: int = 5,
+        lease_ttl: float = 1.0,
+        num_shards: int = 16,
+        clock: Callable[[], float] = time.monotonic,
     ):
         """Initialize rate limiter with configurable limits.
 
@@ -34,57 +175,97 @@ class RateLimiter:
             requests_per_hour: Max requests per hour
             requests_per_day: Max requests per day
             burst_size: Max burst requests allowed
+            max_identifiers: Max identifiers tracked before least recently
+                used ones are evicted (split evenly across shards)
+            store: Shared store for window counters (None keeps them in-process)
+            lease_size: Permits reserved from the store per round trip
+            lease_ttl: Seconds before unused leased permits are returned
+            num_shards: Number of independently locked identifier shards
+            clock: Monotonic time source in seconds (overridable for tests)
 
         """
         self.requests_per_minute = requests_per_minute
         self.requests_per_hour = requests_per_hour
         self.requests_per_day = requests_per_day
         self.burst_size = burst_size
+        self.max_identifiers = max_identifiers
+        self.store = store
+        self.lease_size = lease_size
+        self.lease_ttl = lease_ttl
+        self.clock = clock
 
-        # Storage for request counts per identifier
-        self.minute_counts: dict[str, list] = defaultdict(list)
-        self.hour_counts: dict[str, list] = defaultdict(list)
-        self.day_counts: dict[str, list] = defaultdict(list)
-
-        # Token buckets for burst handling
-        self.token_buckets: dict[str, dict] = {}
-
-    def _clean_old_entries(self, identifier: str, now: datetime) -> None:
-        """Remove expired entries from tracking."""
-        # Clean minute window
-        minute_cutoff = now - timedelta(minutes=1)
-        self.minute_counts[identifier] = [
-            ts for ts in self.minute_counts[identifier] if ts > minute_cutoff
-        ]
-
-        # Clean hour window
-        hour_cutoff = now - timedelta(hours=1)
-        self.hour_counts[identifier] = [
-            ts for ts in self.hour_counts[identifier] if ts > hour_cutoff
-        ]
-
-        # Clean day window
-        day_cutoff = now - timedelta(days=1)
-        self.day_counts[identifier] = [ts for ts in self.day_counts[identifier] if ts > day_cutoff]
-
-    def _update_token_bucket(self, identifier: str, now: datetime) -> int:
-        """Update and return available tokens."""
-        if identifier not in self.token_buckets:
-            self.token_buckets[identifier] = {
-                "tokens": self.burst_size,
-                "last_update": now,
-            }
-            return self.burst_size
+        # Window counters and token bucket per identifier, sharded by hash
+        self.shards = [_Shard() for _ in range(num_shards)]
+        self._shard_capacity = max(1, max_identifiers // num_shards)
+
+    def _shard_for(self, identifier: str) -> _Shard:
+        """Return the shard owning an identifier."""
+        return self.shards[hash(identifier) % len(self.shards)]
 
-        bucket = self.token_buckets[identifier]
-        time_passed = (now - bucket["last_update"]).total_seconds()
+    def _get_state(self, shard: _Shard, identifier: str, now: float) -> _IdentifierState:
+        """Return the state for an identifier, creating it on first use.
+
+        Must be called with the shard lock held.
+        """
+        states = shard.states
+        state = states.get(identifier)
+        if state is None:
+            state = _IdentifierState(self.burst_size, now, local_windows=self.store is None)
+            states[identifier] = state
+            while len(states) > self._shard_capacity:
+                evicted_id, evicted = states.popitem(last=False)
+                self._release_lease(evicted_id, evicted)
+                shard.lru_evictions += 1
+        else:
+            states.move_to_end(identifier)
+        return state
+
+    def _update_token_bucket(self, state: _IdentifierState, now: float) -> int:
+        """Update and return available tokens."""
+        time_passed = now - state.last_update
 
         # Replenish tokens based on time passed
         tokens_to_add = time_passed * (self.requests_per_minute / 60.0)
-        bucket["tokens"] = min(self.burst_size, bucket["tokens"] + tokens_to_add)
-        bucket["last_update"] = now
+        state.tokens = min(self.burst_size, state.tokens + tokens_to_add)
+        state.last_update = now
+
+        return int(state.tokens)
+
+    def _release_lease(self, identifier: str, state: _IdentifierState) -> None:
+        """Return a lease's unused permits to the shared store."""
+        if self.store is not None and state.lease_remaining > 0:
+            self.store.refund(identifier, state.lease_remaining, state.lease_reserved_at)
+            state.lease_remaining = 0
+
+    def _check_shared(
+        self, identifier: str, state: _IdentifierState, now: float
+    ) -> tuple[bool, int | None]:
+        """Take one permit from the local lease, renewing it from the store."""
+        if state.lease_remaining > 0 and now < state.lease_expires:
+            state.lease_remaining -= 1
+            return True, None
+
+        self._release_lease(identifier, state)
+        reservation = self.store.reserve(
+            identifier,
+            (self.requests_per_minute, self.requests_per_hour, self.requests_per_day),
+            self.lease_size,
+        )
+        if reservation.granted == 0:
+            state.shared_remaining = reservation.remaining
+            RATE_LIMIT_REJECTIONS.inc(limiter="requests", window="shared")
+            logger.warning(
+                "Rate limit exceeded (shared store)",
+                identifier=identifier,
+                retry_after=reservation.retry_after,
+            )
+            return False, reservation.retry_after
 
-        return int(bucket["tokens"])
+        state.lease_remaining = reservation.granted - 1
+        state.lease_expires = now + self.lease_ttl
+        state.lease_reserved_at = reservation.reserved_at
+        state.shared_remaining = reservation.remaining
+        return True, None
 
     def check_rate_limit(self, identifier: str) -> tuple[bool, int | None]:
         """Check if request is within rate limits.
@@ -96,60 +277,378 @@ class RateLimiter:
             Tuple of (allowed, retry_after_seconds)
 
         """
-        now = datetime.now(UTC)
-        self._clean_old_entries(identifier, now)
+        shard = self._shard_for(identifier)
+        with shard.lock:
+            return self._check_locked(shard, identifier)
+
+    async def check_rate_limit_async(self, identifier: str) -> tuple[bool, int | None]:
+        """Check rate limits from async code without blocking the event loop.
+
+        With a shared store a check may query SQLite, so it runs in a worker
+        thread; in-process checks are cheap enough to run inline.
+
+        Args:
+            identifier: Unique identifier (IP, API key, etc.)
+
+        Returns:
+            Tuple of (allowed, retry_after_seconds)
+
+        """
+        if self.store is None:
+            return self.check_rate_limit(identifier)
+        return await asyncio.to_thread(self.check_rate_limit, identifier)
+
+    def _check_locked(self, shard: _Shard, identifier: str) -> tuple[bool, int | None]:
+        """Body of check_rate_limit; the caller holds the shard lock."""
+        now = self.clock()
+        now_s = int(now)
+        state = self._get_state(shard, identifier, now)
 
         # Check burst limit using token bucket
-        available_tokens = self._update_token_bucket(identifier, now)
+        available_tokens = self._update_token_bucket(state, now)
         if available_tokens < 1:
+            RATE_LIMIT_REJECTIONS.inc(limiter="requests", window="burst")
             return False, 60  # Retry after 1 minute
 
+        if self.store is not None:
+            allowed, retry_after = self._check_shared(identifier, state, now)
+            if allowed:
+                state.tokens -= 1
+            return allowed, retry_after
+
         # Check rate windows
-        minute_count = len(self.minute_counts[identifier])
-        hour_count = len(self.hour_counts[identifier])
-        day_count = len(self.day_counts[identifier])
+        windows = (
+            ("minute", state.minute, self.requests_per_minute),
+            ("hour", state.hour, self.requests_per_hour),
+            ("day", state.day, self.requests_per_day),
+        )
+        for window_name, counter, limit in windows:
+            count = counter.count(now_s)
+            if count >= limit:
+                RATE_LIMIT_REJECTIONS.inc(limiter="requests", window=window_name)
+                logger.warning(
+                    f"Rate limit exceeded ({window_name})",
+                    identifier=identifier,
+                    count=count,
+                    limit=limit,
+                )
+                return False, counter.retry_after(now_s)
 
-        # Check limits
-        if minute_count >= self.requests_per_minute:
-            retry_after = 60 - (now - self.minute_counts[identifier][0]).seconds
-            logger.warning(
-                "Rate limit exceeded (minute)",
-                identifier=identifier,
-                count=minute_count,
-                limit=self.requests_per_minute,
-            )
-            return False, retry_after
+        # Request allowed - record it
+        state.minute.add(now_s)
+        state.hour.add(now_s)
+        state.day.add(now_s)
 
-        if hour_count >= self.requests_per_hour:
-            retry_after = 3600 - (now - self.hour_counts[identifier][0]).seconds
-            logger.warning(
-                "Rate limit exceeded (hour)",
-                identifier=identifier,
-                count=hour_count,
-                limit=self.requests_per_hour,
-            )
-            return False, retry_after
+        # Consume a token
+        state.tokens -= 1
 
-        if day_count >= self.requests_per_day:
-            retry_after = 86400 - (now - self.day_counts[identifier][0]).seconds
-            logger.warning(
-                "Rate limit exceeded (day)",
-                identifier=identifier,
-                count=day_count,
-                limit=self.requests_per_day,
+        return True, None
+
+    def remaining(self, identifier: str) -> int:
+        """Return requests left in the current minute window for an identifier.
+
+        With a shared store this is computed from the last reservation and
+        the local lease, without a store round trip, so it may lag behind
+        requests served by other workers since then.
+        """
+        shard = self._shard_for(identifier)
+        with shard.lock:
+            state = shard.states.get(identifier)
+            if state is None:
+                return self.requests_per_minute
+            if self.store is not None:
+                return max(0, state.shared_remaining + state.lease_remaining)
+            used = state.minute.count(int(self.clock()))
+        return max(0, self.requests_per_minute - used)
+
+    def sweep_expired(self) -> int:
+        """Drop identifiers with no requests left in any window.
+
+        An identifier whose day window is empty has been idle for at least
+        23 hours, so its token bucket is full as well and forgetting it does
+        not change any future decision. With a shared store, windows live in
+        the store, so identifiers are dropped once their lease has expired
+        and their token bucket has had time to refill; expired store buckets
+        are swept as well.
+
+        Returns:
+            Number of identifiers removed
+
+        """
+        refill_seconds = self.burst_size * 60 / self.requests_per_minute
+        removed = 0
+
+        for shard in self.shards:
+            with shard.lock:
+                now = self.clock()
+                now_s = int(now)
+                if self.store is None:
+                    expired = [
+                        identifier
+                        for identifier, state in shard.states.items()
+                        if state.day.count(now_s) == 0
+                    ]
+                else:
+                    expired = [
+                        identifier
+                        for identifier, state in shard.states.items()
+                        if now >= state.lease_expires
+                        and now - state.last_update >= refill_seconds
+                    ]
+                for identifier in expired:
+                    self._release_lease(identifier, shard.states.pop(identifier))
+                shard.expired_evictions += len(expired)
+                removed += len(expired)
+
+        if self.store is not None:
+            self.store.sweep_expired()
+
+        if removed:
+            logger.debug(
+                "Rate limiter swept idle identifiers",
+                removed=removed,
+                tracked=sum(len(shard.states) for shard in self.shards),
             )
-            return False, retry_after
+        return removed
 
-        # Request allowed - record it
-        self.minute_counts[identifier].append(now)
-        self.hour_counts[identifier].append(now)
-        self.day_counts[identifier].append(now)
+    def get_stats(self) -> dict[str, Any]:
+        """Return gauges for tracked identifiers and eviction counters."""
+        return {
+            "tracked_identifiers": sum(len(shard.states) for shard in self.shards),
+            "max_identifiers": self.max_identifiers,
+            "shards": len(self.shards),
+            "lru_evictions": sum(shard.lru_evictions for shard in self.shards),
+            "expired_evictions": sum(shard.expired_evictions for shard in self.shards),
+        }
 
-        # Consume a token
-        if identifier in self.token_buckets:
-            self.token_buckets[identifier]["tokens"] -= 1
+    def reset(self) -> None:
+        """Drop all tracked identifiers and eviction counters."""
+        for shard in self.shards:
+            with shard.lock:
+                shard.states.clear()
+                shard.lru_evictions = 0
+                shard.expired_evictions = 0
+        if self.store is not None:
+            self.store.reset()
 
-        return True, None
+
+class _TokenBudget:
+    """Per-key LLM token budget: refilling minute bucket plus hour window."""
+
+    __slots__ = ("balance", "hour", "last_update")
+
+    def __init__(self, capacity: int, now: float):
+        self.balance = float(capacity)
+        self.hour = SlidingWindowCounter(60, 60)
+        self.last_update = now
+
+
+def hash_api_key(api_key: str) -> str:
+    """Return the short hash used to identify an API key in rate limiting."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+
+class TokenRateLimiter:
+    """Rate limiter that charges LLM tokens instead of requests.
+
+    Each key has a bucket holding up to ``tokens_per_minute`` tokens that
+    refills continuously, plus an hourly token window. Requests are admitted
+    when the bucket covers their estimated prompt tokens; completion tokens
+    are charged afterwards and may push the balance negative, which delays
+    the key's next request instead of failing the one already served.
+
+    Concurrency: keys are sharded like ``RateLimiter`` identifiers, and each
+    check-then-charge runs under the key's shard lock, so concurrent callers
+    can't both spend the same tokens.
+    """
+
+    def __init__(
+        self,
+        tokens_per_minute: int = 200_000,
+        tokens_per_hour: int = 2_000_000,
+        max_keys: int = 50_000,
+        num_shards: int = 16,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize token limiter.
+
+        Args:
+            tokens_per_minute: Bucket capacity and refill per minute
+            tokens_per_hour: Max tokens charged per key per hour
+            max_keys: Max keys tracked before least recently used are evicted
+                (split evenly across shards)
+            num_shards: Number of independently locked key shards
+            clock: Monotonic time source in seconds (overridable for tests)
+
+        """
+        self.tokens_per_minute = tokens_per_minute
+        self.tokens_per_hour = tokens_per_hour
+        self.max_keys = max_keys
+        self.clock = clock
+        self.shards = [_Shard() for _ in range(num_shards)]
+        self._shard_capacity = max(1, max_keys // num_shards)
+        self._rejections = 0
+        self._stats_lock = threading.Lock()
+
+    def _shard_for(self, key_id: str) -> _Shard:
+        """Return the shard owning a key."""
+        return self.shards[hash(key_id) % len(self.shards)]
+
+    def _get_budget(self, shard: _Shard, key_id: str, now: float) -> _TokenBudget:
+        """Return the refilled budget for a key, creating it on first use.
+
+        Must be called with the shard lock held.
+        """
+        budgets = shard.states
+        budget = budgets.get(key_id)
+        if budget is None:
+            budget = _TokenBudget(self.tokens_per_minute, now)
+            budgets[key_id] = budget
+            while len(budgets) > self._shard_capacity:
+                budgets.popitem(last=False)
+                shard.lru_evictions += 1
+            return budget
+
+        budgets.move_to_end(key_id)
+        refill = (now - budget.last_update) * self.tokens_per_minute / 60.0
+        budget.balance = min(self.tokens_per_minute, budget.balance + refill)
+        budget.last_update = now
+        return budget
+
+    def _reject(self, window: str) -> None:
+        RATE_LIMIT_REJECTIONS.inc(limiter="tokens", window=window)
+        with self._stats_lock:
+            self._rejections += 1
+
+    def check_tokens(self, key_id: str, tokens: int) -> tuple[bool, int | None]:
+        """Admit a request costing ``tokens`` prompt tokens and charge it.
+
+        Requests larger than the bucket are charged at full capacity so they
+        can still run once the bucket is full.
+
+        Args:
+            key_id: Hashed API key
+            tokens: Estimated prompt tokens
+
+        Returns:
+            Tuple of (allowed, retry_after_seconds)
+
+        """
+        return self.check_tokens_all([key_id], tokens)
+
+    def check_tokens_all(self, key_ids: Iterable[str], tokens: int) -> tuple[bool, int | None]:
+        """Admit a request that spends ``tokens`` from each of several keys, or from none.
+
+        Every key is checked before any is charged, under all of their shard
+        locks (taken in shard order), so a key that can't cover the request
+        leaves the others untouched.
+
+        Args:
+            key_ids: Hashed API keys the request is sent with
+            tokens: Estimated prompt tokens, charged to each key
+
+        Returns:
+            Tuple of (allowed, retry_after_seconds); the retry hint is the
+            longest wait among the keys that rejected the request
+
+        """
+        key_ids = list(dict.fromkeys(key_ids))
+        shard_indices = sorted({hash(key_id) % len(self.shards) for key_id in key_ids})
+        cost = min(tokens, self.tokens_per_minute)
+
+        with contextlib.ExitStack() as stack:
+            for index in shard_indices:
+                stack.enter_context(self.shards[index].lock)
+            now = self.clock()
+            now_s = int(now)
+            budgets = [
+                (key_id, self._get_budget(self._shard_for(key_id), key_id, now))
+                for key_id in key_ids
+            ]
+
+            retry_after = None
+            for key_id, budget in budgets:
+                if budget.hour.count(now_s) + cost > self.tokens_per_hour:
+                    self._reject("hour")
+                    wait = budget.hour.retry_after(now_s)
+                    logger.warning(
+                        "Token rate limit exceeded (hour)",
+                        key_id=key_id,
+                        tokens=tokens,
+                        retry_after=wait,
+                    )
+                elif budget.balance < cost:
+                    self._reject("minute")
+                    deficit = cost - budget.balance
+                    wait = max(1, math.ceil(deficit * 60 / self.tokens_per_minute))
+                    logger.warning(
+                        "Token rate limit exceeded (minute)",
+                        key_id=key_id,
+                        tokens=tokens,
+                        balance=int(budget.balance),
+                        retry_after=wait,
+                    )
+                else:
+                    continue
+                retry_after = max(retry_after or 0, wait)
+            if retry_after is not None:
+                return False, retry_after
+
+            for _, budget in budgets:
+                budget.balance -= cost
+                budget.hour.add(now_s, cost)
+            return True, None
+
+    def charge(self, key_id: str, tokens: int) -> None:
+        """Charge tokens consumed after admission (e.g. completion tokens)."""
+        if tokens <= 0:
+            return
+        shard = self._shard_for(key_id)
+        with shard.lock:
+            now = self.clock()
+            budget = self._get_budget(shard, key_id, now)
+            budget.balance -= tokens
+            budget.hour.add(int(now), tokens)
+
+    def sweep_expired(self) -> int:
+        """Drop keys whose bucket is full and hour window is empty."""
+        removed = 0
+        for shard in self.shards:
+            with shard.lock:
+                now = self.clock()
+                now_s = int(now)
+                expired = [
+                    key_id
+                    for key_id, budget in shard.states.items()
+                    if budget.balance + (now - budget.last_update) * self.tokens_per_minute / 60.0
+                    >= self.tokens_per_minute
+                    and budget.hour.count(now_s) == 0
+                ]
+                for key_id in expired:
+                    del shard.states[key_id]
+                shard.expired_evictions += len(expired)
+                removed += len(expired)
+        return removed
+
+    def get_stats(self) -> dict[str, Any]:
+        """Return gauges for tracked keys and rejections."""
+        return {
+            "tracked_keys": sum(len(shard.states) for shard in self.shards),
+            "tokens_per_minute": self.tokens_per_minute,
+            "tokens_per_hour": self.tokens_per_hour,
+            "lru_evictions": sum(shard.lru_evictions for shard in self.shards),
+            "rejections": self._rejections,
+        }
+
+    def reset(self) -> None:
+        """Drop all tracked keys and counters."""
+        for shard in self.shards:
+            with shard.lock:
+                shard.states.clear()
+                shard.lru_evictions = 0
+                shard.expired_evictions = 0
+        with self._stats_lock:
+            self._rejections = 0
 
 
 # Global rate limiter instances
@@ -178,7 +677,7 @@ def get_identifier(request: Request) -> str:
     api_key = request.headers.get("X-API-Key")
     if api_key:
         # Hash the API key for privacy
-        return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+        return hash_api_key(api_key)
 
     # Get real IP address, checking for proxy headers
     # Check headers in order of preference (to prevent spoofing)
@@ -230,7 +729,7 @@ def rate_limit_middleware(
 
     async def middleware(request: Request, call_next):
         identifier = identifier_func(request)
-        allowed, retry_after = limiter.check_rate_limit(identifier)
+        allowed, retry_after = await limiter.check_rate_limit_async(identifier)
 
         if not allowed:
             logger.warning(
@@ -252,9 +751,7 @@ def rate_limit_middleware(
         # Add rate limit headers to response
         response = await call_next(request)
         response.headers["X-RateLimit-Limit"] = str(limiter.requests_per_minute)
-        response.headers["X-RateLimit-Remaining"] = str(
-            limiter.requests_per_minute - len(limiter.minute_counts[identifier])
-        )
+        response.headers["X-RateLimit-Remaining"] = str(limiter.remaining(identifier))
         response.headers["X-RateLimit-Reset"] = str(
             int((datetime.now(UTC) + timedelta(minutes=1)).timestamp())
         )
@@ -287,7 +784,7 @@ def rate_limit(
     def decorator(func):
         async def wrapper(request: Request, *args, **kwargs):
             identifier = get_identifier(request)
-            allowed, retry_after = limiter.check_rate_limit(identifier)
+            allowed, retry_after = await limiter.check_rate_limit_async(identifier)
 
             if not allowed:
                 raise HTTPException(
@@ -11,6 +11,7 @@ import re
 from dataclasses import dataclass
 
 from structured_logging import get_logger
+from tracing import start_span
 
 logger = get_logger(__name__)
 
@@ -368,8 +369,11 @@ def chunk_text_smart(
         List of text chunks
 
     """
-    chunker = SmartChunker(chunk_size=chunk_size)
-    return chunker.chunk_text(text)
+    with start_span("chunking.chunk_text_smart", text_length=len(text)) as span:
+        chunker = SmartChunker(chunk_size=chunk_size)
+        chunks = chunker.chunk_text(text)
+        span.set_attribute("chunks", len(chunks))
+        return chunks
 
 
 # Example usage and testing
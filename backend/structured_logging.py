@@ -5,6 +5,7 @@ masking of sensitive information like API keys in log messages.
 """
 
 import logging
+import os
 import re
 import sys
 from datetime import UTC, datetime
@@ -15,6 +16,8 @@ import structlog
 from structlog.processors import CallsiteParameter
 from structlog.types import EventDict, WrappedLogger
 
+from log_pipeline import AsyncBatchingHandler, EventSampler
+
 # Patterns for sensitive data that should be masked
 SENSITIVE_PATTERNS: dict[str, Pattern] = {
     "openai_key": re.compile(
@@ -32,6 +35,65 @@ SENSITIVE_PATTERNS: dict[str, Pattern] = {
 }
 
 
+# Replacement applied by each pattern in SENSITIVE_PATTERNS
+_REPLACEMENTS = {
+    "generic_api_key": r"\1\2***\4",
+    "password": r"\1\2***\4",
+    "bearer_token": r"\1***",
+}
+
+# Every pattern contains one of these: case-sensitive literals, and
+# lowercase forms of the case-insensitive patterns' literal parts
+_SECRET_LITERALS = ("sk-", "AIza", "AKIA")
+_FOLDED_SECRET_LITERALS = ("bearer", "password", "apikey", "api_key", "api-key")
+
+
+def _may_contain_secret(text: str) -> bool:
+    """Return False only if no pattern in SENSITIVE_PATTERNS can match."""
+    if any(literal in text for literal in _SECRET_LITERALS):
+        return True
+    # re.IGNORECASE also matches some non-ASCII letters to ASCII ones (e.g.
+    # KELVIN SIGN to "k"); casefold covers most, dotted and dotless i need mapping
+    folded = (
+        text.lower()
+        if text.isascii()
+        else text.casefold().replace("i\u0307", "i").replace("\u0131", "i")
+    )
+    return any(literal in folded for literal in _FOLDED_SECRET_LITERALS)
+
+
+# Short strings seen to contain nothing sensitive (event names, paths, levels...).
+# Strings that needed redaction are never cached, so secrets aren't retained.
+_CLEAN_CACHE_MAX_LENGTH = 256
+_CLEAN_CACHE_SIZE = 4096
+_clean_strings: dict[str, None] = {}
+
+
+def _redact(text: str) -> str:
+    """Apply every pattern in turn (the slow path for strings that match)."""
+    for pattern_name, pattern in SENSITIVE_PATTERNS.items():
+        text = pattern.sub(_REPLACEMENTS.get(pattern_name, "***REDACTED***"), text)
+    return text
+
+
+def _sanitize_string(text: str) -> str:
+    """Mask sensitive data in one string.
+
+    ``_redact`` returns its input unchanged when no pattern matches, so
+    skipping it for strings without any pattern's literal text gives the
+    same result at the cost of a few substring checks.
+    """
+    if text in _clean_strings:
+        return text
+    if _may_contain_secret(text):
+        return _redact(text)
+    if len(text) <= _CLEAN_CACHE_MAX_LENGTH:
+        if len(_clean_strings) >= _CLEAN_CACHE_SIZE:
+            _clean_strings.clear()
+        _clean_strings[text] = None
+    return text
+
+
 def sanitize_value(value: Any) -> Any:
     """Recursively sanitize sensitive data in a value.
 
@@ -43,21 +105,7 @@ def sanitize_value(value: Any) -> Any:
 
     """
     if isinstance(value, str):
-        # Apply all sensitive patterns
-        sanitized = value
-
-        # Direct pattern replacements
-        for pattern_name, pattern in SENSITIVE_PATTERNS.items():
-            if pattern_name in ["generic_api_key", "password"]:
-                # Special handling for patterns with groups
-                sanitized = pattern.sub(r"\1\2***\4", sanitized)
-            elif pattern_name == "bearer_token":
-                sanitized = pattern.sub(r"\1***", sanitized)
-            else:
-                # Simple replacement
-                sanitized = pattern.sub(r"***REDACTED***", sanitized)
-
-        return sanitized
+        return _sanitize_string(value)
 
     elif isinstance(value, dict):
         # Recursively sanitize dictionary values
@@ -114,9 +162,72 @@ def add_timestamp(_: WrappedLogger, __: str, event_dict: EventDict) -> EventDict
     return event_dict
 
 
+def parse_callsite_levels(spec: str) -> frozenset[str]:
+    """Parse LOG_CALLSITE_LEVELS ("all", "none" or comma-separated level names)."""
+    spec = spec.strip().lower()
+    if spec == "all":
+        return frozenset(CallsiteByLevel.ALL_METHODS)
+    if spec in ("", "none"):
+        return frozenset()
+    levels = {level.strip() for level in spec.split(",")}
+    if "error" in levels:
+        levels.update({"exception", "err"})
+    if "warning" in levels:
+        levels.add("warn")
+    if "critical" in levels:
+        levels.add("fatal")
+    return frozenset(levels)
+
+
+class CallsiteByLevel:
+    """Add filename, function and line number only for the given levels.
+
+    Finding the calling frame walks the stack on every call, so by default
+    only warnings and errors pay for it.
+    """
+
+    ALL_METHODS = (
+        "debug",
+        "info",
+        "msg",
+        "warning",
+        "warn",
+        "error",
+        "err",
+        "exception",
+        "critical",
+        "fatal",
+    )
+
+    def __init__(self, levels: frozenset[str]):
+        self.levels = levels
+        # Skip this module's helpers (log_api_request...) to report their caller
+        self._adder = structlog.processors.CallsiteParameterAdder(
+            parameters=[
+                CallsiteParameter.FILENAME,
+                CallsiteParameter.FUNC_NAME,
+                CallsiteParameter.LINENO,
+            ],
+            additional_ignores=[__name__, "log_pipeline"],
+        )
+
+    def __call__(self, logger: WrappedLogger, method_name: str, event_dict: EventDict) -> EventDict:
+        if method_name in self.levels:
+            return self._adder(logger, method_name, event_dict)
+        return event_dict
+
+
+# Set by setup_structured_logging; None when writing synchronously
+_log_pipeline: AsyncBatchingHandler | None = None
+_event_sampler: EventSampler | None = None
+
+
 def setup_structured_logging(level: str = "INFO", log_file: str = "app.log") -> WrappedLogger:
     """Configure structlog for structured logging.
 
+    Records are formatted and written by a background thread unless
+    LOG_ASYNC=0, so request handlers never wait on console or file I/O.
+
     Args:
         level: Logging level (DEBUG, INFO, WARNING, ERROR)
         log_file: Path to log file for JSON output
@@ -125,6 +236,8 @@ def setup_structured_logging(level: str = "INFO", log_file: str = "app.log") ->
         Configured structlog logger
 
     """
+    global _log_pipeline, _event_sampler
+
     # Configure standard library logging
     logging.basicConfig(
         format="%(message)s", stream=sys.stdout, level=getattr(logging, level.upper())
@@ -137,22 +250,25 @@ def setup_structured_logging(level: str = "INFO", log_file: str = "app.log") ->
     # Add handler to root logger
     logging.getLogger().addHandler(json_handler)
 
+    _event_sampler = EventSampler.from_env()
+
     # Configure structlog with sanitization
     structlog.configure(
         processors=[
+            # Drop disabled levels and sampled-out events before doing any work
+            structlog.stdlib.filter_by_level,
+            _event_sampler,
+            # Add request context bound with RequestContext (follows tasks and threads)
+            structlog.contextvars.merge_contextvars,
             # Add log level
             structlog.stdlib.add_log_level,
             # Add logger name
             structlog.stdlib.add_logger_name,
             # Add timestamp
             add_timestamp,
-            # Add call site parameters
-            structlog.processors.CallsiteParameterAdder(
-                parameters=[
-                    CallsiteParameter.FILENAME,
-                    CallsiteParameter.FUNC_NAME,
-                    CallsiteParameter.LINENO,
-                ]
+            # Add call site parameters for the levels that need them
+            CallsiteByLevel(
+                parse_callsite_levels(os.getenv("LOG_CALLSITE_LEVELS", "warning,error,critical"))
             ),
             # IMPORTANT: Sanitize sensitive data before any output
             sanitize_event_dict,
@@ -202,8 +318,13 @@ def setup_structured_logging(level: str = "INFO", log_file: str = "app.log") ->
         handler.close()
         root_logger.removeHandler(handler)
     # Add new handlers
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(json_handler)
+    if os.getenv("LOG_ASYNC", "1") != "0":
+        _log_pipeline = AsyncBatchingHandler([console_handler, json_handler])
+        root_logger.addHandler(_log_pipeline)
+    else:
+        _log_pipeline = None
+        root_logger.addHandler(console_handler)
+        root_logger.addHandler(json_handler)
 
     # Reduce noise from libraries
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
@@ -213,6 +334,21 @@ def setup_structured_logging(level: str = "INFO", log_file: str = "app.log") ->
     return structlog.get_logger()
 
 
+def flush_logs(timeout: float = 5.0) -> None:
+    """Wait for queued log records to be written."""
+    if _log_pipeline is not None:
+        _log_pipeline.flush(timeout)
+
+
+def get_log_pipeline_stats() -> dict[str, Any]:
+    """Return log queue depth, written/dropped counts and sampled-out events."""
+    stats: dict[str, Any] = {"async": _log_pipeline is not None}
+    if _log_pipeline is not None:
+        stats.update(_log_pipeline.get_stats())
+    stats["sampled_out"] = _event_sampler.sampled_out if _event_sampler else 0
+    return stats
+
+
 def get_logger(name: str | None = None, **context: Any) -> WrappedLogger:
     """Get a structured logger with optional context.
 
@@ -236,21 +372,39 @@ def get_logger(name: str | None = None, **context: Any) -> WrappedLogger:
 
 # Request ID context manager for tracking requests
 class RequestContext:
-    """Context manager for adding request ID to all logs within a request."""
+    """Context manager for adding request ID to all logs within a request.
 
-    def __init__(self, request_id: str):
+    The values live in context variables rather than on a bound logger, so
+    every logger picks them up, as do tasks started with ``asyncio.gather``
+    and ``asyncio.to_thread`` workers. Nested contexts restore the outer
+    values on exit.
+    """
+
+    def __init__(self, request_id: str, **context: Any):
         self.request_id = request_id
-        self.token: structlog.contextvars.Token | None = None
+        self.context = context
+        self._previous: dict[str, Any] = {}
 
     def __enter__(self) -> "RequestContext":
-        self.token = structlog.contextvars.bind_contextvars(request_id=self.request_id)
+        bound = {"request_id": self.request_id, **self.context}
+        current = structlog.contextvars.get_contextvars()
+        self._previous = {key: current[key] for key in bound if key in current}
+        structlog.contextvars.bind_contextvars(**bound)
         return self
 
     def __exit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> bool:
-        structlog.contextvars.unbind_contextvars("request_id")
+        keys = ["request_id", *self.context]
+        structlog.contextvars.unbind_contextvars(*(k for k in keys if k not in self._previous))
+        if self._previous:
+            structlog.contextvars.bind_contextvars(**self._previous)
         return False
 
 
+def get_request_id() -> str | None:
+    """Return the request id bound by the enclosing RequestContext, if any."""
+    return structlog.contextvars.get_contextvars().get("request_id")
+
+
 # Example usage functions with built-in sanitization
 def log_api_request(logger: WrappedLogger, method: str, path: str, **kwargs: Any) -> None:
     """Log API request with structured data (sanitized)."""
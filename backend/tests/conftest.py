@@ -24,16 +24,66 @@ def reset_rate_limits():
     from main import rate_limiter
 
     # Clear the global rate limiter state
-    rate_limiter.minute_counts.clear()
-    rate_limiter.hour_counts.clear()
-    rate_limiter.day_counts.clear()
-    rate_limiter.token_buckets.clear()
+    rate_limiter.reset()
     yield
     # Clean up after test
-    rate_limiter.minute_counts.clear()
-    rate_limiter.hour_counts.clear()
-    rate_limiter.day_counts.clear()
-    rate_limiter.token_buckets.clear()
+    rate_limiter.reset()
+
+
+@pytest.fixture(autouse=True)
+def disable_token_limits(monkeypatch):
+    """Skip per-key token limits unless a test asks for them with ``token_limits``.
+    """
+    import main
+
+    monkeypatch.setattr(main, "enforce_token_limits", False)
+
+
+@pytest.fixture
+def token_limits(monkeypatch):
+    """Enforce token limits on /api/analyze with a fresh 60 tokens/minute limiter.
+
+    Yields:
+        TokenRateLimiter: The limiter the app charges
+
+    """
+    import main
+    from rate_limiting import TokenRateLimiter
+
+    limiter = TokenRateLimiter(tokens_per_minute=60)
+    monkeypatch.setattr(main, "token_limiter", limiter)
+    monkeypatch.setattr(main, "enforce_token_limits", True)
+    yield limiter
+
+
+@pytest.fixture(autouse=True)
+def disable_memory_admission(monkeypatch):
+    """Admit every request unless a test asks for admission with ``memory_admission``.
+    """
+    import main
+
+    monkeypatch.setattr(main, "enforce_memory_admission", False)
+
+
+@pytest.fixture
+def memory_admission(monkeypatch):
+    """Enforce memory admission in the app with a controller reading a given RSS.
+
+    Returns:
+        Callable: Takes an RSS function (and any other AdmissionController
+        arguments), installs the controller and returns it
+
+    """
+    import main
+    from admission_control import AdmissionController
+
+    def enforce(rss, **kwargs):
+        controller = AdmissionController(rss=rss, **kwargs)
+        monkeypatch.setattr(main, "admission_controller", controller)
+        monkeypatch.setattr(main, "enforce_memory_admission", True)
+        return controller
+
+    return enforce
 
 
 @pytest.fixture(autouse=True)
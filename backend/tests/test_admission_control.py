@@ -0,0 +1,193 @@
+"""Tests for memory-pressure admission control."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from admission_control import (
+    CRITICAL,
+    ELEVATED,
+    NORMAL,
+    AdmissionController,
+    AdmissionPolicy,
+)
+from memory_management import MemoryManager
+
+MB = 1024 * 1024
+
+
+class FakeRSS:
+    def __init__(self, mb: float):
+        self.mb = mb
+
+    def __call__(self) -> int:
+        return int(self.mb * MB)
+
+
+def _controller(rss: FakeRSS, **kwargs) -> AdmissionController:
+    # Soft limit at 75MB, hard limit at 90MB
+    return AdmissionController(rss=rss, limit_bytes=100 * MB, **kwargs)
+
+
+class TestAdmissionController:
+    """Test decisions at each pressure level."""
+
+    def test_pressure_levels(self):
+        rss = FakeRSS(10)
+        controller = _controller(rss)
+
+        assert controller.pressure() == NORMAL
+        rss.mb = 80
+        assert controller.pressure() == ELEVATED
+        rss.mb = 95
+        assert controller.pressure() == CRITICAL
+
+    def test_everything_is_admitted_below_the_soft_limit(self):
+        controller = _controller(FakeRSS(10))
+
+        admission = asyncio.run(controller.admit("POST", "/api/analyze", 10 * MB))
+
+        assert admission.admitted
+        assert not admission.holds_slot
+
+    def test_elevated_pressure_queues_only_large_requests(self):
+        controller = _controller(FakeRSS(80))
+
+        async def main():
+            small = await controller.admit("POST", "/api/analyze", 1000)
+            large = await controller.admit("POST", "/api/analyze", 100_000)
+            other = await controller.admit("POST", "/api/workflows/validate", 100_000)
+            return small, large, other
+
+        small, large, other = asyncio.run(main())
+        assert small.admitted and not small.holds_slot
+        assert large.admitted and large.holds_slot
+        # Routes without a policy only count requests over 1MB as large, and admit them
+        assert other.admitted and not other.holds_slot
+
+    def test_queued_request_runs_when_a_slot_frees(self):
+        controller = _controller(FakeRSS(80), max_large_in_flight=1, queue_timeout=5)
+
+        async def main():
+            first = await controller.admit("POST", "/api/analyze", 100_000)
+            waiting = asyncio.create_task(controller.admit("POST", "/api/analyze", 100_000))
+            await asyncio.sleep(0.01)
+            assert not waiting.done()
+            assert controller.get_stats()["waiting"] == 1
+            controller.release(first)
+            second = await waiting
+            controller.release(second)
+            return second
+
+        assert asyncio.run(main()).admitted
+        assert controller.get_stats()["large_in_flight"] == 0
+
+    def test_queue_timeout_rejects_with_retry_after(self):
+        controller = _controller(
+            FakeRSS(80), max_large_in_flight=1, queue_timeout=0.01, retry_after=7
+        )
+
+        async def main():
+            await controller.admit("POST", "/api/analyze", 100_000)
+            return await controller.admit("POST", "/api/analyze", 100_000)
+
+        admission = asyncio.run(main())
+        assert not admission.admitted
+        assert admission.retry_after == 7
+        assert controller.get_stats()["waiting"] == 0
+
+    def test_cancelled_waiter_does_not_leak_a_slot(self):
+        controller = _controller(FakeRSS(80), max_large_in_flight=1, queue_timeout=5)
+
+        async def main():
+            first = await controller.admit("POST", "/api/analyze", 100_000)
+            waiting = asyncio.create_task(controller.admit("POST", "/api/analyze", 100_000))
+            await asyncio.sleep(0.01)
+            waiting.cancel()  # e.g. the client disconnected
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+            controller.release(first)
+            return await controller.admit("POST", "/api/analyze", 100_000)
+
+        assert asyncio.run(main()).holds_slot
+        assert controller.get_stats()["large_in_flight"] == 1
+
+    def test_critical_pressure_sheds_heavy_routes(self):
+        controller = _controller(FakeRSS(95), retry_after=5)
+
+        async def main():
+            return {
+                "small_analyze": await controller.admit("POST", "/api/analyze", 1000),
+                "health": await controller.admit("GET", "/api/health", None),
+                "small_other": await controller.admit("POST", "/api/workflows/validate", 1000),
+                "large_other": await controller.admit("POST", "/api/workflows/validate", 2 * MB),
+                "unknown_size": await controller.admit("POST", "/api/workflows/validate", None),
+            }
+
+        results = asyncio.run(main())
+        assert not results["small_analyze"].admitted
+        assert results["small_analyze"].retry_after == 10
+        assert results["health"].admitted
+        assert results["small_other"].admitted
+        assert not results["large_other"].admitted
+        # A body of unknown size could be anything
+        assert not results["unknown_size"].admitted
+
+    def test_queued_request_is_rejected_if_memory_became_critical(self):
+        rss = FakeRSS(80)
+        controller = _controller(rss, max_large_in_flight=1, queue_timeout=5)
+
+        async def main():
+            first = await controller.admit("POST", "/api/analyze", 100_000)
+            waiting = asyncio.create_task(controller.admit("POST", "/api/analyze", 100_000))
+            await asyncio.sleep(0.01)
+            rss.mb = 95
+            controller.release(first)
+            return await waiting
+
+        assert not asyncio.run(main()).admitted
+        assert controller.get_stats()["large_in_flight"] == 0
+
+    def test_policy_rejects_queue_above_the_hard_limit(self):
+        with pytest.raises(ValueError):
+            AdmissionPolicy(on_critical="queue")
+
+
+class TestSampledRSS:
+    """Test that RSS is read from the OS at most once per interval."""
+
+    def test_reading_is_reused_within_the_interval(self, monkeypatch):
+        manager = MemoryManager()
+        reads = []
+
+        def memory_info():
+            reads.append(1)
+            return SimpleNamespace(rss=len(reads) * MB)
+
+        monkeypatch.setattr(manager.process, "memory_info", memory_info)
+
+        assert [manager.sampled_rss() for _ in range(100)] == [MB] * 100
+        assert len(reads) == 1
+
+
+class TestAdmissionMiddleware:
+    """Test the 503 and Retry-After returned by the middleware."""
+
+    def test_request_is_shed_under_critical_pressure(self, memory_admission):
+        rss = FakeRSS(10)
+        controller = memory_admission(rss, limit_bytes=100 * MB)
+        client = TestClient(main.app)
+
+        admitted = client.post("/api/analyze", json={"text": "hello"})
+        rss.mb = 95
+        shed = client.post("/api/analyze", json={"text": "hello"})
+        health = client.get("/api/health")
+
+        assert admitted.status_code != 503
+        assert shed.status_code == 503
+        assert shed.headers["Retry-After"] == str(2 * controller.retry_after)
+        assert health.status_code == 200
+        assert client.get("/api/memory").json()["admission"]["pressure"] == CRITICAL
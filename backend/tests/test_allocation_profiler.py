@@ -0,0 +1,131 @@
+"""Tests for opt-in tracemalloc allocation profiling."""
+
+import sysconfig
+import tracemalloc
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from allocation_profiler import AllocationProfiler, module_for
+
+BACKEND = Path(main.__file__).resolve().parent
+THIS_FILE = "tests/test_allocation_profiler.py"
+
+
+@pytest.fixture
+def profiler():
+    profiler = AllocationProfiler(enabled=True)
+    profiler.start()
+    yield profiler
+    profiler.stop()
+
+
+class TestModuleFor:
+    """Test how allocation sites are labelled by module."""
+
+    def test_backend_files_keep_their_path(self):
+        assert module_for(str(BACKEND / "rate_limiting.py")) == "rate_limiting.py"
+        assert module_for(str(BACKEND / "plugins" / "ollama_provider.py")) == (
+            "plugins/ollama_provider.py"
+        )
+
+    def test_installed_packages_are_rolled_up(self):
+        filename = "/venv/lib/python3.11/site-packages/aiohttp/client_reqrep.py"
+        assert module_for(filename) == "aiohttp"
+        assert module_for("/venv/lib/python3.11/site-packages/six.py") == "six"
+
+    def test_standard_library_is_rolled_up(self):
+        stdlib = Path(sysconfig.get_paths()["stdlib"])
+        assert module_for(str(stdlib / "asyncio" / "events.py")) == "stdlib/asyncio"
+        assert module_for(str(stdlib / "json" / "decoder.py")) == "stdlib/json"
+
+
+class TestAllocationProfiler:
+    """Test snapshots and growth reports."""
+
+    def test_disabled_profiler_does_not_trace(self):
+        profiler = AllocationProfiler(enabled=False)
+        profiler.start()
+
+        assert not tracemalloc.is_tracing()
+        assert profiler.get_stats() == {"enabled": False}
+        with pytest.raises(RuntimeError, match="MEMORY_PROFILING"):
+            profiler.snapshot()
+
+    def test_snapshot_reports_the_largest_sites(self, profiler):
+        retained = [bytearray(4096) for _ in range(256)]  # ~1MB from this file
+
+        report = profiler.snapshot(group_by="module", limit=50)
+
+        sites = {row["site"]: row for row in report["top"]}
+        assert sites[THIS_FILE]["size_kb"] >= 1024
+        assert report["top"] == sorted(report["top"], key=lambda row: -row["size_kb"])
+        assert report["traced_mb"] >= 1
+        del retained
+
+    def test_diff_reports_growth_since_the_snapshot(self, profiler):
+        profiler.snapshot()
+        retained = [bytearray(4096) for _ in range(256)]
+
+        report = profiler.diff(group_by="line")
+
+        top = report["top"][0]
+        assert top["site"].startswith(f"{THIS_FILE}:")
+        assert top["size_diff_kb"] >= 1024
+        assert top["count_diff"] >= 256
+        assert report["growth_kb"] >= 1024
+        del retained
+
+    def test_diff_needs_a_snapshot_first(self, profiler):
+        with pytest.raises(RuntimeError, match="snapshot"):
+            profiler.diff()
+
+    def test_unknown_grouping_is_rejected(self, profiler):
+        with pytest.raises(ValueError):
+            profiler.snapshot(group_by="function")
+
+    def test_stop_leaves_tracing_started_elsewhere_alone(self):
+        tracemalloc.start()
+        try:
+            profiler = AllocationProfiler(enabled=True)
+            profiler.start()
+            profiler.stop()
+            assert tracemalloc.is_tracing()
+        finally:
+            tracemalloc.stop()
+
+
+class TestProfilingEndpoints:
+    """Test /api/memory/snapshot and /api/memory/diff."""
+
+    def test_endpoints_return_409_when_profiling_is_off(self):
+        client = TestClient(main.app)
+
+        snapshot = client.post("/api/memory/snapshot")
+        diff = client.get("/api/memory/diff")
+
+        assert snapshot.status_code == 409
+        assert "MEMORY_PROFILING=1" in snapshot.json()["detail"]
+        assert diff.status_code == 409
+        assert client.get("/api/memory").json()["allocation_profiling"] == {"enabled": False}
+
+    def test_snapshot_then_diff(self, monkeypatch):
+        profiler = AllocationProfiler(enabled=True)
+        monkeypatch.setattr(main, "allocation_profiler", profiler)
+        profiler.start()
+        try:
+            client = TestClient(main.app)
+
+            snapshot = client.post("/api/memory/snapshot", params={"limit": 5})
+            diff = client.get("/api/memory/diff", params={"group_by": "file"})
+            invalid = client.get("/api/memory/diff", params={"group_by": "function"})
+        finally:
+            profiler.stop()
+
+        assert snapshot.status_code == 200
+        assert len(snapshot.json()["top"]) <= 5
+        assert diff.status_code == 200
+        assert diff.json()["group_by"] == "file"
+        assert invalid.status_code == 422
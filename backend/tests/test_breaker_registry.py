@@ -0,0 +1,86 @@
+"""Tests for the per-key circuit breaker registry bounds and stats."""
+
+import pytest
+
+import llm_providers
+from llm_providers import (
+    _breaker_last_used,
+    circuit_breakers,
+    get_breaker_stats,
+    get_circuit_breaker,
+    sweep_idle_breakers,
+)
+
+
+def _age(provider: str, api_key: str, seconds: float) -> None:
+    """Pretend a breaker was last used ``seconds`` ago."""
+    _breaker_last_used[provider][api_key] -= seconds
+
+
+class TestBreakerRegistry:
+    """Test LRU and idle eviction of circuit breakers."""
+
+    def test_lru_cap_evicts_least_recently_used(self, monkeypatch):
+        monkeypatch.setattr(llm_providers, "MAX_BREAKERS_PER_PROVIDER", 3)
+
+        for i in range(3):
+            get_circuit_breaker("openai", f"sk-key-{i:020d}")
+        # Touch the oldest key so the second one becomes least recently used
+        get_circuit_breaker("openai", f"sk-key-{0:020d}")
+        get_circuit_breaker("openai", f"sk-key-{3:020d}")
+
+        assert list(circuit_breakers["openai"]) == [
+            f"sk-key-{2:020d}",
+            f"sk-key-{0:020d}",
+            f"sk-key-{3:020d}",
+        ]
+        assert f"sk-key-{1:020d}" not in _breaker_last_used["openai"]
+        assert get_breaker_stats()["evictions"]["lru"] >= 1
+
+    def test_sweep_removes_idle_breakers(self):
+        get_circuit_breaker("claude", "sk-ant-idle-key-000000")
+        get_circuit_breaker("claude", "sk-ant-busy-key-000000")
+        _age("claude", "sk-ant-idle-key-000000", 3600)
+
+        removed = sweep_idle_breakers(max_idle=60)
+
+        assert removed == 1
+        assert list(circuit_breakers["claude"]) == ["sk-ant-busy-key-000000"]
+        assert "sk-ant-idle-key-000000" not in _breaker_last_used["claude"]
+
+    def test_sweep_keeps_open_breaker_until_reset_timeout(self):
+        breaker = get_circuit_breaker("gemini", "AIza-open-key-0000000")
+        for _ in range(llm_providers.BREAKER_FAIL_MAX):
+            with pytest.raises(RuntimeError):
+                breaker.call(_fail)
+        assert breaker.current_state == "open"
+        _age("gemini", "AIza-open-key-0000000", 10)
+
+        assert sweep_idle_breakers(max_idle=1) == 0
+
+        _age("gemini", "AIza-open-key-0000000", llm_providers.BREAKER_TIMEOUT)
+        assert sweep_idle_breakers(max_idle=1) == 1
+
+    def test_sweep_drops_bookkeeping_for_cleared_breakers(self):
+        get_circuit_breaker("grok", "xai-cleared-key-000000")
+        circuit_breakers["grok"].clear()
+
+        sweep_idle_breakers()
+
+        assert "xai-cleared-key-000000" not in _breaker_last_used["grok"]
+
+    def test_stats_count_breakers_by_state(self):
+        get_circuit_breaker("openai", "sk-stats-key-a-0000000")
+        breaker = get_circuit_breaker("openai", "sk-stats-key-b-0000000")
+        breaker.open()
+
+        stats = get_breaker_stats()
+
+        assert stats["by_provider"]["openai"] == 2
+        assert stats["by_state"]["closed"] == 1
+        assert stats["by_state"]["open"] == 1
+        assert stats["total"] == 2
+
+
+def _fail():
+    raise RuntimeError("provider down")
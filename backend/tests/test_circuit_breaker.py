@@ -0,0 +1,239 @@
+"""Tests for the concurrent circuit breaker."""
+
+import asyncio
+import threading
+
+import pytest
+
+from circuit_breaker import CircuitBreaker, CircuitBreakerError
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _fail():
+    raise RuntimeError("provider down")
+
+
+def _trip(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.fail_max):
+        with pytest.raises(RuntimeError):
+            breaker.call(_fail)
+
+
+class TestCircuitBreakerStates:
+    """Test closed/open/half-open transitions."""
+
+    def test_opens_after_fail_max_consecutive_failures(self):
+        breaker = CircuitBreaker(fail_max=3, reset_timeout=60, clock=FakeClock())
+
+        _trip(breaker)
+
+        assert breaker.current_state == "open"
+        assert breaker.fail_counter == 3
+        with pytest.raises(CircuitBreakerError, match="Circuit breaker is open"):
+            breaker.call(lambda: "ok")
+
+    def test_success_resets_failure_count(self):
+        breaker = CircuitBreaker(fail_max=3, clock=FakeClock())
+
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                breaker.call(_fail)
+        breaker.call(lambda: "ok")
+
+        assert breaker.fail_counter == 0
+        assert breaker.current_state == "closed"
+
+    def test_half_open_trial_success_closes(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(fail_max=2, reset_timeout=60, clock=clock)
+        _trip(breaker)
+
+        clock.now += 60
+
+        assert breaker.current_state == "half-open"
+        assert breaker.call(lambda: "ok") == "ok"
+        assert breaker.current_state == "closed"
+        assert breaker.fail_counter == 0
+
+    def test_half_open_trial_failure_reopens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(fail_max=2, reset_timeout=60, clock=clock)
+        _trip(breaker)
+        clock.now += 60
+
+        with pytest.raises(RuntimeError):
+            breaker.call(_fail)
+
+        assert breaker.current_state == "open"
+        clock.now += 59
+        assert breaker.current_state == "open"
+
+
+class TestCircuitBreakerConcurrency:
+    """Test that protected calls are not serialized."""
+
+    def test_closed_calls_run_in_parallel(self):
+        breaker = CircuitBreaker()
+        workers = 8
+        barrier = threading.Barrier(workers, timeout=5)
+
+        def call():
+            # Deadlocks (BrokenBarrierError) if calls were serialized
+            return breaker.call(barrier.wait)
+
+        threads = [threading.Thread(target=call) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not barrier.broken
+
+    def test_racing_failures_open_the_breaker_once(self):
+        transitions = []
+        breaker = CircuitBreaker(fail_max=5, reset_timeout=60, on_state_change=transitions.append)
+        workers = 20
+        barrier = threading.Barrier(workers, timeout=5)
+        outcomes = []
+        outcomes_lock = threading.Lock()
+
+        def call():
+            barrier.wait()
+            try:
+                breaker.call(_fail)
+                outcome = "success"
+            except CircuitBreakerError:
+                outcome = "rejected"
+            except RuntimeError:
+                outcome = "failed"
+            with outcomes_lock:
+                outcomes.append(outcome)
+
+        threads = [threading.Thread(target=call) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Whatever order the threads ran in, every call is accounted for and
+        # the breaker opened exactly once after at least fail_max failures
+        assert len(outcomes) == workers
+        assert "success" not in outcomes
+        assert outcomes.count("failed") >= breaker.fail_max
+        assert transitions == ["open"]
+        assert breaker.current_state == "open"
+
+    def test_half_open_admits_a_single_trial_call(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(fail_max=1, reset_timeout=10, clock=clock)
+        _trip(breaker)
+        clock.now += 10
+
+        release = threading.Event()
+        started = threading.Event()
+
+        def slow_probe():
+            started.set()
+            release.wait(5)
+            return "ok"
+
+        probe = threading.Thread(target=breaker.call, args=(slow_probe,))
+        probe.start()
+        started.wait(5)
+
+        with pytest.raises(CircuitBreakerError, match="trial call in progress"):
+            breaker.call(lambda: "ok")
+
+        release.set()
+        probe.join()
+        assert breaker.current_state == "closed"
+
+    def test_late_result_does_not_affect_newer_state(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(fail_max=1, reset_timeout=10, clock=clock)
+        release = threading.Event()
+
+        def slow_success():
+            release.wait(5)
+            return "ok"
+
+        slow = threading.Thread(target=breaker.call, args=(slow_success,))
+        slow.start()
+        _trip(breaker)
+
+        release.set()
+        slow.join()
+
+        assert breaker.current_state == "open"
+
+    def test_call_async_runs_concurrently(self):
+        breaker = CircuitBreaker()
+
+        async def run():
+            in_flight = 0
+            peak = 0
+
+            async def work():
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+                return "ok"
+
+            results = await asyncio.gather(*(breaker.call_async(work) for _ in range(10)))
+            return results, peak
+
+        results, peak = asyncio.run(run())
+
+        assert results == ["ok"] * 10
+        assert peak == 10
+
+    def test_cancelled_trial_call_frees_the_slot(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(fail_max=1, reset_timeout=10, clock=clock)
+        _trip(breaker)
+        clock.now += 10
+
+        async def run():
+            probe = asyncio.create_task(breaker.call_async(asyncio.sleep, 10))
+            await asyncio.sleep(0)
+            probe.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await probe
+            return await breaker.call_async(asyncio.sleep, 0, "ok")
+
+        assert asyncio.run(run()) == "ok"
+        assert breaker.current_state == "closed"
+
+
+class TestCircuitBreakerDecorator:
+    """Test decorator usage."""
+
+    def test_decorated_sync_function_counts_failures(self):
+        breaker = CircuitBreaker(fail_max=2, clock=FakeClock())
+        guarded = breaker(_fail)
+
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                guarded()
+
+        assert breaker.current_state == "open"
+
+    def test_decorated_async_function(self):
+        breaker = CircuitBreaker()
+
+        @breaker
+        async def double(value: int) -> int:
+            return value * 2
+
+        assert asyncio.run(double(21)) == 42
@@ -148,13 +148,7 @@ class TestRaceConditions:
     @pytest.mark.asyncio
     async def test_circuit_breaker_race_condition(self):
         """Test circuit breaker under racing threads."""
-        # Force creation of breaker with lock
-        from llm_providers import _breaker_operation_locks
         breaker = get_circuit_breaker("race-test", "key")
-        # Ensure lock exists
-        if "race-test_key" not in _breaker_operation_locks:
-            import threading
-            _breaker_operation_locks["race-test_key"] = threading.Lock()
         results = {"open_count": 0, "success_count": 0, "fail_count": 0}
         lock = threading.Lock()
 
@@ -0,0 +1,141 @@
+"""Tests for latency histograms and the response time tracker."""
+
+import random
+
+import pytest
+
+from latency_histogram import NUM_BUCKETS, SUB_BUCKETS, LatencyHistogram
+from timeout_handler import TIMEOUT_CONFIG, ResponseTimeTracker, get_timeout_stats
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _exact_percentile(samples: list[float], percentile: float) -> float:
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * percentile // 100))
+    return ordered[int(rank) - 1]
+
+
+class TestLatencyHistogram:
+    """Test recording, percentiles and merging."""
+
+    def test_empty_histogram(self):
+        histogram = LatencyHistogram()
+
+        assert histogram.count == 0
+        assert histogram.mean is None
+        assert histogram.percentile(99) is None
+
+    @pytest.mark.parametrize("percentile", [50.0, 90.0, 99.0, 99.9])
+    def test_percentiles_within_bucket_precision(self, percentile):
+        rng = random.Random(42)  # noqa: S311 - seeded test data
+        samples = [rng.lognormvariate(0, 1) for _ in range(10_000)]
+        histogram = LatencyHistogram()
+        for sample in samples:
+            histogram.record(sample)
+
+        expected = _exact_percentile(samples, percentile)
+
+        assert histogram.percentile(percentile) == pytest.approx(expected, rel=1 / SUB_BUCKETS)
+
+    def test_extreme_values_are_clamped_to_edge_buckets(self):
+        histogram = LatencyHistogram()
+        for value in (0.0, 1e-9, 1e9):
+            histogram.record(value)
+
+        assert histogram.counts[0] == 2
+        assert histogram.counts[NUM_BUCKETS - 1] == 1
+        assert histogram.percentile(100) == 1e9
+        assert histogram.percentile(1) == 0.0
+
+    def test_merge_matches_recording_everything_in_one(self):
+        left, right, combined = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for i in range(1, 200):
+            (left if i % 2 else right).record(i / 100)
+            combined.record(i / 100)
+
+        merged = left.snapshot().merge(right)
+
+        assert list(merged.counts) == list(combined.counts)
+        assert merged.count == combined.count
+        assert (merged.min, merged.max) == (combined.min, combined.max)
+        assert left.count == 100  # Snapshot left the original untouched
+
+
+class TestResponseTimeTracker:
+    """Test windowed histograms in ResponseTimeTracker."""
+
+    def test_recommended_timeout_uses_tail_percentile(self):
+        tracker = ResponseTimeTracker()
+        for _ in range(97):
+            tracker.record("api_call", 20.0)
+        for _ in range(3):
+            tracker.record("api_call", 50.0)
+
+        # p99 is 50s; 1.5x that is capped at twice the configured 30s
+        assert tracker.get_recommended_timeout("api_call") == TIMEOUT_CONFIG["api_call"] * 2
+        assert tracker.get_recommended_timeout("api_call", percentile=50) == pytest.approx(
+            30.0, rel=1 / SUB_BUCKETS
+        )
+
+    def test_not_enough_samples_uses_configured_timeout(self):
+        tracker = ResponseTimeTracker()
+        tracker.record("api_call", 1.0)
+
+        assert tracker.get_recommended_timeout("api_call") == TIMEOUT_CONFIG["api_call"]
+
+    def test_old_windows_age_out(self):
+        clock = FakeClock()
+        tracker = ResponseTimeTracker(window_seconds=60, clock=clock)
+        tracker.record("op", 5.0)
+
+        clock.now += 61
+        tracker.record("op", 1.0)
+        assert tracker.get_histogram("op").count == 2
+
+        clock.now += 61
+        assert tracker.get_histogram("op").count == 1
+
+        clock.now += 200
+        assert tracker.get_histogram("op").count == 0
+
+    def test_least_recently_recorded_operation_is_evicted(self):
+        tracker = ResponseTimeTracker(max_operations=2)
+        for name in ("a", "b", "a", "c"):
+            tracker.record(name, 1.0)
+
+        assert set(tracker.operations) == {"a", "c"}
+        assert tracker.evictions == 1
+
+    def test_sweep_drops_operations_without_recent_samples(self):
+        clock = FakeClock()
+        tracker = ResponseTimeTracker(window_seconds=60, clock=clock)
+        tracker.record("idle", 1.0)
+        clock.now += 100
+        tracker.record("busy", 1.0)
+
+        assert tracker.sweep_expired() == 0  # "idle" still has samples in the previous window
+        clock.now += 21
+        assert tracker.sweep_expired() == 1
+        assert list(tracker.operations) == ["busy"]
+
+    def test_timeout_stats_report_percentiles(self, monkeypatch):
+        tracker = ResponseTimeTracker()
+        for i in range(1, 1001):
+            tracker.record("llm:openai/gpt-4", i / 1000)
+        monkeypatch.setattr("timeout_handler.response_tracker", tracker)
+
+        stats = get_timeout_stats()["operations"]["llm:openai/gpt-4"]
+
+        assert stats["samples"] == 1000
+        assert {"p50", "p90", "p99", "p999"} <= set(stats)
+        assert stats["p50"] == pytest.approx(0.5, rel=1 / SUB_BUCKETS)
+        assert stats["p999"] == pytest.approx(0.999, rel=1 / SUB_BUCKETS)
@@ -12,37 +12,12 @@ from llm_providers import (
     call_gemini,
     call_grok,
     call_openai,
-    on_circuit_close,
-    on_circuit_open,
 )
 from tests.assertion_helpers import (
     assert_valid_llm_response,
 )
 
 
-class TestCircuitBreakerCallbacks:
-    """Test circuit breaker event callbacks."""
-
-    def test_on_circuit_open(self):
-        """Test circuit breaker open callback."""
-        mock_breaker = MagicMock()
-        mock_breaker.name = "Test Breaker"
-        mock_breaker.fail_counter = 5
-
-        with patch("structured_logging.log_circuit_breaker_event") as mock_log:
-            on_circuit_open(mock_breaker)
-            mock_log.assert_called_once()
-
-    def test_on_circuit_close(self):
-        """Test circuit breaker close callback."""
-        mock_breaker = MagicMock()
-        mock_breaker.name = "Test Breaker"
-
-        with patch("structured_logging.log_circuit_breaker_event") as mock_log:
-            on_circuit_close(mock_breaker)
-            mock_log.assert_called_once()
-
-
 class TestOpenAIIntegration:
     """Test OpenAI API integration."""
 
@@ -0,0 +1,131 @@
+"""Tests for the log analytics CLI."""
+
+import json
+
+import pytest
+
+from log_analytics import analyze_logs, main
+
+
+def _line(event: str, timestamp: str, **fields) -> str:
+    return json.dumps({**fields, "event": event, "level": "info", "timestamp": timestamp})
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    lines = [
+        _line("Using selector: EpollSelector", "2026-01-01T10:00:00Z"),
+        "not json but mentions api_response",
+        "",
+    ]
+    for i in range(100):
+        lines.append(
+            _line(
+                "api_response",
+                f"2026-01-01T10:{i % 60:02d}:00+00:00",
+                method="POST",
+                route="/api/analyze",
+                status_code=500 if i < 5 else 200,
+                duration_ms=float(i + 1),
+            )
+        )
+    lines.append(
+        _line("api_response", "2026-01-01T11:00:00+00:00", status_code=200, duration_ms=3.0)
+    )
+    lines += [
+        _line(
+            "llm_call",
+            "2026-01-01T10:00:01+00:00",
+            provider="openai",
+            model="gpt-4",
+            tokens=30,
+            duration_ms=800.0,
+            success=True,
+        ),
+        _line(
+            "llm_call",
+            "2026-01-01T10:00:02+00:00",
+            provider="openai",
+            model="gpt-4",
+            tokens=0,
+            duration_ms=200.0,
+            success=False,
+        ),
+        _line("circuit_breaker", "2026-01-01T10:00:00+00:00", breaker_name="b1", state="open"),
+        _line("circuit_breaker", "2026-01-01T10:01:00+00:00", breaker_name="b1", state="half_open"),
+        _line("circuit_breaker", "2026-01-01T10:01:00+00:00", breaker_name="b1", state="open"),
+        _line("circuit_breaker", "2026-01-01T10:02:30+00:00", breaker_name="b1", state="closed"),
+        _line("circuit_breaker", "2026-01-01T10:05:00+00:00", breaker_name="b1", state="open"),
+    ]
+    path = tmp_path / "backend.log"
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+class TestLogAnalytics:
+    """Test aggregation of latency, errors and breaker intervals."""
+
+    def test_route_latency_percentiles_and_error_rate(self, log_file):
+        data = analyze_logs([str(log_file)]).to_dict()
+
+        analyze = data["routes"]["POST /api/analyze"]
+        assert analyze["count"] == 100
+        assert analyze["error_rate"] == 0.05
+        assert analyze["p50_ms"] == pytest.approx(50, rel=0.03)
+        assert analyze["p99_ms"] == pytest.approx(99, rel=0.03)
+        assert analyze["max_ms"] == 100
+        # Lines without a route (written by older versions) are still counted
+        assert data["routes"]["unknown"]["count"] == 1
+
+    def test_hourly_buckets(self, log_file):
+        hours = analyze_logs([str(log_file)]).to_dict()["hours"]
+
+        assert list(hours) == ["2026-01-01T10", "2026-01-01T11"]
+        assert hours["2026-01-01T10"]["count"] == 100
+        assert hours["2026-01-01T10"]["errors"] == 5
+
+    def test_model_failures_and_tokens(self, log_file):
+        model = analyze_logs([str(log_file)]).to_dict()["models"]["openai/gpt-4"]
+
+        assert model["count"] == 2
+        assert model["error_rate"] == 0.5
+        assert model["tokens"] == 30
+        assert model["max_ms"] == 800
+
+    def test_breaker_open_intervals(self, log_file):
+        breaker = analyze_logs([str(log_file)]).to_dict()["breakers"]["b1"]
+
+        # A failed half-open probe extends the open interval instead of starting a new one
+        assert breaker["opens"] == 2
+        assert breaker["open_seconds"] == 150
+        assert breaker["longest_open_seconds"] == 150
+        assert breaker["open_since"] == "2026-01-01T10:05:00+00:00"
+
+    def test_unrelated_and_malformed_lines(self, log_file):
+        data = analyze_logs([str(log_file)]).to_dict()
+
+        assert data["lines"] == 111
+        assert data["events"] == 108
+        assert data["malformed"] == 1
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "empty.log"
+        path.write_text("")
+
+        data = analyze_logs([str(path)]).to_dict()
+
+        assert data["lines"] == 0
+        assert data["routes"] == {}
+
+    def test_cli_text_and_json_output(self, log_file, capsys):
+        assert main([str(log_file)]) == 0
+        text = capsys.readouterr().out
+        assert "POST /api/analyze" in text
+        assert "openai/gpt-4" in text
+
+        assert main([str(log_file), "--json"]) == 0
+        assert json.loads(capsys.readouterr().out)["breakers"]["b1"]["opens"] == 2
+
+    def test_cli_missing_file(self, tmp_path, capsys):
+        assert main([str(tmp_path / "missing.log")]) == 1
+        assert "error" in capsys.readouterr().err
@@ -0,0 +1,154 @@
+"""Tests for the background log writer and event sampling."""
+
+import io
+import logging
+import sys
+import threading
+
+import pytest
+import structlog
+
+from log_pipeline import AsyncBatchingHandler, EventSampler, parse_sample_rates
+
+
+def _record(msg: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord("test", level, __file__, 1, msg, (), None)
+
+
+class _BlockingHandler(logging.Handler):
+    """Target whose writes wait until released, to hold the writer thread."""
+
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.unblock = threading.Event()
+        self.messages: list[str] = []
+
+    def emit(self, record):
+        self.started.set()
+        self.unblock.wait(5)
+        self.messages.append(record.getMessage())
+
+
+class TestAsyncBatchingHandler:
+    """Test queueing, batching and drop accounting."""
+
+    def test_records_are_written_in_order(self):
+        stream = io.StringIO()
+        handler = AsyncBatchingHandler([logging.StreamHandler(stream)])
+        for i in range(100):
+            handler.emit(_record(f"line {i}"))
+
+        assert handler.flush()
+        handler.close()
+
+        assert stream.getvalue().splitlines() == [f"line {i}" for i in range(100)]
+        assert handler.get_stats()["written"] == 100
+
+    def test_batches_share_a_write(self):
+        stream = io.StringIO()
+        target = _BlockingHandler()
+        handler = AsyncBatchingHandler([target, logging.StreamHandler(stream)], batch_size=50)
+        handler.emit(_record("first"))
+        target.started.wait(5)  # Writer is now blocked on this record
+        for i in range(20):
+            handler.emit(_record(f"queued {i}"))
+        target.unblock.set()
+
+        handler.flush()
+        handler.close()
+
+        # The first record is a batch of its own; the rest are written together
+        assert handler.get_stats()["batches"] == 2
+
+    def test_full_queue_drops_and_reports(self):
+        target = _BlockingHandler()
+        handler = AsyncBatchingHandler([target], queue_size=3)
+        handler.emit(_record("taken by writer"))
+        target.started.wait(5)
+        for i in range(10):
+            handler.emit(_record(f"burst {i}", logging.DEBUG))
+        target.unblock.set()
+
+        handler.flush()
+        handler.close()
+
+        dropped = handler.get_stats()["dropped"]["DEBUG"]
+        assert dropped >= 1
+        assert f"Log queue full, dropped {dropped} records" in target.messages
+
+    def test_target_levels_are_respected(self):
+        stream = io.StringIO()
+        target = logging.StreamHandler(stream)
+        target.setLevel(logging.WARNING)
+        handler = AsyncBatchingHandler([target])
+        handler.emit(_record("quiet", logging.INFO))
+        handler.emit(_record("loud", logging.ERROR))
+
+        handler.flush()
+        handler.close()
+
+        assert stream.getvalue() == "loud\n"
+
+    def test_records_are_prepared_before_queueing(self):
+        stream = io.StringIO()
+        target = _BlockingHandler()
+        handler = AsyncBatchingHandler([target, logging.StreamHandler(stream)])
+        handler.emit(_record("taken by writer"))
+        target.started.wait(5)
+
+        items = ["first"]
+        handler.emit(
+            logging.LogRecord("test", logging.INFO, __file__, 1, "items %s", (items,), None)
+        )
+        items.append("added after logging")
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.LogRecord(
+                "test", logging.ERROR, __file__, 1, "failed", (), sys.exc_info()
+            )
+        handler.emit(record)
+        queued = list(handler._queue.queue)
+        target.unblock.set()
+
+        handler.flush()
+        handler.close()
+
+        assert all(r.args is None and r.exc_info is None for r in queued)
+        assert record.exc_info is not None  # The caller's record is left alone
+        lines = stream.getvalue().splitlines()
+        assert lines[1] == "items ['first']"
+        assert lines[2] == "failed"
+        assert lines[-1] == "ValueError: boom"
+
+
+class TestEventSampler:
+    """Test per-event sampling."""
+
+    def test_listed_events_are_sampled(self, monkeypatch):
+        sampler = EventSampler({"hot": 0.25})
+        values = iter([0.1, 0.3, 0.9, 0.2])
+        monkeypatch.setattr("log_pipeline.random.random", lambda: next(values))
+
+        kept = 0
+        for _ in range(4):
+            try:
+                sampler(None, "debug", {"event": "hot"})
+                kept += 1
+            except structlog.DropEvent:
+                pass
+
+        assert kept == 2
+        assert sampler.sampled_out == 2
+
+    def test_errors_and_unlisted_info_are_never_sampled(self):
+        sampler = EventSampler({"hot": 0.0}, debug_rate=0.0)
+
+        assert sampler(None, "error", {"event": "hot"}) == {"event": "hot"}
+        assert sampler(None, "info", {"event": "other"}) == {"event": "other"}
+        with pytest.raises(structlog.DropEvent):
+            sampler(None, "debug", {"event": "other"})
+
+    def test_parse_sample_rates(self):
+        assert parse_sample_rates("a=0.5, b c=2 ,bad,=1") == {"a": 0.5, "b c": 1.0}
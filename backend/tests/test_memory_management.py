@@ -0,0 +1,92 @@
+"""Tests for byte-accurate response size limiting."""
+
+import pytest
+
+from memory_management import ResponseLimiter, limit_response_size
+
+NOTICE = "\n\n[Response truncated to 0.0MB]"
+
+
+class TestLimitResponseSize:
+    """Test truncation of complete responses to a UTF-8 byte budget."""
+
+    def test_responses_within_budget_are_returned_unchanged(self):
+        text = "Short answer."
+        assert limit_response_size(text, 100) is text
+        assert limit_response_size("", 1) == ""
+        # 25 four-byte characters is exactly 100 bytes
+        assert limit_response_size("😀" * 25, 100) == "😀" * 25
+
+    def test_budget_counts_encoded_bytes_not_characters(self):
+        # 40 characters, but 120 bytes of UTF-8
+        text = "中" * 40
+
+        limited = limit_response_size(text, 100)
+
+        assert len(limited.encode()) <= 100
+        assert limited.endswith(NOTICE)
+        assert limited == "中" * 23 + NOTICE
+
+    def test_cut_never_splits_a_codepoint(self):
+        text = "a" + "😀" * 50
+
+        for budget in range(40, 60):
+            limited = limit_response_size(text, budget)
+            body = limited.removesuffix(NOTICE)
+            assert len(limited.encode()) <= budget
+            assert text.startswith(body)
+
+    def test_cut_moves_back_to_a_sentence_end(self):
+        text = "First sentence here. Second one is longer and gets cut somewhere in the middle."
+
+        limited = limit_response_size(text, 70)
+
+        assert limited == "First sentence here." + NOTICE
+
+    def test_cut_falls_back_to_a_space(self):
+        text = "no sentence ends anywhere in this rather long run of words at all"
+
+        limited = limit_response_size(text, 50)
+
+        assert limited == "no sentence ends" + NOTICE
+
+    def test_default_budget_is_ten_megabytes(self):
+        text = "word " * (3 * 1024 * 1024)
+
+        limited = limit_response_size(text)
+
+        assert len(limited.encode()) <= 10 * 1024 * 1024
+        assert limited.endswith("[Response truncated to 10.0MB]")
+
+
+class TestResponseLimiter:
+    """Test the byte budget applied to streamed deltas."""
+
+    def test_deltas_pass_through_until_the_budget_is_spent(self):
+        limiter = ResponseLimiter(100)
+
+        assert limiter.feed("Hello ") == "Hello "
+        assert limiter.feed("world. ") == "world. "
+        assert not limiter.truncated
+        assert limiter.used == 13
+
+    def test_delta_over_the_budget_is_cut_and_ends_the_stream(self):
+        limiter = ResponseLimiter(60)
+        deltas = ["Twelve bytes", " and then ", "more words here", "x"]
+
+        kept = [limiter.feed(delta) for delta in deltas]
+
+        assert limiter.truncated
+        assert kept[:2] == ["Twelve bytes", " and then "]
+        assert kept[2] == "more" + NOTICE
+        assert kept[3] == ""
+        assert len("".join(kept).encode()) <= 60
+
+    @pytest.mark.parametrize("budget", [40, 41, 42, 43])
+    def test_streamed_text_never_exceeds_the_budget(self, budget):
+        limiter = ResponseLimiter(budget)
+
+        text = "".join(limiter.feed(delta) for delta in ["é😀中"] * 20)
+
+        assert len(text.encode()) <= budget
+        assert text.endswith(NOTICE)
@@ -0,0 +1,205 @@
+"""Tests for the Prometheus-style metrics registry and /metrics endpoint."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+import metrics
+from circuit_breaker import CircuitBreaker
+from llm_providers import analyze_with_models, get_circuit_breaker
+from metrics import (
+    BREAKER_TRANSITIONS,
+    LLM_CALL_DURATION,
+    LLM_CALL_ERRORS,
+    LLM_TOKENS,
+    LOG_QUEUE_DEPTH,
+    LOG_RECORDS,
+    RATE_LIMIT_REJECTIONS,
+    WORKFLOW_NODE_DURATION,
+    Counter,
+    Histogram,
+    MetricsRegistry,
+)
+from rate_limiting import RateLimiter, TokenRateLimiter
+from workflow_executor import WorkflowExecutor
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    """Start each test from empty series."""
+    metrics.registry.reset()
+    yield
+    metrics.registry.reset()
+
+
+def _histogram_count(histogram: Histogram, **labels: object) -> int:
+    key = tuple(str(labels.get(name, "")) for name in histogram.labelnames)
+    series = histogram._series.get(key)
+    return series.count if series else 0
+
+
+class TestRegistry:
+    """Test metric types and text rendering."""
+
+    def test_counter_renders_with_labels(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("jobs_total", "Jobs run", ("kind",))
+        counter.inc(kind="a")
+        counter.inc(2, kind="a")
+
+        text = registry.render()
+
+        assert "# TYPE jobs_total counter" in text
+        assert 'jobs_total{kind="a"} 3' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+        for value in (0.05, 0.5, 0.5, 5):
+            histogram.observe(value)
+
+        text = registry.render()
+
+        assert 'latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{le="1"} 3' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+        assert "latency_seconds_count 4" in text
+        assert "latency_seconds_sum 6.05" in text
+
+    def test_value_on_bucket_bound_counts_as_le(self):
+        histogram = Histogram("h", "h", buckets=(1,))
+        histogram.observe(1)
+
+        assert histogram._series[()].bucket_counts == [1, 0]
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.counter("c_total", "c", ("path",)).inc(path='a"b\\c\nd')
+
+        assert 'c_total{path="a\\"b\\\\c\\nd"} 1' in registry.render()
+
+    def test_series_past_cap_fold_into_overflow(self, monkeypatch):
+        monkeypatch.setattr(metrics, "MAX_SERIES_PER_METRIC", 2)
+        counter = Counter("c_total", "c", ("user",))
+        for user in ("a", "b", "c", "d"):
+            counter.inc(user=user)
+
+        assert counter.value(user="a") == 1
+        assert counter.value(user="c") == 0
+        assert counter.value(user=metrics.OVERFLOW_LABEL) == 2
+
+    def test_collectors_run_before_render(self):
+        registry = MetricsRegistry()
+        gauge = registry.gauge("queue_depth", "Depth")
+        registry.register_collector("depth", lambda: gauge.set(7))
+
+        assert "queue_depth 7" in registry.render()
+
+    def test_failing_collector_does_not_break_scrape(self):
+        registry = MetricsRegistry()
+        registry.counter("ok_total", "ok").inc()
+        registry.register_collector("broken", lambda: 1 / 0)
+
+        assert "ok_total 1" in registry.render()
+
+
+class TestInstrumentation:
+    """Test that the request path feeds the shared metrics."""
+
+    def test_metrics_endpoint_reports_request_latency_by_route(self, client):
+        client.get("/api/workflows/abc123/status")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert (
+            'http_request_duration_seconds_count{method="GET",'
+            'route="/api/workflows/{workflow_id}/status",status="200"} 1'
+        ) in response.text
+
+    def test_provider_calls_record_latency_errors_and_tokens(self):
+        with (
+            patch("llm_providers.call_openai", new_callable=AsyncMock) as mock_openai,
+            patch("llm_providers.call_claude", new_callable=AsyncMock) as mock_claude,
+        ):
+            mock_openai.return_value = {
+                "model": "openai",
+                "response": "ok",
+                "error": None,
+                "completion_tokens": 12,
+            }
+            mock_claude.return_value = {"model": "claude", "response": "", "error": "down"}
+
+            asyncio.run(
+                analyze_with_models(
+                    "Test text", openai_key="sk-openai", claude_key="sk-claude", ollama_model=None
+                )
+            )
+
+        openai = {"provider": "openai", "model": "gpt-3.5-turbo"}
+        claude = {"provider": "claude", "model": "claude-3-haiku-20240307"}
+        assert _histogram_count(LLM_CALL_DURATION, **openai) == 1
+        assert _histogram_count(LLM_CALL_DURATION, **claude) == 1
+        assert LLM_TOKENS.value(kind="completion", **openai) == 12
+        assert LLM_TOKENS.value(kind="prompt", **openai) > 0
+        assert LLM_CALL_ERRORS.value(**claude) == 1
+        assert LLM_CALL_ERRORS.value(**openai) == 0
+
+    def test_breaker_transitions_are_counted_per_provider(self):
+        breaker = get_circuit_breaker("gemini", "gemini-key")
+        breaker.open()
+        breaker.open()  # No transition
+        breaker.close()
+
+        assert BREAKER_TRANSITIONS.value(provider="gemini", state="open") == 1
+        assert BREAKER_TRANSITIONS.value(provider="gemini", state="closed") == 1
+
+    def test_breaker_listener_errors_are_contained(self):
+        breaker = CircuitBreaker(fail_max=1, on_state_change=lambda state: 1 / 0)
+
+        breaker.open()
+
+        assert breaker.current_state == "open"
+
+    def test_rate_limit_rejections_are_counted_by_window(self):
+        limiter = RateLimiter(requests_per_minute=1, burst_size=10)
+        limiter.check_rate_limit("client")
+        limiter.check_rate_limit("client")
+
+        tokens = TokenRateLimiter(tokens_per_minute=10, tokens_per_hour=1000)
+        tokens.check_tokens("key", 10)
+        tokens.check_tokens("key", 10)
+
+        assert RATE_LIMIT_REJECTIONS.value(limiter="requests", window="minute") == 1
+        assert RATE_LIMIT_REJECTIONS.value(limiter="tokens", window="minute") == 1
+
+    def test_log_pipeline_totals_are_counters_and_depth_a_gauge(self, monkeypatch):
+        import main
+
+        stats = {"written": 10, "dropped": {"DEBUG": 2}, "sampled_out": 3, "queued": 4}
+        monkeypatch.setattr(main, "get_log_pipeline_stats", lambda: stats)
+        monkeypatch.setattr(main, "_log_totals_seen", {})
+
+        main._collect_log_pipeline_metrics()
+        stats.update(written=15, queued=0)
+        main._collect_log_pipeline_metrics()
+        stats.update(written=2)  # Logging was reconfigured and its totals restarted
+        main._collect_log_pipeline_metrics()
+
+        assert LOG_RECORDS.value(outcome="written") == 17
+        assert LOG_RECORDS.value(outcome="dropped") == 2
+        assert LOG_RECORDS.value(outcome="sampled_out") == 3
+        assert LOG_QUEUE_DEPTH.value() == 0
+        assert "# TYPE log_records_total counter" in LOG_RECORDS.render()
+
+    def test_workflow_node_durations_by_type_and_status(self):
+        executor = WorkflowExecutor({})
+        asyncio.run(
+            executor._execute_node({"id": "1", "type": "input", "data": {"content": "x"}}, {}, [])
+        )
+        asyncio.run(executor._execute_node({"id": "2", "type": "bogus"}, {}, []))
+
+        assert _histogram_count(WORKFLOW_NODE_DURATION, node_type="input", status="success") == 1
+        assert _histogram_count(WORKFLOW_NODE_DURATION, node_type="unknown", status="error") == 1
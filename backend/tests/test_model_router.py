@@ -0,0 +1,209 @@
+"""Tests for provider failover and model routing."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from llm_providers import analyze_with_models, get_circuit_breaker
+from model_router import ModelRouter, Route, RoutingPolicy
+from timeout_handler import ResponseTimeTracker
+
+
+def _ok(route: Route) -> dict:
+    return {"model": route.label, "response": f"answer from {route.label}", "error": None}
+
+
+def _err(route: Route, error: str = "provider down") -> dict:
+    return {"model": route.label, "response": "", "error": error}
+
+
+class TestRoutingPolicy:
+    """Test policy parsing and candidate ranking."""
+
+    def test_from_spec_parses_fallbacks(self):
+        policy = RoutingPolicy.from_spec("openai=ollama/llama3.2, claude ; claude=openai")
+
+        assert policy.fallbacks == {
+            "openai": [Route("ollama", "llama3.2"), Route("claude")],
+            "claude": [Route("openai")],
+        }
+
+    def test_unsafe_model_names_are_not_echoed_in_labels(self):
+        assert Route("ollama", "llama3.2:latest").label == "ollama/llama3.2:latest"
+        assert Route("openai", "../../etc/passwd").label == "openai"
+        assert Route("openai", "<script>").operation == "llm:openai"
+
+    def test_empty_spec_has_no_fallbacks(self):
+        assert RoutingPolicy.from_spec("").fallbacks == {}
+
+    def test_candidates_skip_open_and_unavailable_routes(self):
+        router = ModelRouter(
+            RoutingPolicy.from_spec("openai=claude,gemini,ollama/llama3.2"),
+            tracker=ResponseTimeTracker(),
+        )
+        states = {"claude": "open", "gemini": "unavailable", "ollama": "closed"}
+
+        candidates = router.candidates(Route("openai"), lambda r: states[r.provider])
+
+        assert candidates == [Route("ollama", "llama3.2")]
+
+    def test_candidates_rank_by_latency_and_cost(self):
+        tracker = ResponseTimeTracker()
+        for _ in range(5):
+            tracker.record("llm:claude", 8.0)
+            tracker.record("llm:gemini", 1.0)
+        router = ModelRouter(RoutingPolicy.from_spec("openai=claude,gemini"), tracker=tracker)
+
+        candidates = router.candidates(Route("openai"), lambda r: "closed")
+
+        assert candidates == [Route("gemini"), Route("claude")]
+
+    def test_half_open_routes_rank_last(self):
+        router = ModelRouter(
+            RoutingPolicy.from_spec("openai=claude,grok"), tracker=ResponseTimeTracker()
+        )
+        states = {"claude": "half-open", "grok": "closed"}
+
+        candidates = router.candidates(Route("openai"), lambda r: states[r.provider])
+
+        assert candidates == [Route("grok"), Route("claude")]
+
+
+class TestModelRouterServe:
+    """Test failover while serving a route."""
+
+    def test_primary_success_is_not_failed_over(self):
+        tracker = ResponseTimeTracker()
+        router = ModelRouter(RoutingPolicy.from_spec("openai=claude"), tracker=tracker)
+        call = AsyncMock(side_effect=_ok)
+
+        result = asyncio.run(router.serve(Route("openai", "gpt-4"), call, lambda r: "closed"))
+
+        assert result["route"] == {
+            "requested": "openai/gpt-4",
+            "served_by": "openai/gpt-4",
+            "failover": False,
+            "attempts": [],
+        }
+        assert call.await_count == 1
+        assert tracker.get_histogram("llm:openai/gpt-4").count == 1
+
+    def test_only_routes_that_answered_are_tracked(self):
+        tracker = ResponseTimeTracker(max_operations=2)
+        router = ModelRouter(tracker=tracker)
+        asyncio.run(
+            router.serve(Route("openai", "gpt-4"), AsyncMock(side_effect=_ok), lambda r: "closed")
+        )
+
+        # Client-chosen model names the provider rejects never reach the tracker
+        for i in range(10):
+            route = Route("ollama", f"no-such-model-{i}")
+            asyncio.run(router.serve(route, AsyncMock(side_effect=_err), lambda r: "closed"))
+
+        assert list(tracker.operations) == ["llm:openai/gpt-4"]
+        assert tracker.evictions == 0
+
+    def test_error_fails_over_to_next_route(self):
+        router = ModelRouter(
+            RoutingPolicy.from_spec("openai=ollama/llama3.2"), tracker=ResponseTimeTracker()
+        )
+
+        async def call(route: Route) -> dict:
+            return _err(route) if route.provider == "openai" else _ok(route)
+
+        result = asyncio.run(router.serve(Route("openai"), call, lambda r: "closed"))
+
+        assert result["response"] == "answer from ollama/llama3.2"
+        assert result["route"]["served_by"] == "ollama/llama3.2"
+        assert result["route"]["failover"] is True
+        assert result["route"]["attempts"] == [{"route": "openai", "error": "provider down"}]
+
+    def test_open_primary_is_tried_last(self):
+        router = ModelRouter(
+            RoutingPolicy.from_spec("openai=claude"), tracker=ResponseTimeTracker()
+        )
+        called = []
+
+        async def call(route: Route) -> dict:
+            called.append(route.provider)
+            return _ok(route)
+
+        states = {"openai": "open", "claude": "closed"}
+        result = asyncio.run(router.serve(Route("openai"), call, lambda r: states[r.provider]))
+
+        assert called == ["claude"]
+        assert result["route"]["served_by"] == "claude"
+
+    def test_all_routes_failing_reports_primary_error(self):
+        router = ModelRouter(
+            RoutingPolicy.from_spec("openai=claude"), tracker=ResponseTimeTracker()
+        )
+
+        async def call(route: Route) -> dict:
+            return _err(route, f"{route.provider} down")
+
+        result = asyncio.run(router.serve(Route("openai"), call, lambda r: "closed"))
+
+        assert result["error"] == "openai down"
+        assert result["route"]["served_by"] is None
+        assert [a["route"] for a in result["route"]["attempts"]] == ["openai", "claude"]
+
+
+class TestAnalyzeWithFailover:
+    """Test analyze_with_models routing through the global router."""
+
+    async def _analyze(self, spec: str, **kwargs) -> list[dict]:
+        router = ModelRouter(RoutingPolicy.from_spec(spec), tracker=ResponseTimeTracker())
+        with patch("llm_providers.model_router", router):
+            return await analyze_with_models("Test text", **kwargs)
+
+    def test_open_breaker_fails_over_to_ollama(self):
+        get_circuit_breaker("openai", "openai-key").open()
+        ollama = {"model": "ollama/llama3.2", "response": "local answer", "error": None}
+
+        with (
+            patch("llm_providers.call_openai", new_callable=AsyncMock) as mock_openai,
+            patch("llm_providers.call_ollama_fixed", new_callable=AsyncMock) as mock_ollama,
+        ):
+            mock_openai.return_value = _err(Route("openai"), "circuit breaker open")
+            mock_ollama.return_value = ollama
+
+            results = asyncio.run(self._analyze("openai=ollama/llama3.2", openai_key="openai-key"))
+
+        mock_ollama.assert_awaited_once_with("Test text", "llama3.2")
+        mock_openai.assert_not_awaited()
+        assert results[0]["response"] == "local answer"
+        assert results[0]["route"]["requested"] == "openai/gpt-3.5-turbo"
+        assert results[0]["route"]["served_by"] == "ollama/llama3.2"
+
+    def test_cloud_fallback_needs_a_key_in_the_request(self):
+        with (
+            patch("llm_providers.call_openai", new_callable=AsyncMock) as mock_openai,
+            patch("llm_providers.call_claude", new_callable=AsyncMock) as mock_claude,
+        ):
+            mock_openai.return_value = _err(Route("openai"))
+
+            results = asyncio.run(self._analyze("openai=claude", openai_key="openai-key"))
+
+        mock_claude.assert_not_awaited()
+        assert results[0]["error"] == "provider down"
+        assert results[0]["route"]["served_by"] is None
+
+    def test_failed_over_result_keeps_the_requested_model(self):
+        claude = {"model": "claude", "response": "claude answer", "error": None}
+
+        with (
+            patch("llm_providers.call_openai", new_callable=AsyncMock) as mock_openai,
+            patch("llm_providers.call_claude", new_callable=AsyncMock) as mock_claude,
+        ):
+            mock_openai.return_value = _err(Route("openai"))
+            mock_claude.side_effect = lambda *args: dict(claude)
+
+            results = asyncio.run(
+                self._analyze("openai=claude", openai_key="openai-key", claude_key="claude-key")
+            )
+
+        # One entry per requested provider, even though Claude served both
+        assert [r["model"] for r in results] == ["openai", "claude"]
+        assert results[0]["served_by"] == "claude"
+        assert results[0]["route"]["failover"] is True
+        assert "served_by" not in results[1]
@@ -0,0 +1,756 @@
+"""Tests for the Ollama plugin's shared HTTP session."""
+
+import asyncio
+import json
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from memory_management import ResponseLimiter
+from metrics import OLLAMA_QUEUE_WAIT
+from plugins import ollama_provider
+from plugins.ollama_provider import (
+    ModelQueue,
+    ModelWarmer,
+    OllamaProvider,
+    QueueFullError,
+    QueueTimeoutError,
+    close_shared_session,
+    get_shared_session,
+    iter_ndjson,
+    ollama_catalog,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_catalog():
+    ollama_catalog.invalidate()
+    yield
+    ollama_catalog.invalidate()
+
+
+async def _start_fake_ollama(models=None, tag_requests=None):
+    """Start a local server answering /api/tags and /api/generate."""
+    peers = set()
+    models = ["llama2"] if models is None else models
+    tag_requests = [] if tag_requests is None else tag_requests
+
+    async def tags(request):
+        peers.add(request.transport.get_extra_info("peername"))
+        tag_requests.append(request)
+        return web.json_response({"models": [{"name": name, "size": 1} for name in models]})
+
+    async def generate(request):
+        peers.add(request.transport.get_extra_info("peername"))
+        body = await request.json()
+        return web.json_response({"response": f"echo: {body['prompt']}", "done": True})
+
+    app = web.Application()
+    app.router.add_get("/api/tags", tags)
+    app.router.add_post("/api/generate", generate)
+    server = TestServer(app)
+    await server.start_server()
+    return server, peers
+
+
+class TestSharedSession:
+    """Test that Ollama operations reuse one pooled session."""
+
+    def test_session_is_shared_and_tuned(self):
+        async def main():
+            try:
+                first = await get_shared_session()
+                async with OllamaProvider() as a, OllamaProvider() as b:
+                    assert a.session is first and b.session is first
+                # Leaving a provider's context leaves the shared session open
+                assert not first.closed
+                return first.connector
+            finally:
+                await close_shared_session()
+
+        connector = asyncio.run(main())
+
+        assert connector.limit_per_host == ollama_provider.OLLAMA_POOL_SIZE
+        assert connector.closed
+
+    def test_new_event_loop_gets_a_new_session(self):
+        async def session():
+            return await get_shared_session()
+
+        first = asyncio.run(session())
+        second = asyncio.run(session())
+        asyncio.run(close_shared_session())
+
+        assert first is not second
+        assert first.closed
+
+    def test_calls_reuse_one_connection(self):
+        async def main():
+            server, peers = await _start_fake_ollama()
+            base_url = str(server.make_url("")).rstrip("/")
+            try:
+                for _ in range(3):
+                    result = await ollama_provider.call_ollama("hi", base_url=base_url)
+                    assert result["response"] == "echo: hi"
+                    assert await OllamaProvider(base_url).list_models()
+            finally:
+                await close_shared_session()
+                await server.close()
+            return peers
+
+        # Nine sequential requests over a single kept-alive socket
+        assert len(asyncio.run(main())) == 1
+
+    def test_close_shared_session(self):
+        async def main():
+            session = await get_shared_session()
+            await close_shared_session()
+            await close_shared_session()  # Idempotent
+            return session
+
+        assert asyncio.run(main()).closed
+
+
+def _base_url(server) -> str:
+    return str(server.make_url("")).rstrip("/")
+
+
+class TestModelCatalog:
+    """Test the cached Ollama health and model catalog."""
+
+    def test_generate_calls_reuse_the_cached_catalog(self):
+        async def main():
+            tag_requests = []
+            server, _ = await _start_fake_ollama(tag_requests=tag_requests)
+            try:
+                for _ in range(5):
+                    result = await ollama_provider.call_ollama("hi", base_url=_base_url(server))
+                    assert result["error"] is None
+                health = await OllamaProvider(_base_url(server)).check_health()
+                assert health["models"] == ["llama2"]
+            finally:
+                await close_shared_session()
+                await server.close()
+            return tag_requests
+
+        assert len(asyncio.run(main())) == 1
+
+    def test_tagged_catalog_names_match_untagged_requests(self):
+        async def main():
+            tag_requests = []
+            server, _ = await _start_fake_ollama(["llama2:latest"], tag_requests)
+            try:
+                for _ in range(3):
+                    result = await ollama_provider.call_ollama("hi", base_url=_base_url(server))
+                    assert result["error"] is None
+            finally:
+                await close_shared_session()
+                await server.close()
+            return tag_requests
+
+        # "llama2" is "llama2:latest", so no call forces a refresh
+        assert len(asyncio.run(main())) == 1
+
+    def test_concurrent_lookups_share_one_request(self):
+        async def main():
+            tag_requests = []
+            server, _ = await _start_fake_ollama(tag_requests=tag_requests)
+            try:
+                entries = await asyncio.gather(
+                    *(ollama_catalog.get(_base_url(server)) for _ in range(10))
+                )
+            finally:
+                await close_shared_session()
+                await server.close()
+            return entries, tag_requests
+
+        entries, tag_requests = asyncio.run(main())
+        assert len(tag_requests) == 1
+        assert all(entry is entries[0] for entry in entries)
+
+    def test_stale_entry_is_served_while_refreshing(self, monkeypatch):
+        async def main():
+            models = ["llama2"]
+            server, _ = await _start_fake_ollama(models)
+            try:
+                first = await ollama_catalog.get(_base_url(server))
+                monkeypatch.setattr(ollama_catalog, "ttl", 0)
+                models.append("mistral")
+
+                stale = await ollama_catalog.get(_base_url(server))
+                await asyncio.sleep(0.2)  # Let the background refresh land
+                fresh = await ollama_catalog.get(_base_url(server))
+            finally:
+                await close_shared_session()
+                await server.close()
+            return first, stale, fresh
+
+        first, stale, fresh = asyncio.run(main())
+        assert stale is first
+        assert fresh.health["models"] == ["llama2", "mistral"]
+
+    def test_missing_model_triggers_one_refresh(self):
+        async def main():
+            models = ["llama2"]
+            tag_requests = []
+            server, _ = await _start_fake_ollama(models, tag_requests)
+            try:
+                await ollama_catalog.get(_base_url(server))
+                models.append("mistral")  # Pulled after the catalog was cached
+                result = await ollama_provider.call_ollama(
+                    "hi", model="mistral", base_url=_base_url(server)
+                )
+            finally:
+                await close_shared_session()
+                await server.close()
+            return result, tag_requests
+
+        result, tag_requests = asyncio.run(main())
+        assert result["error"] is None
+        assert len(tag_requests) == 2
+
+    def test_repeated_misses_refresh_once_per_ttl(self):
+        async def main():
+            tag_requests = []
+            server, _ = await _start_fake_ollama(["llama2"], tag_requests)
+            try:
+                for _ in range(5):
+                    result = await ollama_provider.call_ollama(
+                        "hi", model="mistral", base_url=_base_url(server)
+                    )
+                    assert "not found" in result["error"]
+            finally:
+                await close_shared_session()
+                await server.close()
+            return tag_requests
+
+        # The first fetch, then a single recheck for the missing model
+        assert len(asyncio.run(main())) == 2
+
+    def test_connection_error_invalidates_entry(self):
+        async def main():
+            server, _ = await _start_fake_ollama()
+            base_url = _base_url(server)
+            try:
+                await ollama_catalog.get(base_url)
+                await server.close()
+                result = await OllamaProvider(base_url).generate("hi")
+            finally:
+                await close_shared_session()
+            return base_url, result
+
+        base_url, result = asyncio.run(main())
+        assert "Cannot connect" in result["error"]
+        assert base_url not in ollama_catalog.get_stats()["entries"]
+
+    def test_offline_result_is_cached(self):
+        async def main():
+            first = await ollama_catalog.get("http://127.0.0.1:9")
+            second = await ollama_catalog.get("http://127.0.0.1:9")
+            await close_shared_session()
+            return first, second
+
+        first, second = asyncio.run(main())
+        assert first is second
+        assert first.health["status"] == "offline"
+
+    def test_background_refresh(self, monkeypatch):
+        async def main():
+            tag_requests = []
+            server, _ = await _start_fake_ollama(tag_requests=tag_requests)
+            try:
+                await ollama_catalog.get(_base_url(server))
+                monkeypatch.setattr(ollama_catalog, "refresh_interval", 0.05)
+                await ollama_catalog.start()
+                await asyncio.sleep(0.3)
+                await ollama_catalog.stop()
+            finally:
+                await close_shared_session()
+                await server.close()
+            return tag_requests
+
+        assert len(asyncio.run(main())) >= 3
+
+
+class _Chunks:
+    """Minimal stand-in for aiohttp's StreamReader."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def iter_any(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+async def _start_streaming_ollama(bodies, release=None):
+    """Serve /api/generate and /api/chat as NDJSON streams of "Hel", "lo", "!".
+
+    The server pauses after the first line until ``release`` is set, so
+    tests can check that it arrives before the response is complete.
+    """
+
+    async def stream(request):
+        body = await request.json()
+        bodies.append(body)
+        response = web.StreamResponse()
+        await response.prepare(request)
+        key = "message" if request.path == "/api/chat" else "response"
+        for i, part in enumerate(["Hel", "lo", "!"]):
+            value = {"role": "assistant", "content": part} if key == "message" else part
+            await response.write(json.dumps({key: value, "done": False}).encode() + b"\n")
+            if i == 0 and release is not None:
+                await release.wait()
+        final_value = "" if key == "response" else {"role": "assistant", "content": ""}
+        final = json.dumps({key: final_value, "done": True, "eval_count": 3})
+        # Split the last line across two writes
+        await response.write(final[:10].encode())
+        await response.write(final[10:].encode() + b"\n")
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_post("/api/generate", stream)
+    app.router.add_post("/api/chat", stream)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+class TestStreamingAndChat:
+    """Test incremental NDJSON streaming and the /api/chat path."""
+
+    def test_deltas_arrive_before_the_response_completes(self):
+        async def main():
+            release = asyncio.Event()
+            server = await _start_streaming_ollama([], release)
+            deltas = []
+            try:
+                provider = OllamaProvider(_base_url(server))
+                async for event in provider.stream_generate("hi"):
+                    deltas.append(event)
+                    release.set()  # The server only continues once we have the first token
+            finally:
+                await close_shared_session()
+                await server.close()
+            return deltas
+
+        events = asyncio.run(main())
+        assert [e["delta"] for e in events] == ["Hel", "lo", "!", ""]
+        assert events[-1]["done"] and events[-1]["metadata"]["eval_count"] == 3
+        assert events[-1]["metadata"]["time_to_first_token_ms"] is not None
+
+    def test_chat_sends_messages_options_and_keep_alive(self):
+        messages = [
+            {"role": "system", "content": "Be brief."},
+            {"role": "user", "content": "Hi"},
+        ]
+
+        async def main():
+            bodies = []
+            server = await _start_streaming_ollama(bodies)
+            try:
+                provider = OllamaProvider(_base_url(server))
+                result = await provider.chat(messages, stream=True, keep_alive="10m", max_tokens=50)
+            finally:
+                await close_shared_session()
+                await server.close()
+            return result, bodies
+
+        result, [body] = asyncio.run(main())
+        assert result["response"] == "Hello!"
+        assert result["error"] is None
+        assert body["messages"] == messages
+        assert body["keep_alive"] == "10m"
+        assert body["options"] == {"temperature": 0.7, "num_predict": 50}
+
+    def test_generate_with_stream_joins_chunks(self):
+        async def main():
+            server = await _start_streaming_ollama([])
+            try:
+                return await OllamaProvider(_base_url(server)).generate("hi", stream=True)
+            finally:
+                await close_shared_session()
+                await server.close()
+
+        assert asyncio.run(main())["response"] == "Hello!"
+
+    @pytest.mark.parametrize("stream", [True, False])
+    def test_generate_frees_its_queue_slot_on_return(self, stream):
+        async def main():
+            server = await _start_streaming_ollama([])
+            try:
+                result = await OllamaProvider(_base_url(server)).generate("hi", stream=stream)
+                return result, ollama_provider.ollama_queue.busy("llama2")
+            finally:
+                await close_shared_session()
+                await server.close()
+
+        result, busy = asyncio.run(main())
+        assert result["response"] == "Hello!"
+        assert not busy
+
+    def test_error_chunk_ends_the_stream(self):
+        async def error_stream(request):
+            return web.Response(text='{"error": "model not found"}\n')
+
+        async def main():
+            app = web.Application()
+            app.router.add_post("/api/generate", error_stream)
+            server = TestServer(app)
+            await server.start_server()
+            try:
+                provider = OllamaProvider(_base_url(server))
+                return [event async for event in provider.stream_generate("hi")]
+            finally:
+                await close_shared_session()
+                await server.close()
+
+        [event] = asyncio.run(main())
+        assert event["done"]
+        assert "model not found" in event["error"]
+
+    def test_truncated_stream_reports_an_error(self):
+        async def truncated(request):
+            return web.Response(text='{"response": "Hel", "done": false}\n')
+
+        async def main():
+            app = web.Application()
+            app.router.add_post("/api/generate", truncated)
+            server = TestServer(app)
+            await server.start_server()
+            try:
+                return await OllamaProvider(_base_url(server)).generate("hi", stream=True)
+            finally:
+                await close_shared_session()
+                await server.close()
+
+        assert "ended before completion" in asyncio.run(main())["error"]
+
+    @pytest.mark.parametrize("stream", [True, False])
+    def test_oversized_stream_stops_reading_at_the_byte_budget(self, monkeypatch, stream):
+        monkeypatch.setattr(ollama_provider, "ResponseLimiter", lambda: ResponseLimiter(200))
+        progress = {"lines": 0, "finished": False}
+
+        async def endless(request):
+            response = web.StreamResponse()
+            await response.prepare(request)
+            try:
+                for _ in range(10_000):
+                    line = {"response": "All work and no play. ", "done": False}
+                    await response.write(json.dumps(line).encode() + b"\n")
+                    progress["lines"] += 1
+                    await asyncio.sleep(0.001)
+                progress["finished"] = True
+            except ConnectionResetError:
+                pass
+            return response
+
+        async def main():
+            app = web.Application()
+            app.router.add_post("/api/generate", endless)
+            server = TestServer(app)
+            await server.start_server()
+            try:
+                return await OllamaProvider(_base_url(server)).generate("hi", stream=stream)
+            finally:
+                await close_shared_session()
+                await server.close()
+
+        result = asyncio.run(main())
+        assert result["error"] is None
+        assert result["metadata"]["truncated"]
+        assert len(result["response"].encode()) <= 200
+        assert result["response"].endswith("[Response truncated to 0.0MB]")
+        # Cut between words of the last delta, and long before the server finished
+        assert result["response"].startswith("All work and no play. All work")
+        assert "work and\n\n[Response" in result["response"]
+        assert not progress["finished"]
+
+    def test_ndjson_parser_buffer_is_bounded(self):
+        async def parse(chunks, limit):
+            return [item async for item in iter_ndjson(_Chunks(chunks), limit)]
+
+        assert asyncio.run(parse([b'{"a": 1}\n{"b"', b": 2}\n\n", b'{"c": 3}'], 64)) == [
+            {"a": 1},
+            {"b": 2},
+            {"c": 3},
+        ]
+        with pytest.raises(ValueError):
+            asyncio.run(parse([b'{"a": "' + b"x" * 100], 64))
+
+
+async def _start_stateful_ollama(installed, loaded, requests):
+    """Fake Ollama that tracks which models are loaded, with 1 GiB per model."""
+
+    async def tags(request):
+        return web.json_response({"models": [{"name": name} for name in installed]})
+
+    async def generate(request):
+        body = await request.json()
+        requests.append(body)
+        name = body["model"] if ":" in body["model"] else f"{body['model']}:latest"
+        if body.get("keep_alive") == 0:
+            loaded.pop(name, None)
+            return web.json_response({"done": True})
+        load_ns = 0 if name in loaded else 2_000_000_000
+        loaded[name] = 2**30
+        return web.json_response({"response": "ok", "done": True, "load_duration": load_ns})
+
+    async def ps(request):
+        return web.json_response(
+            {"models": [{"name": name, "size": size} for name, size in loaded.items()]}
+        )
+
+    app = web.Application()
+    app.router.add_get("/api/tags", tags)
+    app.router.add_post("/api/generate", generate)
+    app.router.add_get("/api/ps", ps)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+class TestModelWarmer:
+    """Test preloading, keep-alive pings and budget-driven eviction."""
+
+    def test_preloads_configured_models_and_tracks_load_time(self):
+        async def main():
+            loaded, requests = {}, []
+            server = await _start_stateful_ollama(["llama2:latest"], loaded, requests)
+            warmer = ModelWarmer(["llama2", "missing"], base_url=_base_url(server))
+            try:
+                await warmer.run_once()
+                await warmer.run_once()
+            finally:
+                await close_shared_session()
+                await server.close()
+            return warmer.get_stats(), loaded, requests
+
+        stats, loaded, requests = asyncio.run(main())
+        assert list(loaded) == ["llama2:latest"]
+        assert [r["model"] for r in requests] == ["llama2:latest", "llama2:latest"]
+        assert requests[0]["keep_alive"] == "10m"
+        model = stats["models"]["llama2:latest"]
+        assert model["cold_loads"] == 1  # The second ping found it resident
+        assert model["max_load_ms"] == 2000
+        assert model["uses"] == 0
+
+    def test_recently_used_models_are_kept_warm(self, monkeypatch):
+        warmer = ModelWarmer([], hot_window=60)
+        warmer.record_use("mistral", 3.0)
+        warmer.record_use("phi", 3.0)
+        monkeypatch.setattr(warmer._usage["phi:latest"], "last_used", -1000.0)
+
+        assert warmer.hot_models() == ["mistral:latest"]
+
+    def test_budget_unloads_least_recently_used_cold_models(self):
+        async def main():
+            loaded = {"pinned:latest": 2**30, "old:latest": 2**30, "unused:latest": 2**30}
+            requests = []
+            server = await _start_stateful_ollama(list(loaded), loaded, requests)
+            warmer = ModelWarmer(
+                ["pinned"], base_url=_base_url(server), hot_window=60, budget_mb=1024
+            )
+            warmer.record_use("old", 0)
+            warmer._usage["old:latest"].last_used -= 120  # Used, but outside the hot window
+            try:
+                evicted = await warmer.enforce_budget()
+            finally:
+                await close_shared_session()
+                await server.close()
+            return evicted, loaded
+
+        evicted, loaded = asyncio.run(main())
+        assert evicted == ["unused:latest", "old:latest"]
+        assert list(loaded) == ["pinned:latest"]
+
+    def test_budget_skips_models_with_queued_requests(self, monkeypatch):
+        queue = ModelQueue()
+        monkeypatch.setattr(ollama_provider, "ollama_queue", queue)
+
+        async def main():
+            loaded = {"busy:latest": 2**30, "idle:latest": 2**30}
+            server = await _start_stateful_ollama(list(loaded), loaded, [])
+            warmer = ModelWarmer([], base_url=_base_url(server), budget_mb=512)
+            try:
+                # First request still running, so it hasn't recorded a use yet
+                async with queue.slot("busy"):
+                    evicted = await warmer.enforce_budget()
+            finally:
+                await close_shared_session()
+                await server.close()
+            return evicted, loaded
+
+        evicted, loaded = asyncio.run(main())
+        assert evicted == ["idle:latest"]
+        assert list(loaded) == ["busy:latest"]
+
+    def test_provider_calls_record_model_use(self, monkeypatch):
+        warmer = ModelWarmer([])
+        monkeypatch.setattr(ollama_provider, "model_warmer", warmer)
+
+        async def main():
+            server = await _start_stateful_ollama(["llama2:latest"], {}, [])
+            try:
+                return await OllamaProvider(_base_url(server)).generate("hi")
+            finally:
+                await close_shared_session()
+                await server.close()
+
+        assert asyncio.run(main())["metadata"]["load_duration_ms"] == 2000
+        assert warmer.get_stats()["models"]["llama2:latest"]["uses"] == 1
+        assert warmer.hot_models() == ["llama2:latest"]
+
+
+class TestModelQueue:
+    """Test model-affinity ordering, concurrency limits and fairness."""
+
+    @staticmethod
+    async def _run(queue, models, hold=0.01):
+        """Submit requests in order and return the order in which they ran."""
+        order = []
+
+        async def request(i, model):
+            async with queue.slot(model):
+                order.append(f"{model}{i}")
+                await asyncio.sleep(hold)
+
+        tasks = []
+        for i, model in enumerate(models):
+            tasks.append(asyncio.create_task(request(i, model)))
+            await asyncio.sleep(0)  # Enqueue in submission order
+        await asyncio.gather(*tasks)
+        return order
+
+    def test_groups_requests_by_model(self):
+        queue = ModelQueue(max_models=1, per_model=1, max_batch=8)
+        order = asyncio.run(self._run(queue, ["a", "b", "a", "b", "a"]))
+
+        assert order == ["a0", "a2", "a4", "b1", "b3"]
+        assert queue.switches == 1
+
+    def test_batch_limit_lets_other_models_run(self):
+        queue = ModelQueue(max_models=1, per_model=1, max_batch=2)
+        order = asyncio.run(self._run(queue, ["a", "b", "a", "a", "a"]))
+
+        assert order == ["a0", "a2", "b1", "a3", "a4"]
+
+    def test_concurrency_limits(self):
+        queue = ModelQueue(max_models=2, per_model=2)
+        peak = {"total": 0, "a": 0}
+        running = {"total": 0, "a": 0}
+
+        async def request(model):
+            async with queue.slot(model):
+                running["total"] += 1
+                running[model] = running.get(model, 0) + 1
+                peak["total"] = max(peak["total"], running["total"])
+                peak["a"] = max(peak["a"], running["a"])
+                await asyncio.sleep(0.01)
+                running["total"] -= 1
+                running[model] -= 1
+
+        async def main():
+            await asyncio.gather(*(request(m) for m in ["a"] * 5 + ["b"] * 5 + ["c"] * 5))
+
+        asyncio.run(main())
+        assert peak == {"total": 4, "a": 2}
+
+    def test_cancelled_waiters_release_their_place(self):
+        queue = ModelQueue(max_models=1, per_model=1)
+
+        async def main():
+            release = asyncio.Event()
+
+            async def hold():
+                async with queue.slot("a"):
+                    await release.wait()
+
+            holder = asyncio.create_task(hold())
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(self._run(queue, ["b"]))
+            await asyncio.sleep(0.01)
+            waiter.cancel()
+            release.set()
+            await holder
+            return await self._run(queue, ["c"])
+
+        assert asyncio.run(main()) == ["c0"]
+        stats = queue.get_stats()["models"]
+        assert all(m["waiting"] == 0 and m["running"] == 0 for m in stats.values())
+        assert stats["b:latest"]["served"] == 0
+
+    def test_wait_time_is_recorded(self):
+        queue = ModelQueue(max_models=1, per_model=1)
+        before = OLLAMA_QUEUE_WAIT._series.get(("q:latest",))
+        asyncio.run(self._run(queue, ["q", "q"]))
+
+        series = OLLAMA_QUEUE_WAIT._series[("q:latest",)]
+        assert series.count - (before.count if before else 0) == 2
+
+    def test_distinct_models_run_concurrently_by_default(self):
+        queue = ModelQueue(per_model=1)
+        running = []
+
+        async def request(model):
+            async with queue.slot(model):
+                running.append(model)
+                await asyncio.sleep(0.01)
+                return len(running)
+
+        async def main():
+            return await asyncio.gather(*(request(m) for m in "abc"))
+
+        # Each request saw all three running
+        assert asyncio.run(main()) == [3, 3, 3]
+
+    def test_wait_is_bounded_by_the_queue_timeout(self):
+        queue = ModelQueue(max_models=1, per_model=1, timeout=0.01)
+
+        async def main():
+            async with queue.slot("a"):
+                with pytest.raises(QueueTimeoutError):
+                    async with queue.slot("b"):
+                        pass
+
+        asyncio.run(main())
+        assert queue.get_stats()["models"]["b:latest"]["waiting"] == 0
+        assert not queue.busy("a") and not queue.busy("b")
+
+    def test_waiting_requests_are_capped_per_model(self):
+        queue = ModelQueue(max_models=1, per_model=1, max_waiting=2)
+
+        async def main():
+            release = asyncio.Event()
+
+            async def hold(model):
+                async with queue.slot(model):
+                    await release.wait()
+
+            tasks = [asyncio.create_task(hold(m)) for m in ("a", "b", "b")]
+            await asyncio.sleep(0.01)
+            with pytest.raises(QueueFullError):
+                async with queue.slot("b"):
+                    pass
+            release.set()
+            await asyncio.gather(*tasks)
+
+        asyncio.run(main())
+        assert queue.get_stats()["models"]["b:latest"]["served"] == 2
+
+    def test_provider_returns_an_error_when_the_queue_times_out(self, monkeypatch):
+        queue = ModelQueue(max_models=1, per_model=1, timeout=0.01)
+        monkeypatch.setattr(ollama_provider, "ollama_queue", queue)
+
+        async def main():
+            try:
+                async with queue.slot("other"):
+                    return await OllamaProvider("http://127.0.0.1:9").generate("hi")
+            finally:
+                await close_shared_session()
+
+        result = asyncio.run(main())
+        assert result["response"] == ""
+        assert result["error"].startswith("Ollama is busy: Waited more than 0.01s")
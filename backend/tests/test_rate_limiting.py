@@ -0,0 +1,546 @@
+"""Tests for the sliding-window rate limiter."""
+
+from rate_limiting import RateLimiter, SlidingWindowCounter
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self, start: float = 1_000_000.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+class TestSlidingWindowCounter:
+    """Test the ring-buffer window counter."""
+
+    def test_counts_events_within_window(self):
+        counter = SlidingWindowCounter(60, 1)
+        for second in range(10):
+            counter.add(1000 + second)
+
+        assert counter.count(1009) == 10
+
+    def test_expires_buckets_outside_window(self):
+        counter = SlidingWindowCounter(60, 1)
+        counter.add(1000)
+        counter.add(1030)
+
+        assert counter.count(1059) == 2
+        assert counter.count(1060) == 1  # Bucket for t=1000 has expired
+        assert counter.count(1090) == 0
+
+    def test_large_time_jump_clears_everything(self):
+        counter = SlidingWindowCounter(288, 300)
+        counter.add(0, amount=50)
+
+        assert counter.count(10 * 86400) == 0
+        assert list(counter.counts) == [0] * 288
+
+    def test_retry_after_tracks_oldest_bucket(self):
+        counter = SlidingWindowCounter(60, 1)
+        counter.add(1000)
+        assert counter.retry_after(1010) == 50
+
+        counter.add(1020)
+        assert counter.retry_after(1060) == 20
+
+
+class TestRateLimiter:
+    """Test limit semantics of RateLimiter with a controlled clock."""
+
+    def test_minute_limit_enforced_and_recovers(self):
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=3, burst_size=100, clock=clock)
+
+        for _ in range(3):
+            assert limiter.check_rate_limit("user") == (True, None)
+
+        allowed, retry_after = limiter.check_rate_limit("user")
+        assert not allowed
+        assert 0 < retry_after <= 60
+
+        clock.advance(61)
+        assert limiter.check_rate_limit("user") == (True, None)
+
+    def test_hour_limit_enforced_across_minutes(self):
+        clock = FakeClock()
+        limiter = RateLimiter(
+            requests_per_minute=100, requests_per_hour=5, burst_size=100, clock=clock
+        )
+
+        for _ in range(5):
+            assert limiter.check_rate_limit("user")[0]
+            clock.advance(61)
+
+        allowed, retry_after = limiter.check_rate_limit("user")
+        assert not allowed
+        assert 60 < retry_after <= 3600
+
+    def test_day_limit_enforced(self):
+        clock = FakeClock()
+        limiter = RateLimiter(
+            requests_per_minute=100,
+            requests_per_hour=100,
+            requests_per_day=2,
+            burst_size=100,
+            clock=clock,
+        )
+
+        assert limiter.check_rate_limit("user")[0]
+        clock.advance(7200)
+        assert limiter.check_rate_limit("user")[0]
+        clock.advance(7200)
+
+        allowed, retry_after = limiter.check_rate_limit("user")
+        assert not allowed
+        assert 3600 < retry_after <= 86400
+
+    def test_day_window_expires_requests_within_five_minutes_of_a_day(self):
+        clock = FakeClock()
+        limiter = RateLimiter(
+            requests_per_minute=100,
+            requests_per_hour=100,
+            requests_per_day=1,
+            burst_size=100,
+            clock=clock,
+        )
+
+        assert limiter.check_rate_limit("user")[0]
+        clock.advance(86_100)  # 23h55m later the request still counts
+
+        allowed, retry_after = limiter.check_rate_limit("user")
+        assert not allowed
+        assert retry_after <= 300
+
+        clock.advance(300)
+        assert limiter.check_rate_limit("user")[0]
+
+    def test_burst_tokens_replenish_over_time(self):
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=60, burst_size=2, clock=clock)
+
+        assert limiter.check_rate_limit("user")[0]
+        assert limiter.check_rate_limit("user")[0]
+        assert limiter.check_rate_limit("user") == (False, 60)
+
+        clock.advance(1)  # 60/min refills one token per second
+        assert limiter.check_rate_limit("user")[0]
+
+    def test_remaining_and_reset(self):
+        clock = FakeClock()
+        limiter = RateLimiter(requests_per_minute=10, burst_size=100, clock=clock)
+
+        assert limiter.remaining("user") == 10
+        limiter.check_rate_limit("user")
+        limiter.check_rate_limit("user")
+        assert limiter.remaining("user") == 8
+
+        limiter.reset()
+        assert limiter.get_stats()["tracked_identifiers"] == 0
+        assert limiter.remaining("user") == 10
+
+
+class TestIdentifierEviction:
+    """Test bounded memory for tracked identifiers."""
+
+    def test_lru_cap_evicts_least_recently_used(self):
+        clock = FakeClock()
+        limiter = RateLimiter(max_identifiers=3, num_shards=1, clock=clock)
+
+        for identifier in ("a", "b", "c"):
+            limiter.check_rate_limit(identifier)
+        limiter.check_rate_limit("a")  # Touch "a" so "b" becomes the oldest
+        limiter.check_rate_limit("d")
+
+        assert list(limiter.shards[0].states) == ["c", "a", "d"]
+        assert limiter.get_stats()["lru_evictions"] == 1
+        assert limiter.get_stats()["tracked_identifiers"] == 3
+
+    def test_sweep_removes_only_fully_expired_identifiers(self):
+        clock = FakeClock()
+        limiter = RateLimiter(clock=clock)
+
+        limiter.check_rate_limit("idle")
+        clock.advance(86400)
+        limiter.check_rate_limit("active")
+
+        assert limiter.sweep_expired() == 1
+        assert limiter.get_stats()["tracked_identifiers"] == 1
+        assert limiter.remaining("active") == limiter.requests_per_minute - 1
+        assert limiter.get_stats()["expired_evictions"] == 1
+
+    def test_memory_manager_runs_registered_sweep(self):
+        from memory_management import MemoryManager
+
+        clock = FakeClock()
+        limiter = RateLimiter(clock=clock)
+        limiter.check_rate_limit("idle")
+        clock.advance(86400)
+
+        manager = MemoryManager()
+        manager.register_cleanup("rate_limiter", limiter.sweep_expired)
+        manager.cleanup_memory()
+
+        assert limiter.get_stats()["tracked_identifiers"] == 0
+
+    def test_memory_endpoint_reports_rate_limiter_gauges(self, client):
+        response = client.get("/api/memory")
+
+        assert response.status_code == 200
+        stats = response.json()["rate_limiter"]
+        assert set(stats) == {
+            "tracked_identifiers",
+            "max_identifiers",
+            "shards",
+            "lru_evictions",
+            "expired_evictions",
+        }
+
+
+class TestSharedStore:
+    """Test limits shared across limiter instances through a SQLite store."""
+
+    def _store(self, tmp_path, clock):
+        from rate_limit_store import SQLiteRateLimitStore
+
+        return SQLiteRateLimitStore(str(tmp_path / "limits.db"), clock=clock)
+
+    def test_limit_holds_across_workers(self, tmp_path):
+        clock = FakeClock()
+        workers = [
+            RateLimiter(
+                requests_per_minute=10,
+                burst_size=100,
+                store=self._store(tmp_path, clock),
+                lease_size=3,
+                clock=clock,
+            )
+            for _ in range(3)
+        ]
+
+        # Permits are charged to the store before they are handed out, so
+        # the workers together never exceed the limit within one window
+        results = [w.check_rate_limit("shared-user")[0] for w in workers for _ in range(5)]
+        assert results.count(True) <= 10
+        assert results.count(True) >= 10 - 3 * 2  # At most lease_size - 1 idle per worker
+
+        # Once leases expire their unused permits return to the pool
+        clock.advance(2)
+        for worker in workers:
+            state = worker._shard_for("shared-user").states["shared-user"]
+            worker._release_lease("shared-user", state)
+        total = sum(w.check_rate_limit("shared-user")[0] for w in workers for _ in range(5))
+        assert results.count(True) + total == 10
+
+    def test_rejection_reports_retry_after(self, tmp_path):
+        clock = FakeClock()
+        limiter = RateLimiter(
+            requests_per_minute=2,
+            burst_size=100,
+            store=self._store(tmp_path, clock),
+            clock=clock,
+        )
+
+        assert limiter.check_rate_limit("user")[0]
+        assert limiter.check_rate_limit("user")[0]
+        allowed, retry_after = limiter.check_rate_limit("user")
+
+        assert not allowed
+        assert 0 < retry_after <= 60
+
+    def test_zero_limit_rejects_without_recorded_requests(self, tmp_path):
+        clock = FakeClock()
+        limiter = RateLimiter(
+            requests_per_minute=0,
+            burst_size=100,
+            store=self._store(tmp_path, clock),
+            clock=clock,
+        )
+
+        assert limiter.check_rate_limit("user") == (False, 1)
+
+    def test_windows_are_not_counted_locally(self, tmp_path):
+        clock = FakeClock()
+        limiter = RateLimiter(burst_size=100, store=self._store(tmp_path, clock), clock=clock)
+
+        assert limiter.check_rate_limit("user")[0]
+
+        state = limiter._shard_for("user").states["user"]
+        assert state.minute is None
+        assert state.hour is None
+        assert state.day is None
+
+    def test_expired_lease_is_refunded(self, tmp_path):
+        clock = FakeClock()
+        store = self._store(tmp_path, clock)
+        worker_a = RateLimiter(
+            requests_per_minute=5, burst_size=100, store=store, lease_size=5, clock=clock
+        )
+        worker_b = RateLimiter(
+            requests_per_minute=5, burst_size=100, store=store, lease_size=5, clock=clock
+        )
+
+        assert worker_a.check_rate_limit("user")[0]  # Leases all 5 permits
+        assert not worker_b.check_rate_limit("user")[0]
+
+        clock.advance(2)
+        worker_a.sweep_expired()  # Not idle long enough to drop, lease stays
+        worker_a.check_rate_limit("user")  # Renewal refunds the 4 unused permits
+
+        assert store.count("user") <= 5
+        # The 3 permits still leased to this worker, read without a store query
+        store.count = None
+        assert worker_a.remaining("user") == 3
+
+    def test_async_check_runs_store_queries_off_the_event_loop(self, tmp_path):
+        import asyncio
+        import threading
+
+        clock = FakeClock()
+        store = self._store(tmp_path, clock)
+        limiter = RateLimiter(requests_per_minute=2, burst_size=100, store=store, clock=clock)
+        reserve = store.reserve
+        threads = []
+
+        def recording_reserve(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return reserve(*args, **kwargs)
+
+        store.reserve = recording_reserve
+
+        async def run_checks():
+            return [await limiter.check_rate_limit_async("user") for _ in range(3)]
+
+        results = asyncio.run(run_checks())
+
+        assert [allowed for allowed, _ in results] == [True, True, False]
+        assert threads
+        assert threading.main_thread() not in threads
+
+    def test_store_interface_is_abstract(self):
+        import pytest
+
+        from rate_limit_store import RateLimitStore
+
+        class Partial(RateLimitStore):
+            def count(self, identifier, window="minute"):
+                return 0
+
+        with pytest.raises(TypeError):
+            Partial()
+
+
+class TestTokenRateLimiter:
+    """Test token-cost limits per hashed API key."""
+
+    def test_large_requests_drain_budget_and_report_refill_time(self):
+        from rate_limiting import TokenRateLimiter
+
+        clock = FakeClock()
+        limiter = TokenRateLimiter(tokens_per_minute=6000, clock=clock)
+
+        assert limiter.check_tokens("key", 5000) == (True, None)
+        allowed, retry_after = limiter.check_tokens("key", 3000)
+
+        # 2000 tokens short at 100 tokens/second
+        assert not allowed
+        assert retry_after == 20
+
+        clock.advance(20)
+        assert limiter.check_tokens("key", 3000) == (True, None)
+
+    def test_keys_are_isolated(self):
+        from rate_limiting import TokenRateLimiter
+
+        limiter = TokenRateLimiter(tokens_per_minute=1000, clock=FakeClock())
+
+        assert limiter.check_tokens("heavy", 1000)[0]
+        assert not limiter.check_tokens("heavy", 10)[0]
+        assert limiter.check_tokens("light", 10)[0]
+
+    def test_completion_charge_delays_next_request(self):
+        from rate_limiting import TokenRateLimiter
+
+        clock = FakeClock()
+        limiter = TokenRateLimiter(tokens_per_minute=600, clock=clock)
+
+        assert limiter.check_tokens("key", 100)[0]
+        limiter.charge("key", 800)  # Balance is now -300
+
+        allowed, retry_after = limiter.check_tokens("key", 100)
+        assert not allowed
+        assert retry_after == 40
+
+    def test_oversized_request_admitted_when_bucket_full(self):
+        from rate_limiting import TokenRateLimiter
+
+        limiter = TokenRateLimiter(tokens_per_minute=1000, clock=FakeClock())
+
+        assert limiter.check_tokens("key", 50_000)[0]
+        assert not limiter.check_tokens("key", 1)[0]  # Charged the full 1000
+
+    def test_hour_window_limit(self):
+        from rate_limiting import TokenRateLimiter
+
+        clock = FakeClock()
+        limiter = TokenRateLimiter(tokens_per_minute=1000, tokens_per_hour=2500, clock=clock)
+
+        for _ in range(2):
+            assert limiter.check_tokens("key", 1000)[0]
+            clock.advance(60)
+
+        allowed, retry_after = limiter.check_tokens("key", 1000)
+        assert not allowed
+        assert retry_after > 60
+        assert limiter.get_stats()["rejections"] == 1
+
+    def test_sweep_drops_idle_keys(self):
+        from rate_limiting import TokenRateLimiter
+
+        clock = FakeClock()
+        limiter = TokenRateLimiter(tokens_per_minute=1000, clock=clock)
+        limiter.check_tokens("key", 500)
+
+        assert limiter.sweep_expired() == 0
+        clock.advance(3600)
+        assert limiter.sweep_expired() == 1
+        assert limiter.get_stats()["tracked_keys"] == 0
+
+    def test_all_keys_are_checked_before_any_is_charged(self):
+        from rate_limiting import TokenRateLimiter
+
+        limiter = TokenRateLimiter(tokens_per_minute=1000, clock=FakeClock())
+        assert limiter.check_tokens("drained", 1000)[0]
+
+        allowed, retry_after = limiter.check_tokens_all(["fresh", "drained"], 600)
+
+        assert not allowed
+        assert retry_after == 36
+        # "fresh" was not charged for the rejected request
+        assert limiter.check_tokens("fresh", 1000) == (True, None)
+
+    def test_analyze_returns_429_with_retry_after(self, client, monkeypatch, token_limits):
+        async def fake_analyze(*args, **kwargs):
+            return [{"model": "openai", "response": "ok", "error": None}]
+
+        monkeypatch.setattr("llm_providers.analyze_with_models", fake_analyze)
+
+        payload = {"text": "word " * 200, "openai_key": "sk-test-token-budget"}
+        assert client.post("/api/analyze", json=payload).status_code == 200
+
+        response = client.post("/api/analyze", json=payload)
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) > 0
+
+    def test_rejected_analyze_leaves_other_keys_uncharged(self, client, monkeypatch, token_limits):
+        from rate_limiting import hash_api_key
+
+        async def fake_analyze(*args, **kwargs):
+            return [{"model": "openai", "response": "", "error": "not called"}]
+
+        monkeypatch.setattr("llm_providers.analyze_with_models", fake_analyze)
+        token_limits.check_tokens(hash_api_key("sk-claude-drained"), 60)
+
+        payload = {
+            "text": "word " * 20,
+            "openai_key": "sk-openai-fresh",
+            "claude_key": "sk-claude-drained",
+        }
+        response = client.post("/api/analyze", json=payload)
+
+        assert response.status_code == 429
+        assert "Retry-After" in response.headers
+        assert token_limits.check_tokens(hash_api_key("sk-openai-fresh"), 60) == (True, None)
+
+    def test_failed_over_answer_is_charged_to_the_serving_key(
+        self, client, monkeypatch, token_limits
+    ):
+        from rate_limiting import hash_api_key
+
+        async def fake_analyze(*args, **kwargs):
+            return [
+                {
+                    "model": "openai",
+                    "served_by": "claude",
+                    "response": "answer from claude",
+                    "completion_tokens": 7,
+                    "error": None,
+                },
+                {"model": "claude", "response": "", "error": "rate limited"},
+            ]
+
+        charged = []
+        monkeypatch.setattr("llm_providers.analyze_with_models", fake_analyze)
+        monkeypatch.setattr(
+            token_limits, "charge", lambda key_id, tokens: charged.append((key_id, tokens))
+        )
+
+        payload = {
+            "text": "word " * 20,
+            "openai_key": "sk-openai-requested",
+            "claude_key": "sk-claude-serving",
+        }
+        assert client.post("/api/analyze", json=payload).status_code == 200
+
+        assert charged == [(hash_api_key("sk-claude-serving"), 7)]
+
+
+class TestShardedConcurrency:
+    """Test exact limit enforcement under concurrent checks."""
+
+    def test_threads_admit_exactly_the_limit(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        limiter = RateLimiter(
+            requests_per_minute=50, requests_per_hour=10**6, burst_size=10**6, num_shards=4
+        )
+        identifiers = [f"user-{i}" for i in range(20)]
+
+        def hammer(identifier: str) -> int:
+            return sum(limiter.check_rate_limit(identifier)[0] for _ in range(100))
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            # Four threads per identifier race for the same 50 permits
+            admitted = list(executor.map(hammer, identifiers * 4))
+
+        per_identifier = dict.fromkeys(identifiers, 0)
+        for identifier, count in zip(identifiers * 4, admitted, strict=True):
+            per_identifier[identifier] += count
+        assert set(per_identifier.values()) == {50}
+
+    def test_to_thread_checks_are_exact(self):
+        import asyncio
+
+        limiter = RateLimiter(requests_per_minute=30, burst_size=10**6)
+
+        async def run_checks():
+            return await asyncio.gather(
+                *(asyncio.to_thread(limiter.check_rate_limit, "shared") for _ in range(200))
+            )
+
+        results = asyncio.run(run_checks())
+
+        assert sum(allowed for allowed, _ in results) == 30
+
+    def test_token_checks_from_threads_never_overspend(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        from rate_limiting import TokenRateLimiter
+
+        limiter = TokenRateLimiter(tokens_per_minute=1000, clock=FakeClock(), num_shards=2)
+
+        def spend(_: int) -> int:
+            return sum(limiter.check_tokens("shared", 10)[0] for _ in range(50))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            admitted = sum(executor.map(spend, range(8)))
+
+        # 100 checks of 10 tokens fit in the bucket; the clock doesn't move
+        assert admitted == 100
+        assert limiter.get_stats()["rejections"] == 300
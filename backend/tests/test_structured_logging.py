@@ -1,5 +1,6 @@
 """Tests for structured logging module."""
 
+from typing import ClassVar
 from unittest.mock import MagicMock, patch
 
 from structured_logging import (
@@ -139,3 +140,132 @@ class TestStructuredLogging:
         mock_logger.warning.assert_called_once_with(
             "circuit_breaker", breaker_name="OpenAI API", state="open", fail_count=5
         )
+
+
+class TestSanitizerFastPath:
+    """Test that the fast-path sanitizer matches applying every pattern."""
+
+    FRAGMENTS: ClassVar[list[str]] = [
+        "plain text ",
+        "sk-",
+        "sk-ant-",
+        "sk-proj-",
+        "abcd1234EFGH5678ijkl",
+        "api_key=",
+        "API-KEY: '",
+        "Bearer ",
+        "password=",
+        "AKIA",
+        "ABCDEFGHIJKLMNOP",
+        "AIza",
+        "x" * 35,
+        '"',
+        " ",
+        "-_",
+        "key",
+        "apikey ",
+        "\u017fk-",  # LONG S, folds to "s" under re.IGNORECASE
+        "api_\u212aey=",  # KELVIN SIGN
+        "ap\u0130_key=",  # DOTTED CAPITAL I
+        "p\u0131assword:",
+        "pa\u017f\u017fword: ",
+        "BEARER\t",
+    ]
+
+    def test_matches_full_redaction_on_random_strings(self):
+        import random
+
+        from structured_logging import _redact, _sanitize_string
+
+        rng = random.Random(1234)  # noqa: S311 - seeded test data
+        for _ in range(20000):
+            text = "".join(rng.choice(self.FRAGMENTS) for _ in range(rng.randint(1, 6)))
+            assert _sanitize_string(text) == _redact(text), text
+
+    def test_case_folded_secrets_are_redacted(self):
+        from structured_logging import sanitize_value
+
+        assert sanitize_value("pa\u017f\u017fword: hunter2") == "pa\u017f\u017fword: ***"
+        assert sanitize_value("AP\u0130_KEY=" + "a" * 24) == "AP\u0130_KEY=***"
+
+    def test_redacted_strings_are_not_cached(self):
+        from structured_logging import _clean_strings, sanitize_value
+
+        secret = "sk-abcdefghijklmnop1234"
+        assert sanitize_value(secret) == "***REDACTED***"
+        assert secret not in _clean_strings
+
+        assert sanitize_value("Executing node") == "Executing node"
+        assert "Executing node" in _clean_strings
+
+
+class TestRequestContextPropagation:
+    """Test that request context reaches every log line of a request."""
+
+    def _logged_events(self, tmp_path, monkeypatch, log_calls):
+        import json
+
+        from structured_logging import flush_logs
+
+        monkeypatch.setenv("LOG_CALLSITE_LEVELS", "error")
+        log_file = tmp_path / "ctx.log"
+        setup_structured_logging("DEBUG", str(log_file))
+        log_calls(get_logger("ctx_test"))
+        flush_logs()
+        return [json.loads(line) for line in log_file.read_text().splitlines()]
+
+    def test_request_id_reaches_gathered_tasks_and_threads(self, tmp_path, monkeypatch):
+        import asyncio
+
+        def log_calls(logger):
+            async def handler():
+                async def task(n):
+                    logger.info("in task", n=n)
+
+                await asyncio.gather(task(1), task(2))
+                await asyncio.to_thread(logger.info, "in thread")
+
+            with RequestContext("req-42", route="/api/analyze"):
+                asyncio.run(handler())
+            logger.info("after request")
+
+        logged = self._logged_events(tmp_path, monkeypatch, log_calls)
+        events = {e["event"] + str(e.get("n", "")): e for e in logged}
+
+        for name in ("in task1", "in task2", "in thread"):
+            assert events[name]["request_id"] == "req-42"
+            assert events[name]["route"] == "/api/analyze"
+        assert "request_id" not in events["after request"]
+
+    def test_nested_context_restores_outer_request_id(self):
+        from structured_logging import get_request_id
+
+        with RequestContext("outer"):
+            with RequestContext("inner"):
+                assert get_request_id() == "inner"
+            assert get_request_id() == "outer"
+        assert get_request_id() is None
+
+    def test_callsite_only_for_configured_levels(self, tmp_path, monkeypatch):
+        def log_calls(logger):
+            logger.info("quiet")
+            logger.error("loud")
+
+        events = {e["event"]: e for e in self._logged_events(tmp_path, monkeypatch, log_calls)}
+
+        assert "lineno" not in events["quiet"]
+        assert events["loud"]["filename"] == "test_structured_logging.py"
+        assert events["loud"]["func_name"] == "log_calls"
+
+    def test_parse_callsite_levels(self):
+        from structured_logging import CallsiteByLevel, parse_callsite_levels
+
+        assert parse_callsite_levels("none") == frozenset()
+        assert parse_callsite_levels("all") == frozenset(CallsiteByLevel.ALL_METHODS)
+        assert parse_callsite_levels("warning, error") == {
+            "warning",
+            "warn",
+            "error",
+            "err",
+            "exception",
+        }
@@ -0,0 +1,128 @@
+"""Tests for request tracing spans and slow-trace export."""
+
+import asyncio
+import json
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from structured_logging import RequestContext
+from tracing import FileExporter, InMemoryExporter, Tracer, current_span, slow_traces, traced
+
+
+@pytest.fixture
+def exporter():
+    return InMemoryExporter(threshold_ms=0)
+
+
+@pytest.fixture
+def tracer(exporter):
+    return Tracer([exporter])
+
+
+class TestSpans:
+    """Test span nesting and export."""
+
+    def test_children_share_trace_and_point_at_parent(self, tracer, exporter):
+        with tracer.start_span("root") as root, tracer.start_span("child", k="v") as child:
+            assert current_span() is child
+
+        assert current_span() is None
+        [trace] = exporter.traces()
+        spans = {s["name"]: s for s in trace["spans"]}
+        assert trace["traceId"] == root.trace_id
+        assert len(root.trace_id) == 32 and len(root.span_id) == 16
+        assert spans["child"]["traceId"] == root.trace_id
+        assert spans["child"]["parentSpanId"] == root.span_id
+        assert spans["child"]["attributes"] == {"k": "v"}
+        assert "parentSpanId" not in spans["root"]
+
+    def test_gathered_tasks_are_children_of_the_current_span(self, tracer, exporter):
+        async def work(name):
+            with tracer.start_span(name):
+                await asyncio.sleep(0)
+
+        async def main():
+            with tracer.start_span("root") as root:
+                await asyncio.gather(work("a"), work("b"))
+            return root
+
+        root = asyncio.run(main())
+
+        spans = exporter.traces()[0]["spans"]
+        assert sorted(s["name"] for s in spans) == ["a", "b", "root"]
+        assert {s.get("parentSpanId") for s in spans if s["name"] != "root"} == {root.span_id}
+
+    def test_exception_marks_span_as_error(self, tracer, exporter):
+        with pytest.raises(ValueError), tracer.start_span("root"):
+            raise ValueError("boom")
+
+        root = exporter.traces()[0]["spans"][0]
+        assert root["status"] == {"code": "ERROR", "message": "ValueError"}
+
+    def test_root_span_reuses_request_id_as_trace_id(self, tracer):
+        request_id = str(uuid.uuid4())
+
+        with RequestContext(request_id), tracer.start_span("root") as root:
+            pass
+
+        assert root.trace_id == uuid.UUID(request_id).hex
+
+    def test_fast_traces_are_not_kept(self):
+        exporter = InMemoryExporter(threshold_ms=10_000)
+        with Tracer([exporter]).start_span("root"):
+            pass
+
+        assert exporter.traces() == []
+
+    def test_file_exporter_writes_json_lines(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        exporter = FileExporter(str(path))
+        tracer = Tracer([exporter])
+        with tracer.start_span("root"), tracer.start_span("child"):
+            pass
+
+        assert exporter.flush()
+        exporter.close()
+        [line] = path.read_text().splitlines()
+        assert [s["name"] for s in json.loads(line)["spans"]] == ["root", "child"]
+
+    def test_traced_decorator_wraps_sync_and_async(self):
+        @traced("sync.op")
+        def sync_op():
+            return current_span().name
+
+        @traced()
+        async def async_op():
+            return current_span().name
+
+        assert sync_op() == "sync.op"
+        assert asyncio.run(async_op()).endswith("async_op")
+
+
+class TestRequestTracing:
+    """Test tracing across the analyze request path."""
+
+    def test_analyze_trace_covers_pipeline_stages(self, client, monkeypatch):
+        monkeypatch.setattr(slow_traces, "threshold_ms", 0)
+        slow_traces.clear()
+
+        with patch("llm_providers.call_openai", new_callable=AsyncMock) as mock_openai:
+            mock_openai.return_value = {"model": "openai", "response": "Fine.", "error": None}
+            response = client.post("/api/analyze", json={"text": "Hello", "openai_key": "sk-x"})
+        assert response.status_code == 200
+
+        trace = client.get("/api/traces/slow?limit=5").json()["traces"]
+        analyze = next(t for t in trace if t["name"] == "POST /api/analyze")
+        names = [s["name"] for s in analyze["spans"]]
+        for stage in (
+            "analyze.validate",
+            "analyze.check_token_limits",
+            "analyze.providers",
+            "llm.call",
+            "analyze.limit_response_size",
+            "consensus.analyze",
+        ):
+            assert stage in names
+        assert analyze["traceId"] == uuid.UUID(response.headers["X-Request-ID"]).hex
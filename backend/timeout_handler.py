@@ -10,13 +10,15 @@ This module provides:
 import asyncio
 import builtins
 import time
+from collections import OrderedDict
 from collections.abc import Callable, Coroutine
 from functools import wraps
-from statistics import mean, stdev
 from typing import Any, TypeVar
 
 import structlog
 
+from latency_histogram import DEFAULT_PERCENTILES, LatencyHistogram
+
 logger = structlog.get_logger(__name__)
 
 # Type variable for generic return type
@@ -40,51 +42,125 @@ RETRY_CONFIG = {
 }
 
 
+class _OperationLatency:
+    """Current and previous histogram windows for one operation."""
+
+    __slots__ = ("current", "previous", "rotated_at")
+
+    def __init__(self, now: float):
+        self.current = LatencyHistogram()
+        self.previous = LatencyHistogram()
+        self.rotated_at = now
+
+
 # Track response times for adaptive timeouts
 class ResponseTimeTracker:
-    """Track response times to adaptively adjust timeouts."""
+    """Track response time histograms to adaptively adjust timeouts.
 
-    def __init__(self, window_size: int = 100):
-        self.window_size = window_size
-        self.response_times: dict[str, list[float]] = {}
+    Each operation keeps two histogram windows of ``window_seconds``: new
+    samples go into the current one, which becomes the previous one once
+    it is ``window_seconds`` old. Percentiles are read from both merged,
+    so they cover between one and two windows of recent traffic.
+
+    Operation names include client-chosen model names, so at most
+    ``max_operations`` are kept: a new name evicts the least recently
+    recorded one, and ``sweep_expired`` drops operations whose samples have
+    all aged out.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 300.0,
+        max_operations: int = 500,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialize the tracker.
+
+        Args:
+            window_seconds: Length of each histogram window
+            max_operations: Operations tracked before the least recently
+                recorded is evicted (each costs one pair of histograms)
+            clock: Monotonic time source in seconds (overridable for tests)
+
+        """
+        self.window_seconds = window_seconds
+        self.max_operations = max_operations
+        self.clock = clock
+        self.operations: OrderedDict[str, _OperationLatency] = OrderedDict()
+        self.evictions = 0
+
+    def _rotate(self, latency: _OperationLatency, now: float) -> None:
+        """Age out windows older than window_seconds."""
+        elapsed = now - latency.rotated_at
+        if elapsed < self.window_seconds:
+            return
+        # Past two windows nothing recent is left
+        latency.previous = (
+            latency.current if elapsed < 2 * self.window_seconds else LatencyHistogram()
+        )
+        latency.current = LatencyHistogram()
+        latency.rotated_at = now
 
     def record(self, operation: str, duration: float) -> None:
         """Record a response time for an operation."""
-        if operation not in self.response_times:
-            self.response_times[operation] = []
+        now = self.clock()
+        latency = self.operations.get(operation)
+        if latency is None:
+            if len(self.operations) >= self.max_operations:
+                self.operations.popitem(last=False)
+                self.evictions += 1
+            latency = self.operations[operation] = _OperationLatency(now)
+        else:
+            self._rotate(latency, now)
+            self.operations.move_to_end(operation)
+        latency.current.record(duration)
 
-        times = self.response_times[operation]
-        times.append(duration)
+    def sweep_expired(self) -> int:
+        """Drop operations with no samples left in either window.
 
-        # Keep only the last window_size entries
-        if len(times) > self.window_size:
-            self.response_times[operation] = times[-self.window_size :]
+        Returns:
+            Number of operations removed
 
-    def get_recommended_timeout(self, operation: str, confidence: float = 3.0) -> float:
+        """
+        cutoff = self.clock() - 2 * self.window_seconds
+        expired = [op for op, latency in self.operations.items() if latency.rotated_at <= cutoff]
+        for operation in expired:
+            del self.operations[operation]
+        return len(expired)
+
+    def get_histogram(self, operation: str) -> LatencyHistogram:
+        """Return a merged snapshot of an operation's recent response times."""
+        latency = self.operations.get(operation)
+        if latency is None:
+            return LatencyHistogram()
+        self._rotate(latency, self.clock())
+        return latency.current.snapshot().merge(latency.previous)
+
+    def get_typical_latency(self, operation: str) -> float | None:
+        """Return the median recent response time, or None without samples."""
+        return self.get_histogram(operation).percentile(50.0)
+
+    def get_recommended_timeout(
+        self, operation: str, percentile: float = 99.0, headroom: float = 1.5
+    ) -> float:
         """Get recommended timeout based on historical data.
 
         Args:
             operation: The operation name
-            confidence: Number of standard deviations to add (default 3.0)
+            percentile: Tail percentile the timeout is based on (default p99)
+            headroom: Multiplier applied to that percentile (default 1.5)
 
         Returns:
             Recommended timeout in seconds
 
         """
-        if operation not in self.response_times or len(self.response_times[operation]) < 5:
+        histogram = self.get_histogram(operation)
+        if histogram.count < 5:
             # Not enough data, use default
             return TIMEOUT_CONFIG.get(operation, TIMEOUT_CONFIG["default"])
 
-        times = self.response_times[operation]
-        avg_time = mean(times)
-
-        # Calculate standard deviation if we have enough samples
-        if len(times) >= 10:
-            std_time = stdev(times)
-            recommended = avg_time + (confidence * std_time)
-        else:
-            # Use a simple multiplier if not enough samples
-            recommended = avg_time * 2
+        tail_time = histogram.percentile(percentile)
+        recommended = tail_time * headroom
 
         # Ensure minimum timeout
         min_timeout = TIMEOUT_CONFIG.get(operation, TIMEOUT_CONFIG["default"]) * 0.5
@@ -97,9 +173,10 @@ class ResponseTimeTracker:
         logger.debug(
             "Calculated adaptive timeout",
             operation=operation,
-            avg_time=round(avg_time, 2),
+            percentile=percentile,
+            tail_time=round(tail_time, 2),
             recommended=round(recommended, 2),
-            samples=len(times),
+            samples=histogram.count,
         )
 
         return recommended
@@ -365,28 +442,35 @@ def get_timeout_stats() -> dict[str, Any]:
     """Get timeout statistics for monitoring."""
     stats: dict[str, Any] = {}
 
-    for operation, times in response_tracker.response_times.items():
-        if times:
+    for operation in list(response_tracker.operations):
+        histogram = response_tracker.get_histogram(operation)
+        if histogram.count:
+            percentiles = histogram.percentiles(DEFAULT_PERCENTILES)
             stats[operation] = {
-                "samples": len(times),
-                "min": round(min(times), 2),
-                "max": round(max(times), 2),
-                "avg": round(mean(times), 2),
+                "samples": histogram.count,
+                "min": round(histogram.min, 3),
+                "max": round(histogram.max, 3),
+                "avg": round(histogram.mean, 3),
+                **{_percentile_label(p): round(value, 3) for p, value in percentiles.items()},
                 "recommended_timeout": round(
                     response_tracker.get_recommended_timeout(operation), 2
                 ),
             }
 
-            if len(times) >= 10:
-                stats[operation]["stddev"] = round(stdev(times), 2)
-
     return {
         "operations": stats,
+        "window_seconds": response_tracker.window_seconds,
+        "evictions": response_tracker.evictions,
         "config": TIMEOUT_CONFIG,
         "retry_config": RETRY_CONFIG,
     }
 
 
+def _percentile_label(percentile: float) -> str:
+    """Return a stats key like p50, p99 or p999 for a percentile."""
+    return "p" + f"{percentile:g}".replace(".", "")
+
+
 # Example usage
 if __name__ == "__main__":
 
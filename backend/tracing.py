@@ -0,0 +1,343 @@
+"""Lightweight request tracing with OpenTelemetry-compatible spans.
+
+Spans nest through a ``ContextVar``, so work started under a span --
+including tasks created by ``asyncio.gather`` -- becomes its child without
+passing anything around. A trace is exported when its root span ends.
+Root spans opened inside ``RequestContext`` reuse the request id as their
+trace id (a uuid4's hex is a valid 128-bit W3C trace id), so a trace can
+be matched to its log lines directly.
+
+Exported spans use OTLP JSON field names (``traceId``, ``spanId``,
+``parentSpanId``, ``startTimeUnixNano``...), so files written by
+``FileExporter`` can be loaded into OpenTelemetry tooling without the SDK
+being a dependency here.
+"""
+
+import functools
+import inspect
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+
+from structured_logging import get_logger, get_request_id
+
+logger = get_logger(__name__)
+
+# Root spans at least this slow are kept for /api/traces/slow
+SLOW_TRACE_THRESHOLD_MS = float(os.getenv("SLOW_TRACE_THRESHOLD_MS", "1000"))
+MAX_SLOW_TRACES = int(os.getenv("MAX_SLOW_TRACES", "100"))
+# Spans beyond this are dropped so a runaway loop can't grow one trace forever
+MAX_SPANS_PER_TRACE = 1000
+
+STATUS_OK = "OK"
+STATUS_ERROR = "ERROR"
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64) or 1:016x}"
+
+
+def _new_trace_id() -> str:
+    """Return the current request id as a trace id, or a random one."""
+    request_id = get_request_id()
+    if request_id:
+        try:
+            return uuid.UUID(str(request_id)).hex
+        except ValueError:
+            pass
+    return f"{random.getrandbits(128) or 1:032x}"
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = (
+        "_spans",
+        "_start",
+        "attributes",
+        "duration_ms",
+        "end_time_ns",
+        "name",
+        "parent_id",
+        "span_id",
+        "start_time_ns",
+        "status",
+        "status_message",
+        "trace_id",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: str | None,
+        spans: list["Span"],
+        attributes: dict[str, Any],
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_span_id()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.status = STATUS_OK
+        self.status_message = ""
+        self.start_time_ns = time.time_ns()
+        self.end_time_ns = 0
+        self.duration_ms = 0.0
+        self._start = time.perf_counter()
+        self._spans = spans
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Attach a key/value to the span."""
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        """Mark the span as failed."""
+        self.status = STATUS_ERROR
+        self.status_message = message
+
+    def record_exception(self, exc: BaseException) -> None:
+        """Mark the span as failed by an exception."""
+        self.set_error(type(exc).__name__)
+        self.attributes["exception.type"] = type(exc).__name__
+
+    def end(self) -> None:
+        """Stop the span's clock."""
+        self.duration_ms = (time.perf_counter() - self._start) * 1000
+        self.end_time_ns = self.start_time_ns + int(self.duration_ms * 1_000_000)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the span in OTLP JSON field naming."""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_time_ns,
+            "endTimeUnixNano": self.end_time_ns,
+            "durationMs": round(self.duration_ms, 3),
+            "attributes": dict(self.attributes),
+            "status": {"code": self.status},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Span | None:
+    """Return the innermost active span, if any."""
+    return _current_span.get()
+
+
+class InMemoryExporter:
+    """Keep the most recent traces whose root span was slow."""
+
+    def __init__(
+        self, threshold_ms: float = SLOW_TRACE_THRESHOLD_MS, max_traces: int = MAX_SLOW_TRACES
+    ):
+        self.threshold_ms = threshold_ms
+        self._traces: deque[dict[str, Any]] = deque(maxlen=max_traces)
+
+    def export(self, trace: dict[str, Any]) -> None:
+        if trace["durationMs"] >= self.threshold_ms:
+            self._traces.append(trace)
+
+    def traces(self, limit: int | None = None) -> list[dict[str, Any]]:
+        """Return kept traces, newest first."""
+        newest_first = list(reversed(self._traces))
+        return newest_first[:limit] if limit is not None else newest_first
+
+    def clear(self) -> None:
+        self._traces.clear()
+
+
+_STOP = object()
+
+
+class FileExporter:
+    """Append each trace as one JSON line to a file.
+
+    Root spans usually end on the event loop, so ``export`` only queues the
+    trace; a daemon thread serializes queued traces and appends them in
+    batches. Traces arriving while the queue is full are dropped and counted.
+    """
+
+    def __init__(
+        self, path: str, threshold_ms: float = 0.0, queue_size: int = 1000, batch_size: int = 100
+    ):
+        self.path = Path(path)
+        self.threshold_ms = threshold_ms
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._writer = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+        self._writer.start()
+
+    def export(self, trace: dict[str, Any]) -> None:
+        if trace["durationMs"] < self.threshold_ms:
+            return
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            items = [self._queue.get()]
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            traces = [item for item in items if isinstance(item, dict)]
+            if traces:
+                lines = "".join(json.dumps(trace, default=str) + "\n" for trace in traces)
+                try:
+                    with self.path.open("a", encoding="utf-8") as f:
+                        f.write(lines)
+                except OSError as e:
+                    logger.error("Trace export failed", path=str(self.path), error=str(e))
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if _STOP in items:
+                return
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until traces queued so far have been written.
+
+        Returns:
+            True if the queue drained within ``timeout``
+
+        """
+        if not self._writer.is_alive():
+            return False
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """Write queued traces and stop the writer thread."""
+        if self._writer.is_alive():
+            with suppress(queue.Full):
+                self._queue.put(_STOP, timeout=5.0)
+            self._writer.join(timeout=5.0)
+
+
+class Tracer:
+    """Create spans and hand finished traces to exporters."""
+
+    def __init__(self, exporters: list[Any] | None = None):
+        self.exporters = list(exporters or [])
+
+    def add_exporter(self, exporter: Any) -> None:
+        self.exporters.append(exporter)
+
+    @contextmanager
+    def start_span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Time a block as a span, child of the current span if there is one.
+
+        Args:
+            name: Span name, e.g. ``analyze.consensus``
+            **attributes: Initial span attributes
+
+        Yields:
+            The active span
+
+        """
+        parent = _current_span.get()
+        if parent is None:
+            spans: list[Span] = []
+            span = Span(name, _new_trace_id(), None, spans, attributes)
+        else:
+            spans = parent._spans
+            span = Span(name, parent.trace_id, parent.span_id, spans, attributes)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            if len(spans) < MAX_SPANS_PER_TRACE:
+                spans.append(span)
+            if parent is None:
+                self._export(span, spans)
+
+    def _export(self, root: Span, spans: list[Span]) -> None:
+        if not self.exporters:
+            return
+        trace = {
+            "traceId": root.trace_id,
+            "name": root.name,
+            "startTimeUnixNano": root.start_time_ns,
+            "durationMs": round(root.duration_ms, 3),
+            "status": root.status,
+            "spans": [s.to_dict() for s in sorted(spans, key=lambda s: s.start_time_ns)],
+        }
+        for exporter in self.exporters:
+            try:
+                exporter.export(trace)
+            except Exception as e:
+                logger.error(
+                    "Trace exporter failed", exporter=type(exporter).__name__, error=str(e)
+                )
+
+
+slow_traces = InMemoryExporter()
+tracer = Tracer([slow_traces])
+if os.getenv("TRACE_EXPORT_PATH"):
+    tracer.add_exporter(FileExporter(os.environ["TRACE_EXPORT_PATH"]))
+
+start_span = tracer.start_span
+
+
+def traced(name: str | None = None) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorate a sync or async function to run inside a span.
+
+    Args:
+        name: Span name, defaulting to the function's qualified name
+
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with start_span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with start_span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
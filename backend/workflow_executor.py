@@ -3,18 +3,23 @@ Handles workflow execution from the visual builder
 """
 
 import asyncio
+import time
 from collections import defaultdict, deque
 from typing import Any
 
 import structlog
 
 from llm_providers import call_claude, call_gemini, call_grok, call_ollama_fixed, call_openai
+from metrics import WORKFLOW_NODE_DURATION
 from structured_logging import sanitize_sensitive_data
+from tracing import start_span, traced
 
 # TokenCounter not needed for basic workflow execution
 
 logger = structlog.get_logger(__name__)
 
+NODE_TYPES = frozenset({"input", "llm", "compare", "summarize", "output"})
+
 
 class WorkflowExecutor:
     """Execute visual workflows with proper topological ordering."""
@@ -23,6 +28,7 @@ class WorkflowExecutor:
         self.api_keys = api_keys
         self.results = {}
 
+    @traced("workflow.execute")
     async def execute(self, nodes: list[dict], edges: list[dict]) -> dict[str, Any]:
         """Execute a workflow defined by nodes and edges.
 
@@ -86,55 +92,70 @@ class WorkflowExecutor:
 
         logger.info("Executing node", node_id=node_id, node_type=node_type)
 
-        try:
-            logger.debug(
-                "Node execution details", node_id=node_id, node_type=node_type, node_data=node_data
-            )
-
-            if node_type == "input":
-                logger.debug("Calling _execute_input_node")
-                result = await self._execute_input_node(node_data)
-                logger.debug("_execute_input_node result", result=result)
-
-            elif node_type == "llm":
-                # Get input from connected nodes
-                input_text = await self._get_node_inputs(node_id, edges)
-                result = await self._execute_llm_node(node_data, input_text)
-
-            elif node_type == "compare":
-                # Get multiple inputs
-                inputs = await self._get_all_node_inputs(node_id, edges)
-                result = await self._execute_compare_node(node_data, inputs)
-
-            elif node_type == "summarize":
-                input_text = await self._get_node_inputs(node_id, edges)
-                result = await self._execute_summarize_node(node_data, input_text)
-
-            elif node_type == "output":
-                input_data = await self._get_node_inputs(node_id, edges)
-                result = await self._execute_output_node(node_data, input_data)
-
-            else:
-                raise ValueError(f"Unknown node type: {node_type}")
-
-            self.results[node_id] = {
-                "type": node_type,
-                "status": "success",
-                "result": result,
-            }
+        start = time.perf_counter()
+        status = "error"
+        with start_span("workflow.node", node_id=node_id, node_type=node_type) as span:
+            try:
+                logger.debug(
+                    "Node execution details",
+                    node_id=node_id,
+                    node_type=node_type,
+                    node_data=node_data,
+                )
+
+                if node_type == "input":
+                    logger.debug("Calling _execute_input_node")
+                    result = await self._execute_input_node(node_data)
+                    logger.debug("_execute_input_node result", result=result)
+
+                elif node_type == "llm":
+                    # Get input from connected nodes
+                    input_text = await self._get_node_inputs(node_id, edges)
+                    result = await self._execute_llm_node(node_data, input_text)
+
+                elif node_type == "compare":
+                    # Get multiple inputs
+                    inputs = await self._get_all_node_inputs(node_id, edges)
+                    result = await self._execute_compare_node(node_data, inputs)
+
+                elif node_type == "summarize":
+                    input_text = await self._get_node_inputs(node_id, edges)
+                    result = await self._execute_summarize_node(node_data, input_text)
+
+                elif node_type == "output":
+                    input_data = await self._get_node_inputs(node_id, edges)
+                    result = await self._execute_output_node(node_data, input_data)
 
-            return result
+                else:
+                    raise ValueError(f"Unknown node type: {node_type}")
 
-        except Exception as e:
-            sanitized_error = sanitize_sensitive_data(str(e))
-            logger.error("Node execution failed", node_id=node_id, error=sanitized_error)
-            self.results[node_id] = {
-                "type": node_type,
-                "status": "error",
-                "error": sanitized_error,
-            }
+                self.results[node_id] = {
+                    "type": node_type,
+                    "status": "success",
+                    "result": result,
+                }
+                status = "success"
+
+                return result
+
+            except Exception as e:
+                sanitized_error = sanitize_sensitive_data(str(e))
+                logger.error("Node execution failed", node_id=node_id, error=sanitized_error)
+                span.record_exception(e)
+                self.results[node_id] = {
+                    "type": node_type,
+                    "status": "error",
+                    "error": sanitized_error,
+                }
+
+                return None
 
-            return None
+            finally:
+                WORKFLOW_NODE_DURATION.observe(
+                    time.perf_counter() - start,
+                    node_type=node_type if node_type in NODE_TYPES else "unknown",
+                    status=status,
+                )
 
     async def _execute_input_node(self, data: dict) -> str:
         """Execute input node - return the content."""